@@ -0,0 +1,38 @@
+# coding: utf-8
+"""
+Redirects per second served by a single `WSGIApp` worker.
+The app is called in process, so the numbers leave the HTTP server out.
+
+    python benchmarks/redirects.py [requests] [codes]
+"""
+from __future__ import print_function
+
+import random
+import sys
+import time
+
+from pyshorteners.server import WSGIApp
+
+
+def start_response(status, headers):
+    pass
+
+
+def main(requests=200000, codes=10000):
+    app = WSGIApp()
+    engine = app.service.engine
+    paths = ['/' + engine.short('http://www.test.com/{0}'.format(i))
+             .rsplit('/', 1)[-1] for i in range(codes)]
+    environs = [{'REQUEST_METHOD': 'GET', 'PATH_INFO': random.choice(paths)}
+                for _ in range(requests)]
+
+    start = time.time()
+    for environ in environs:
+        app(environ, start_response)
+    elapsed = time.time() - start
+    print('{0} redirects in {1:.2f}s - {2:.0f} redirects/s per worker'.format(
+        requests, elapsed, requests / elapsed))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,77 @@
+# encoding: utf-8
+"""
+Micro-batching of single calls
+Calls made within `max_delay` seconds of each other, up to `max_size` of
+them, are sent to a batch function as one list. The first caller of a batch
+waits for the others and runs the function, then every caller gets its own
+result, or exception, back.
+"""
+import threading
+
+from . import forksafe
+from .deadline import outlived, wait
+
+
+class _Batch(object):
+
+    def __init__(self):
+        self.items = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results = None
+
+
+class MicroBatcher(object):
+    """
+    `fn` - takes a list of items and returns their results in order, with
+    an exception instance in place of the result of a failed item
+    `max_size` - items of a batch, 50 default value
+    `max_delay` - seconds a call waits for others, 0.005 default value
+    """
+
+    def __init__(self, fn, max_size=50, max_delay=0.005):
+        self.fn = fn
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._batch = None
+        forksafe.register(self)
+
+    def _after_fork(self):
+        # the callers of a pending batch are parent threads
+        self._lock = threading.Lock()
+        self._batch = None
+
+    def submit(self, item):
+        with self._lock:
+            batch = self._batch
+            leader = batch is None
+            if leader:
+                batch = self._batch = _Batch()
+            position = len(batch.items)
+            batch.items.append(item)
+            if len(batch.items) >= self.max_size:
+                self._batch = None
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.max_delay)
+            with self._lock:
+                if self._batch is batch:
+                    self._batch = None
+            try:
+                batch.results = self.fn(list(batch.items))
+            except Exception as e:
+                batch.results = [e] * len(batch.items)
+            finally:
+                batch.done.set()
+        else:
+            wait(batch.done)
+
+        result = batch.results[position]
+        if not leader and outlived(result):
+            # the leader ran out of its own time, not of this call's
+            return self.submit(item)
+        if isinstance(result, Exception):
+            raise result
+        return result
@@ -0,0 +1,113 @@
+# encoding: utf-8
+"""
+Bloom filter over the urls already shortened
+`url in bloom` is False for every url never added, and wrongly True for a
+share `error_rate` of them, so a False answer skips a store lookup.
+With a `path` the bits live on a memory mapped file, opening an existing
+filter only maps it.
+"""
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+
+from . import forksafe
+
+# header: magic, bits, hashes, items added
+_HEADER = struct.Struct('<8sQQQ')
+_MAGIC = b'PYSHBLM1'
+
+
+class BloomFilter(object):
+    """
+    `capacity` - number of items the filter is sized for, 1000000 default
+    value
+    `error_rate` - false positive rate at `capacity` items, 0.01 default
+    value
+    `path` - file keeping the filter, the capacity and error rate of an
+    existing file are kept
+    """
+
+    def __init__(self, capacity=1000000, error_rate=0.01, path=None):
+        if not 0 < error_rate < 1:
+            raise ValueError('error_rate must be between 0 and 1')
+        self.path = path
+        bits_per_item = -math.log(error_rate) / math.log(2) ** 2
+        bits = int(math.ceil(capacity * bits_per_item))
+        bits = max(8, (bits + 7) // 8 * 8)
+        hashes = max(1, int(round(bits / float(capacity) * math.log(2))))
+        size = _HEADER.size + bits // 8
+        if path is None:
+            self._bits = bytearray(size)
+            _HEADER.pack_into(self._bits, 0, _MAGIC, bits, hashes, 0)
+        else:
+            if not os.path.exists(path):
+                with open(path, 'wb') as f:
+                    f.write(_HEADER.pack(_MAGIC, bits, hashes, 0))
+                    f.truncate(size)
+            with open(path, 'r+b') as f:
+                self._bits = mmap.mmap(f.fileno(), 0)
+        magic, self.bits, self.hashes, self._count = \
+            _HEADER.unpack_from(self._bits, 0)
+        if magic != _MAGIC:
+            raise ValueError('{0} is not a valid bloom filter'.format(path))
+        self._lock = threading.Lock()
+        forksafe.register(self)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first, second = struct.unpack('<QQ', digest)
+        second |= 1
+        return [(first + i * second) % self.bits for i in range(self.hashes)]
+
+    def add(self, item):
+        positions = self._positions(item)
+        bits = self._bits
+        with self._lock:
+            for position in positions:
+                index = _HEADER.size + (position >> 3)
+                bits[index] |= 1 << (position & 7)
+            self._count += 1
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item):
+        bits = self._bits
+        for position in self._positions(item):
+            if not bits[_HEADER.size + (position >> 3)] & \
+                    1 << (position & 7):
+                return False
+        return True
+
+    def __len__(self):
+        """
+        Number of items added, counting the ones added twice
+        """
+        return self._count
+
+    @property
+    def error_rate(self):
+        """
+        Expected false positive rate with the items added so far
+        """
+        fill = self.hashes * self._count / float(self.bits)
+        return (1 - math.exp(-fill)) ** self.hashes
+
+    def flush(self):
+        with self._lock:
+            _HEADER.pack_into(self._bits, 0, _MAGIC, self.bits, self.hashes,
+                              self._count)
+            if self.path is not None:
+                self._bits.flush()
+
+    def close(self):
+        self.flush()
+        if self.path is not None:
+            self._bits.close()
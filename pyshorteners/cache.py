@@ -0,0 +1,303 @@
+# encoding: utf-8
+"""
+Caches used in front of the shorteners and the mapping stores
+`BaseCache` is the interface of the cache backends a `Client` keeps the
+short/long url pairs on: `LRUCache` in memory, `StoreCache` on a mapping
+store, `RedisCache` shared by many hosts and `ShardedCache` spreading the
+keys across other backends.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from . import forksafe
+from .hashring import HashRing
+from .utils import canonicalize_url
+
+
+class BaseCache(object):
+    """
+    Keys are tuples of strings, values strings. `ttl` is in seconds, values
+    set without one never expire
+    """
+
+    def get(self, key, default=None):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def get_many(self, keys):
+        """
+        Returns the values of `keys` in order, None for the missing ones
+        """
+        return [self.get(key) for key in keys]
+
+    def set_many(self, items, ttl=None):
+        """
+        Stores the (key, value) pairs of `items`
+        """
+        for key, value in items:
+            self.set(key, value, ttl)
+
+
+class LRUCache(BaseCache):
+    """
+    Thread safe least recently used cache holding up to `maxsize` items
+    """
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._expires = {}
+        self._lock = threading.Lock()
+        forksafe.register(self)
+
+    def _after_fork(self):
+        # the lock may have been held by a parent thread while forking
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                return default
+            if key in self._expires and self._expires[key] < time.time():
+                del self._expires[key]
+                return default
+            self._items[key] = value
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+            if ttl is None:
+                self._expires.pop(key, None)
+            else:
+                self._expires[key] = time.time() + ttl
+            if len(self._items) > self.maxsize:
+                oldest, _ = self._items.popitem(last=False)
+                self._expires.pop(oldest, None)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+            self._expires.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._expires.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+
+class NegativeCache(object):
+    """
+    Remembers permanent shortening/expanding errors for `ttl` seconds, on
+    an `LRUCache` of `maxsize` items
+    """
+
+    def __init__(self, ttl=60, maxsize=10000):
+        self.ttl = ttl
+        self._errors = LRUCache(maxsize)
+
+    def get(self, key, default=None):
+        return self._errors.get(key, default)
+
+    def set(self, key, error):
+        """
+        Stores `error` unless it is retryable
+        """
+        if getattr(error, 'retryable', True):
+            return
+        self._errors.set(key, (type(error), str(error), error.status_code),
+                         self.ttl)
+
+    def delete(self, key):
+        self._errors.delete(key)
+
+    def clear(self):
+        self._errors.clear()
+
+    def __len__(self):
+        return len(self._errors)
+
+    def __contains__(self, key):
+        return key in self._errors
+
+    def raise_for(self, key):
+        """
+        Raises a new copy of the error remembered for `key`, if any
+        """
+        error = self.get(key)
+        if error is not None:
+            error_class, message, status_code = error
+            raise error_class(message, status_code=status_code)
+
+
+class StoreCache(BaseCache):
+    """
+    Cache backend on a `pyshorteners.stores` mapping store, where one
+    short/long pair serves both directions. Entries never expire
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def get(self, key, default=None):
+        if key[0] == 'short':
+            value = self.store.get_code(key[-1])
+        else:
+            value = self.store.get(key[-1])
+        return default if value is None else value
+
+    def _pair(self, key, value):
+        if key[0] == 'short':
+            return value, key[-1]
+        return key[-1], value
+
+    def set(self, key, value, ttl=None):
+        self.store.set(*self._pair(key, value))
+
+    def set_many(self, items, ttl=None):
+        seen = set()
+        for key, value in items:
+            pair = self._pair(key, value)
+            if pair not in seen:
+                seen.add(pair)
+                self.store.set(*pair)
+
+    def delete(self, key):
+        # stores keep their mappings
+        pass
+
+
+class RedisCache(BaseCache):
+    """
+    Cache backend on a redis server shared by every node. Batch calls take
+    one round trip: `get_many` is a MGET and `set_many` a pipeline.
+    `client` - redis client to use, one on `url` is created by default
+    (needs the redis package)
+    `prefix` - prefix of the redis keys
+    """
+
+    def __init__(self, client=None, url='redis://localhost:6379/0',
+                 prefix='pyshorteners'):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key):
+        return ':'.join((self.prefix,) + tuple(key))
+
+    @staticmethod
+    def _seconds(ttl):
+        # redis expirations are whole seconds
+        return None if ttl is None else max(1, int(math.ceil(ttl)))
+
+    @staticmethod
+    def _value(value):
+        if isinstance(value, bytes):
+            return value.decode('utf-8')
+        return value
+
+    def get(self, key, default=None):
+        value = self.client.get(self._key(key))
+        return default if value is None else self._value(value)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self._key(key), value, ex=self._seconds(ttl))
+
+    def delete(self, key):
+        self.client.delete(self._key(key))
+
+    def get_many(self, keys):
+        if not keys:
+            return []
+        values = self.client.mget([self._key(key) for key in keys])
+        return [self._value(value) for value in values]
+
+    def set_many(self, items, ttl=None):
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in items:
+            pipeline.set(self._key(key), value, ex=self._seconds(ttl))
+        pipeline.execute()
+
+
+class ShardedCache(BaseCache):
+    """
+    Spreads the keys across cache backends with a consistent hash ring, so
+    adding or removing a shard only moves the keys it owns. Keys are routed
+    on their canonical url, so every spelling of an url uses one shard.
+    `shards` - dict of shard name -> cache backend, or a list of them named
+    after their position
+    """
+
+    def __init__(self, shards, replicas=100):
+        if not isinstance(shards, dict):
+            shards = dict((str(position), shard)
+                          for position, shard in enumerate(shards))
+        self.shards = dict(shards)
+        self.ring = HashRing(sorted(self.shards), replicas)
+
+    def add(self, name, shard):
+        self.shards[name] = shard
+        self.ring.add(name)
+
+    def remove(self, name):
+        self.ring.remove(name)
+        return self.shards.pop(name)
+
+    @staticmethod
+    def _route(key):
+        # the url is the last part of the key
+        return '\0'.join(key[:-1] + (canonicalize_url(key[-1]),))
+
+    def shard_for(self, key):
+        return self.shards[self.ring.node_for(self._route(key))]
+
+    def get(self, key, default=None):
+        return self.shard_for(key).get(key, default)
+
+    def set(self, key, value, ttl=None):
+        self.shard_for(key).set(key, value, ttl)
+
+    def delete(self, key):
+        self.shard_for(key).delete(key)
+
+    def _by_shard(self, keys):
+        groups = OrderedDict()
+        for position, key in enumerate(keys):
+            name = self.ring.node_for(self._route(key))
+            groups.setdefault(name, []).append(position)
+        return groups
+
+    def get_many(self, keys):
+        keys = list(keys)
+        results = [None] * len(keys)
+        for name, positions in self._by_shard(keys).items():
+            values = self.shards[name].get_many([keys[position]
+                                                 for position in positions])
+            for position, value in zip(positions, values):
+                results[position] = value
+        return results
+
+    def set_many(self, items, ttl=None):
+        items = list(items)
+        groups = self._by_shard([key for key, _ in items])
+        for name, positions in groups.items():
+            self.shards[name].set_many([items[position]
+                                        for position in positions], ttl)
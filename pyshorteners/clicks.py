@@ -0,0 +1,148 @@
+# encoding: utf-8
+"""
+Click counting for the links served by the redirect service
+
+Every thread keeps running totals on its own dict, only written by that
+thread, so recording a click takes no lock. The flusher copies each dict,
+writes the growth since its last copy as one `incr_clicks` call per code
+and keeps the copy, so a click is never lost nor counted twice. Codes not
+clicked over a whole flush interval are dropped by their thread on its
+next click, which keeps the dicts to the codes clicked lately.
+"""
+import threading
+
+from . import forksafe
+
+
+class _Slot(object):
+    """
+    Clicks counted by one thread
+    """
+
+    def __init__(self, thread):
+        self.thread = thread
+        # running totals, written by the thread only
+        self.counts = {}
+        # totals already written to the store
+        self.flushed = {}
+        # codes the flusher found idle, dropped by the thread
+        self.idle = None
+        # held by the flusher and by the thread while it drops codes
+        self.lock = threading.Lock()
+
+    def prune(self):
+        with self.lock:
+            counts, flushed = self.counts, self.flushed
+            for code in self.idle:
+                # clicked again since the flush, kept
+                if counts.get(code) == flushed.get(code):
+                    del counts[code]
+                    del flushed[code]
+            self.idle = None
+
+    def pending(self, code):
+        with self.lock:
+            return self.counts.get(code, 0) - self.flushed.get(code, 0)
+
+
+class ClickCounter(object):
+    """
+    `store` - mapping store receiving the aggregated clicks
+    `interval` - seconds between background flushes, None disables the
+    background flusher and `flush` has to be called explicitly
+    """
+
+    def __init__(self, store, interval=1.0):
+        self.store = store
+        self.interval = interval
+        self._local = threading.local()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._flusher = None
+        self._stopped = threading.Event()
+        forksafe.register(self)
+
+    def _after_fork(self):
+        # the parent flushes the clicks it counted, the child starts
+        # from scratch with its own flusher
+        self._local = threading.local()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._flusher = None
+        self._stopped = threading.Event()
+
+    def _register(self):
+        slot = self._local.slot = _Slot(threading.current_thread())
+        with self._lock:
+            self._threads.append(slot)
+            if self.interval and self._flusher is None:
+                self._start()
+        return slot
+
+    def _start(self):
+        self._stopped.clear()
+        self._flusher = threading.Thread(target=self._run,
+                                         name='pyshorteners-clicks')
+        self._flusher.daemon = True
+        self._flusher.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.flush()
+
+    def incr(self, code, amount=1):
+        try:
+            slot = self._local.slot
+        except AttributeError:
+            slot = self._register()
+        if slot.idle is not None:
+            slot.prune()
+        counts = slot.counts
+        counts[code] = counts.get(code, 0) + amount
+
+    def flush(self):
+        """
+        Writes the clicks counted since the last flush to the store
+        """
+        with self._lock:
+            deltas = {}
+            alive = []
+            for slot in self._threads:
+                with slot.lock:
+                    # a copy is taken at once, the thread may be counting
+                    counts = slot.counts.copy()
+                    flushed = slot.flushed
+                    idle = []
+                    for code, total in counts.items():
+                        delta = total - flushed.get(code, 0)
+                        if delta:
+                            deltas[code] = deltas.get(code, 0) + delta
+                        else:
+                            idle.append(code)
+                    slot.flushed = counts
+                    if idle:
+                        slot.idle = idle
+                # nothing is counted by an exited thread anymore
+                if slot.thread.is_alive():
+                    alive.append(slot)
+            self._threads = alive
+            for code, delta in deltas.items():
+                self.store.incr_clicks(code, delta)
+
+    def total(self, code):
+        """
+        Returns the stored clicks of `code` plus the ones not flushed yet
+        """
+        with self._lock:
+            pending = sum(slot.pending(code) for slot in self._threads)
+            return self.store.clicks(code) + pending
+
+    def stop(self):
+        """
+        Stops the background flusher and flushes the pending clicks
+        """
+        self._stopped.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
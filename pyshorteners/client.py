@@ -0,0 +1,397 @@
+# encoding: utf-8
+"""
+Stateless shortener client
+A `Client` builds its engine once and never changes after that: results are
+returned instead of stored and the configuration is read only, so one
+instance can be shared by many threads.
+
+    from pyshorteners.client import Client
+
+    client = Client('Tinyurl', timeout=2)
+    short = client.short('http://www.google.com')
+
+`short_many` and `expand_many` run bulk jobs on a thread pool, or shard them
+across worker processes when `processes` is given. Each worker process
+builds its own engine, so engine instances must be picklable there. Engines
+with batch methods, like `Local` and its store, always run in the calling
+process.
+
+`deadline` gives each call a total time budget, shared by its retries,
+redirect hops and failover, and bulk jobs take one for the whole job.
+"""
+import inspect
+import logging
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+from . import qr
+from .batching import MicroBatcher
+from .cache import BaseCache, StoreCache
+from .concurrency import bulkheads
+from .deadline import current, scope
+from .exceptions import (UnknownShortenerException, ResponseErrorException,
+                         DeadlineExceededException)
+from .shorteners.base import BaseShortener
+from .singleflight import SingleFlight
+from .utils import is_valid_url
+
+logger = logging.getLogger('pyshorteners')
+
+
+def get_engine_class(engine):
+    """
+    Returns the shortener class of an engine name or class
+    """
+    if inspect.isclass(engine) and issubclass(engine, BaseShortener):
+        return engine
+    module = __import__('pyshorteners.shorteners')
+    try:
+        engine_class = getattr(module.shorteners, engine)
+    except (AttributeError, TypeError):
+        engine_class = None
+    is_class = inspect.isclass(engine_class)
+    if not (is_class and issubclass(engine_class, BaseShortener)):
+        raise UnknownShortenerException(
+            'Please enter a valid shortener.'
+            ' {} class does not exist'.format(engine)
+        )
+    return engine_class
+
+
+class Client(object):
+    """
+    `engine` - engine name, class or instance
+    `cache` - optional `pyshorteners.cache.BaseCache` backend, or
+    `pyshorteners.stores` instance, remembering the short url -> long url
+    pairs already seen
+    `cache_ttl` - seconds the cache backend keeps the pairs, forever by
+    default
+    `negative_cache` - optional `pyshorteners.cache.NegativeCache`
+    remembering permanent errors
+    `coalesce` - concurrent identical calls made through the client wait
+for a single engine request
+    `rate_limiter` - optional `pyshorteners.ratelimit.RateLimiter` every
+    engine request waits on, shared with the bulk worker processes
+    `batch_delay` - seconds calls wait for each other to be sent together
+    to the engine `short_many` / `expand_many` batch methods, when it has
+    them. Calls are not batched by default
+    `batch_size` - most calls sent together, 50 default value
+    `limit_concurrency` - requests in flight to the engine are capped by
+    its adaptive `pyshorteners.concurrency.bulkheads` limiter
+    `deadline` - seconds a call may take in total, retries and redirect
+    hops included, no limit by default
+    `on_deadline` - 'raise' raises `DeadlineExceededException` when the
+    deadline runs out, 'original' returns the url given instead, as
+    `Simple` does
+    `debug` - logs every call
+    Any other kwarg is passed to the engine, `timeout` defaults to 0.5 and
+    `connect_timeout` / `read_timeout` set its parts apart
+    """
+
+    def __init__(self, engine='Simple', cache=None, cache_ttl=None,
+                 negative_cache=None, coalesce=False, rate_limiter=None,
+                 batch_delay=None, batch_size=50, limit_concurrency=False,
+                 deadline=None, on_deadline='raise', debug=False, **kwargs):
+        if on_deadline not in ('raise', 'original'):
+            raise TypeError('on_deadline must be raise or original')
+        if isinstance(engine, BaseShortener):
+            self._engine = engine
+            self._spec = (engine, {})
+        else:
+            kwargs = dict(kwargs)
+            if not kwargs.get('timeout'):
+                kwargs['timeout'] = 0.5
+            engine_class = get_engine_class(engine)
+            self._engine = engine_class(**kwargs)
+            self._spec = (engine_class, kwargs)
+        self._name = type(self._engine).__name__
+        if cache is not None and not isinstance(cache, BaseCache):
+            cache = StoreCache(cache)
+        self._cache = cache
+        self._cache_ttl = cache_ttl
+        self._negative_cache = negative_cache
+        # per client, clients of differently configured engines must not
+        # share results
+        self._flights = SingleFlight() if coalesce else None
+        self._rate_limiter = rate_limiter
+        self._limiter = None
+        if limit_concurrency:
+            self._limiter = bulkheads.get(self._name)
+        self._batchers = {}
+        if batch_delay is not None:
+            for operation in ('short', 'expand'):
+                method = getattr(self._engine, operation + '_many', None)
+                if method is not None:
+                    self._batchers[operation] = MicroBatcher(
+                        self._batch_call(method), batch_size, batch_delay)
+        self._deadline = deadline
+        self._on_deadline = on_deadline
+        self._debug = debug
+
+    @property
+    def engine(self):
+        return self._engine
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def api_url(self):
+        return self._engine.api_url
+
+    def _send(self, method, argument):
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire()
+        if self._limiter is not None:
+            return self._limiter.call(method, argument)
+        return method(argument)
+
+    def _batch_call(self, method):
+        def call(urls):
+            return self._send(method, urls)
+        return call
+
+    def _request(self, operation, url):
+        batcher = self._batchers.get(operation)
+        if batcher is not None:
+            return batcher.submit(url)
+        return self._send(getattr(self._engine, operation), url)
+
+    def _call(self, operation, url):
+        key = (self._name, operation, url)
+        if self._negative_cache is not None:
+            self._negative_cache.raise_for(key)
+        try:
+            if self._flights is not None:
+                return self._flights.do(key, self._request, operation, url)
+            return self._request(operation, url)
+        except ResponseErrorException as e:
+            if self._negative_cache is not None:
+                self._negative_cache.set(key, e)
+            raise
+
+    def _fetch(self, operation, url):
+        if not is_valid_url(url):
+            raise ValueError('Please enter a valid url')
+        return self._call(operation, url)
+
+    def _cache_key(self, operation, url):
+        # short urls depend on the engine, expanded ones do not
+        if operation == 'short':
+            return ('short', self._name, url)
+        return ('expand', url)
+
+    def _cache_items(self, operation, url, result):
+        if operation == 'short':
+            # the pair learned on short also serves expand
+            return [(('short', self._name, url), result),
+                    (('expand', result), url)]
+        return [(('expand', url), result)]
+
+    def _fallback(self, url, result):
+        # the url given stands for a result the deadline cut short
+        if self._on_deadline == 'original' and \
+                isinstance(result, DeadlineExceededException):
+            return url
+        return result
+
+    def _cached(self, operation, url, deadline):
+        if self._debug:
+            logger.info('{0} method called with url: {1}'.format(
+                operation.capitalize(), url))
+
+        result = None
+        if self._cache is not None:
+            result = self._cache.get(self._cache_key(operation, url))
+        if result is None:
+            with scope(self._deadline if deadline is None else deadline):
+                try:
+                    result = self._fetch(operation, url)
+                except DeadlineExceededException:
+                    if self._on_deadline == 'raise':
+                        raise
+                    return url
+            if self._cache is not None:
+                self._cache.set_many(self._cache_items(operation, url,
+                                                       result),
+                                     self._cache_ttl)
+        if self._debug:
+            logger.info('{0} url result: {1}'.format(
+                'Shorten' if operation == 'short' else 'Expanded', result))
+        return result
+
+    def short(self, url, deadline=None):
+        """
+        `deadline` - seconds the call may take, the client one by default
+        """
+        return self._cached('short', url, deadline)
+
+    def expand(self, url, deadline=None):
+        """
+        `deadline` - seconds the call may take, the client one by default
+        """
+        return self._cached('expand', url, deadline)
+
+    def total_clicks(self, url):
+        if self._debug:
+            logger.info('total_clicks property called with url:'
+                        ' {0}'.format(url))
+
+        if not is_valid_url(url):
+            raise ValueError('Please enter a valid url')
+
+        return self._engine.total_clicks(url)
+
+    def _try(self, operation, url, deadline=None):
+        # pool threads do not inherit the deadline of the bulk job
+        with scope(deadline), scope(self._deadline):
+            try:
+                return self._fetch(operation, url)
+            except Exception as e:
+                return e
+
+    def _run(self, operation, urls, max_workers, processes):
+        if not urls:
+            return []
+        deadline = current()
+        # batch methods get every url at once, and engines keeping state
+        # (e.g. the `Local` store and id counter) must not be copied on
+        # worker processes
+        method = getattr(self._engine, operation + '_many', None)
+        if method is not None:
+            with scope(self._deadline):
+                return self._run_batch(method, urls)
+        if processes and processes > 1:
+            options = {'rate_limiter': self._rate_limiter,
+                       'limit_concurrency': self._limiter is not None,
+                       'deadline': self._deadline}
+            return _map_processes(self._spec, options, operation, urls,
+                                  max_workers, processes, deadline)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(
+                lambda url: self._try(operation, url, deadline), urls))
+
+    def _run_batch(self, method, urls):
+        results = [None] * len(urls)
+        valid = []
+        for position, url in enumerate(urls):
+            if is_valid_url(url):
+                valid.append(position)
+            else:
+                results[position] = ValueError('Please enter a valid url')
+        try:
+            fetched = self._batch_call(method)([urls[position]
+                                                for position in valid])
+        except Exception as e:
+            fetched = [e] * len(valid)
+        for position, result in zip(valid, fetched):
+            results[position] = result
+        return results
+
+    def _map(self, operation, urls, max_workers, processes, deadline):
+        urls = list(urls)
+        with scope(deadline):
+            results = self._map_cached(operation, urls, max_workers,
+                                       processes)
+        return [self._fallback(url, result)
+                for url, result in zip(urls, results)]
+
+    def _map_cached(self, operation, urls, max_workers, processes):
+        if self._cache is None:
+            return self._run(operation, urls, max_workers, processes)
+
+        results = self._cache.get_many([self._cache_key(operation, url)
+                                        for url in urls])
+        missing = [position for position, result in enumerate(results)
+                   if result is None]
+        fetched = self._run(operation, [urls[position]
+                                        for position in missing],
+                            max_workers, processes)
+        items = []
+        for position, result in zip(missing, fetched):
+            results[position] = result
+            if not isinstance(result, Exception):
+                items.extend(self._cache_items(operation, urls[position],
+                                               result))
+        if items:
+            self._cache.set_many(items, self._cache_ttl)
+        return results
+
+    def short_many(self, urls, max_workers=8, processes=None,
+                   deadline=None):
+        """
+        Returns the short urls of `urls` in order, with the raised exception
+        in place of the short url of a failed one.
+        `max_workers` threads send the requests, on each of the `processes`
+        worker processes when given. Engines with a `short_many` batch
+        method get all the urls at once in this process instead.
+        `deadline` - seconds the whole job may take, calls still waiting
+        when it runs out fail with `DeadlineExceededException`
+        """
+        return self._map('short', urls, max_workers, processes, deadline)
+
+    def expand_many(self, urls, max_workers=8, processes=None,
+                    deadline=None):
+        """
+        Returns the expanded urls of `urls` in order, with the raised
+        exception in place of the expanded url of a failed one.
+        `max_workers` threads send the requests, on each of the `processes`
+        worker processes when given. Engines with an `expand_many` batch
+        method get all the urls at once in this process instead.
+        `deadline` - seconds the whole job may take, calls still waiting
+        when it runs out fail with `DeadlineExceededException`
+        """
+        return self._map('expand', urls, max_workers, processes, deadline)
+
+    def qrcode(self, url, width=120, height=120, format=None):
+        """
+        Returns the QR code of `url`. With `format` set to 'png' or 'svg'
+        the image bytes are rendered locally, otherwise the Google Charts
+        url of the image is returned
+        """
+        if format is not None:
+            return qr.render(url, width, height, format)
+
+        qrcode_url = ('http://chart.apis.google.com/chart?cht=qr&'
+                      'chl={0}&chs={1}x{2}'.format(url, width, height))
+        return qrcode_url
+
+    def qrcode_many(self, urls, width=120, height=120, format='png'):
+        """
+        Returns the locally rendered QR code images of `urls`
+        """
+        return [qr.render(url, width, height, format) for url in urls]
+
+
+# client of the current bulk worker process
+_worker = None
+
+
+def _init_worker(spec, options):
+    global _worker
+    engine, kwargs = spec
+    kwargs = dict(kwargs, **options)
+    _worker = Client(engine, **kwargs)
+
+
+def _run_shard(args):
+    operation, urls, max_workers, deadline = args
+    with scope(deadline):
+        return _worker._run(operation, urls, max_workers, None)
+
+
+def _map_processes(spec, options, operation, urls, max_workers, processes,
+                   deadline=None):
+    # a few shards per process evens out slow ones
+    size = max(1, -(-len(urls) // (processes * 4)))
+    shards = [(operation, urls[start:start + size], max_workers, deadline)
+              for start in range(0, len(urls), size)]
+    pool = multiprocessing.Pool(processes, _init_worker,
+                                (spec, options))
+    try:
+        results = pool.map(_run_shard, shards)
+    finally:
+        pool.close()
+        pool.join()
+    return [result for shard in results for result in shard]
@@ -0,0 +1,156 @@
+# encoding: utf-8
+"""
+Adaptive concurrency limits per engine
+An `AIMDLimiter` caps the requests in flight to one engine. The cap grows by
+about one after a full cap of fast, successful requests (additive increase)
+and is cut by `backoff` when a request is throttled, fails on the server
+side or gets much slower than the fastest ones seen (multiplicative
+decrease).
+
+Each engine gets its own limiter from `bulkheads`, so callers of a degraded
+engine wait for its slots only, and give up after `max_wait` seconds with a
+`ConcurrencyLimitException` instead of holding the threads the other engines
+need.
+"""
+import threading
+import time
+
+from . import forksafe
+from .deadline import current
+from .exceptions import (ConcurrencyLimitException,
+                         DeadlineExceededException, ResponseErrorException)
+
+# jitter of faster requests is not congestion
+LATENCY_FLOOR = 0.005
+
+
+class AIMDLimiter(object):
+    """
+    `initial` - starting limit, 4 default value
+    `minimum`, `maximum` - bounds of the limit, 1 and 64 default values
+    `backoff` - factor cutting the limit, 0.5 default value
+    `tolerance` - latency over `tolerance` times the fastest one is
+    congestion, 2.0 default value
+    `max_wait` - seconds a call waits for a slot, 1.0 default value, None
+    waits forever
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, backoff=0.5,
+                 tolerance=2.0, max_wait=1.0):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.baseline = None
+        self._decreased = 0.0
+        self._condition = threading.Condition()
+        forksafe.register(self)
+
+    def _after_fork(self):
+        # the requests in flight belong to the parent
+        self._condition = threading.Condition()
+        self.in_flight = 0
+
+    def acquire(self):
+        deadline = None
+        if self.max_wait is not None:
+            deadline = time.time() + self.max_wait
+        budget = current()
+        if budget is not None:
+            budget.check()
+            expires = time.time() + budget.remaining()
+            deadline = min(deadline or expires, expires)
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        if budget is not None:
+                            budget.check()
+                        raise ConcurrencyLimitException(
+                            'No free slot after {0}s, {1} requests in '
+                            'flight'.format(self.max_wait, self.in_flight))
+                self._condition.wait(remaining)
+            self.in_flight += 1
+
+    def release(self, elapsed, failed=False):
+        """
+        Frees a slot and adapts the limit to the outcome of its request
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if not failed:
+                if self.baseline is None or elapsed < self.baseline:
+                    self.baseline = elapsed
+                else:
+                    # lets the baseline follow a slower network
+                    self.baseline += 0.01 * (elapsed - self.baseline)
+            congested = failed or elapsed > max(self.baseline,
+                                                LATENCY_FLOOR) * self.tolerance
+            now = time.time()
+            if congested:
+                # requests sent before the last cut must not cut again
+                if now - self._decreased > elapsed:
+                    self.limit = max(self.minimum, self.limit * self.backoff)
+                    self._decreased = now
+            else:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Runs `fn` on a slot. Throttling, server errors and request errors
+        count as failures, other provider answers and the end of the
+        caller's deadline do not
+        """
+        self.acquire()
+        start = time.time()
+        failed = False
+        try:
+            return fn(*args, **kwargs)
+        except DeadlineExceededException:
+            raise
+        except ResponseErrorException as e:
+            failed = e.retryable
+            raise
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.release(time.time() - start, failed)
+
+
+class Bulkheads(object):
+    """
+    One `AIMDLimiter` per engine name, built with `kwargs`
+    """
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self._limiters = {}
+        self._lock = threading.Lock()
+        forksafe.register(self)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        limiter = self._limiters.get(name)
+        if limiter is None:
+            with self._lock:
+                limiter = self._limiters.setdefault(
+                    name, AIMDLimiter(**self.kwargs))
+        return limiter
+
+    @property
+    def limits(self):
+        return dict((name, limiter.limit)
+                    for name, limiter in self._limiters.items())
+
+
+# shared by every client and engine created with `limit_concurrency=True`
+bulkheads = Bulkheads()
@@ -0,0 +1,166 @@
+# encoding: utf-8
+"""
+Credential pools for the keyed engines
+Keyed engines (`Bitly`, `Google`, `Owly`, `Awsm`, `Adfly`) accept a list of
+credentials, or a `CredentialPool`, wherever they take a single token or
+key. Requests rotate across the credentials. A credential answered with a
+throttling response is benched until its quota window resets and the
+request is sent again with the next one.
+
+    shortener = Shortener('Bitly', bitly_token=['TOKEN_1', 'TOKEN_2'])
+    shortener.client.engine.credentials.usage
+"""
+import threading
+import time
+
+from . import forksafe
+from .exceptions import QuotaExhaustedException
+
+# 403 answers meaning out of quota, e.g. bit.ly RATE_LIMIT_EXCEEDED and
+# googleapis rateLimitExceeded / dailyLimitExceeded
+_THROTTLED = (b'RATE_LIMIT', b'RATELIMIT', b'LIMITEXCEEDED')
+
+
+class CredentialStats(object):
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.window_requests = 0
+        self.window_start = time.time()
+        self.benched_until = 0.0
+
+    def as_dict(self):
+        return {'requests': self.requests, 'errors': self.errors,
+                'throttled': self.throttled,
+                'window_requests': self.window_requests,
+                'benched_until': self.benched_until}
+
+
+class CredentialPool(object):
+    """
+    `credentials` - tokens or keys, tuples for engines needing several
+    values
+    `window` - seconds of the provider quota window, a throttled credential
+    without a Retry-After answer is benched for that long. 3600 default
+    value
+    `quota` - requests a credential may send per window, the provider
+    throttling answers are the only limit by default
+    """
+
+    def __init__(self, credentials, window=3600, quota=None):
+        self.credentials = list(credentials)
+        if not self.credentials:
+            raise TypeError('credentials must list at least one credential')
+        self.window = window
+        self.quota = quota
+        self.stats = dict((credential, CredentialStats())
+                          for credential in self.credentials)
+        self._position = 0
+        self._lock = threading.Lock()
+        forksafe.register(self)
+
+    @classmethod
+    def of(cls, value):
+        """
+        Returns `value` when it already is a pool, a pool of its credentials
+        otherwise
+        """
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, (list, tuple)):
+            return cls(value)
+        return cls([value])
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.credentials)
+
+    def acquire(self):
+        """
+        Returns the next credential that is not benched
+        """
+        now = time.time()
+        with self._lock:
+            for _ in range(len(self.credentials)):
+                credential = self.credentials[self._position]
+                self._position = (self._position + 1) % len(self.credentials)
+                stats = self.stats[credential]
+                if stats.benched_until > now:
+                    continue
+                if now - stats.window_start >= self.window:
+                    stats.window_start = now
+                    stats.window_requests = 0
+                if self.quota is not None and \
+                        stats.window_requests >= self.quota:
+                    stats.benched_until = stats.window_start + self.window
+                    continue
+                stats.requests += 1
+                stats.window_requests += 1
+                return credential
+        raise QuotaExhaustedException('Every credential is out of quota',
+                                      status_code=429)
+
+    def bench(self, credential, seconds=None):
+        """
+        Stops using `credential` for `seconds`, until the end of its quota
+        window by default
+        """
+        with self._lock:
+            stats = self.stats[credential]
+            stats.throttled += 1
+            if seconds is None:
+                until = stats.window_start + self.window
+            else:
+                until = time.time() + seconds
+            stats.benched_until = max(until, time.time())
+
+    def record(self, credential, ok):
+        if not ok:
+            with self._lock:
+                self.stats[credential].errors += 1
+
+    @staticmethod
+    def _throttled(response):
+        if response.status_code == 429:
+            return True
+        if response.status_code != 403:
+            return False
+        content = (response.content or b'').upper()
+        return any(marker in content for marker in _THROTTLED)
+
+    @staticmethod
+    def _retry_after(response):
+        try:
+            return float(response.headers.get('retry-after'))
+        except (TypeError, ValueError):
+            return None
+
+    def send(self, request):
+        """
+        Returns the response of `request(credential)`, sent again with the
+        next credential while the provider throttles the current one, at
+        most once per credential.
+        Raises `QuotaExhaustedException` when every credential is benched
+        or throttled
+        """
+        for _ in range(len(self.credentials)):
+            credential = self.acquire()
+            response = request(credential)
+            if not self._throttled(response):
+                self.record(credential, response.ok)
+                return response
+            self.bench(credential, self._retry_after(response))
+        raise QuotaExhaustedException('Every credential was throttled',
+                                      status_code=429)
+
+    @property
+    def usage(self):
+        """
+        Counters of every credential
+        """
+        return dict((credential, stats.as_dict())
+                    for credential, stats in self.stats.items())
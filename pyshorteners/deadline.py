@@ -0,0 +1,119 @@
+# encoding: utf-8
+"""
+Time budgets of calls and bulk jobs
+A `Deadline` is a total budget in seconds. While one is current on a thread
+(see `scope`) every engine request caps its connect and read timeouts to the
+time left, so retries, redirect hops, credential rotation and failover all
+share the budget instead of each getting a full timeout. Once the budget is
+spent requests are not sent and `DeadlineExceededException` is raised.
+Calls waiting for a coalesced or batched request, or for a rate limiter
+token, wait until their own deadline at most.
+
+    from pyshorteners.client import Client
+
+    client = Client('Tinyurl', connect_timeout=0.2, read_timeout=1,
+                    deadline=2)
+    client.short_many(urls, deadline=30)
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from .exceptions import DeadlineExceededException
+
+_local = threading.local()
+
+
+class Deadline(object):
+    """
+    Budget of `budget` seconds from now, on the monotonic clock. A pickled
+    deadline, e.g. sent to a bulk worker process, carries the seconds left
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.expires = time.monotonic() + budget
+
+    def __reduce__(self):
+        return Deadline, (self.remaining(),)
+
+    def remaining(self):
+        return max(0.0, self.expires - time.monotonic())
+
+    @property
+    def expired(self):
+        return time.monotonic() >= self.expires
+
+    def check(self):
+        """
+        Raises `DeadlineExceededException` when the budget is spent
+        """
+        if self.expired:
+            raise DeadlineExceededException(
+                'Deadline of {0}s exceeded'.format(self.budget))
+
+    def clamp(self, timeout):
+        """
+        Returns `timeout`, a number, a (connect, read) tuple or None, capped
+        to the time left
+        """
+        self.check()
+        remaining = self.remaining()
+        if isinstance(timeout, tuple):
+            return tuple(remaining if part is None else min(part, remaining)
+                         for part in timeout)
+        if timeout is None:
+            return remaining
+        return min(timeout, remaining)
+
+
+def current():
+    """
+    Returns the deadline of the current thread, None when there is none
+    """
+    return getattr(_local, 'deadline', None)
+
+
+@contextmanager
+def scope(deadline):
+    """
+    Makes `deadline`, a `Deadline` or a budget in seconds, the current one
+    of the thread. An enclosing deadline expiring first stays current, None
+    keeps the enclosing one
+    """
+    if deadline is not None and not isinstance(deadline, Deadline):
+        deadline = Deadline(deadline)
+    previous = current()
+    if deadline is None:
+        deadline = previous
+    elif previous is not None and previous.expires <= deadline.expires:
+        deadline = previous
+    _local.deadline = deadline
+    try:
+        yield deadline
+    finally:
+        _local.deadline = previous
+
+
+def wait(event):
+    """
+    Waits for `event` until the current deadline, if any. Raises
+    `DeadlineExceededException` when the deadline comes first
+    """
+    deadline = current()
+    if deadline is None:
+        event.wait()
+    elif not event.wait(deadline.remaining()):
+        raise DeadlineExceededException(
+            'Deadline of {0}s exceeded'.format(deadline.budget))
+
+
+def outlived(error):
+    """
+    Whether `error` is the deadline of another call running out while the
+    current one still has time
+    """
+    if not isinstance(error, DeadlineExceededException):
+        return False
+    deadline = current()
+    return deadline is None or not deadline.expired
@@ -6,9 +6,56 @@ class UnknownShortenerException(Exception):
     pass
 
 
-class ShorteningErrorException(Exception):
+class ResponseErrorException(Exception):
+    """
+    Base class for errors answered by a shortener provider.
+    `status_code` is the HTTP status of the provider response, when known
+    """
+
+    def __init__(self, message='', status_code=None):
+        super(ResponseErrorException, self).__init__(message)
+        self.status_code = status_code
+
+    def __reduce__(self):
+        # keeps the status code on results sent back by worker processes
+        return type(self), (self.args[0], self.status_code)
+
+    @property
+    def retryable(self):
+        """
+        Whether the same call may succeed later: unknown statuses, request
+        timeouts, throttling and server errors
+        """
+        status_code = self.status_code
+        if status_code is None or status_code >= 500:
+            return True
+        return status_code in (408, 429)
+
+
+class ShorteningErrorException(ResponseErrorException):
+    pass
+
+
+class ExpandingErrorException(ResponseErrorException):
+    pass
+
+
+class ConcurrencyLimitException(ResponseErrorException):
+    """
+    No request slot of the engine got free in time, nothing was sent
+    """
+    pass
+
+
+class QuotaExhaustedException(ResponseErrorException):
+    """
+    Every credential of the engine is out of quota, nothing was sent
+    """
     pass
 
 
-class ExpandingErrorException(Exception):
+class DeadlineExceededException(ResponseErrorException):
+    """
+    The time budget of the call ran out, see `pyshorteners.deadline`
+    """
     pass
@@ -0,0 +1,43 @@
+# encoding: utf-8
+"""
+Fork safety for the library state
+Objects holding locks, connections or background threads register
+themselves and get their `_after_fork` method called in the child process
+of a fork, so preforking servers (gunicorn, uWSGI with preload) can create
+them in the master process.
+
+Forks made through `os.fork` are detected with `os.register_at_fork`,
+`check` detects the other ones by comparing process ids.
+"""
+import os
+import weakref
+
+_objects = weakref.WeakSet()
+_pid = os.getpid()
+
+
+def register(obj):
+    """
+    Calls `obj._after_fork()` in the child process after a fork
+    """
+    _objects.add(obj)
+    return obj
+
+
+def _after_fork():
+    global _pid
+    _pid = os.getpid()
+    for obj in list(_objects):
+        obj._after_fork()
+
+
+def check():
+    """
+    Runs the after fork hooks if the process changed since the last run
+    """
+    if os.getpid() != _pid:
+        _after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
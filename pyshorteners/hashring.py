@@ -0,0 +1,80 @@
+# encoding: utf-8
+"""
+Consistent hashing
+Each node owns `replicas` points on a ring of 64 bit hashes and a key
+belongs to the node of the first point after its hash. Adding or removing a
+node only moves the keys of the points it owns, about 1/n of them.
+"""
+import bisect
+import hashlib
+import struct
+
+
+def _hash(value):
+    digest = hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest()
+    return struct.unpack('<Q', digest)[0]
+
+
+class HashRing(object):
+    """
+    `nodes` - initial nodes, any object. Their `str` places them on the ring
+    `replicas` - points per node, 100 default value
+    """
+
+    def __init__(self, nodes=(), replicas=100):
+        self.replicas = replicas
+        self._nodes = []
+        self._points = []
+        self._owners = []
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self):
+        return list(self._nodes)
+
+    def add(self, node):
+        if node in self._nodes:
+            return
+        self._nodes.append(node)
+        for replica in range(self.replicas):
+            point = _hash('{0}#{1}'.format(node, replica))
+            position = bisect.bisect(self._points, point)
+            self._points.insert(position, point)
+            self._owners.insert(position, node)
+
+    def remove(self, node):
+        self._nodes.remove(node)
+        kept = [(point, owner) for point, owner
+                in zip(self._points, self._owners) if owner != node]
+        self._points = [point for point, _ in kept]
+        self._owners = [owner for _, owner in kept]
+
+    def node_for(self, key):
+        """
+        Returns the node owning `key`
+        """
+        if not self._points:
+            raise LookupError('The ring has no nodes')
+        position = bisect.bisect(self._points, _hash(key))
+        return self._owners[position % len(self._owners)]
+
+    def nodes_for(self, key):
+        """
+        Returns every node, the owner of `key` first and then in ring
+        order, so failover for a key is also stable
+        """
+        if not self._points:
+            raise LookupError('The ring has no nodes')
+        position = bisect.bisect(self._points, _hash(key))
+        found = []
+        for offset in range(len(self._owners)):
+            owner = self._owners[(position + offset) % len(self._owners)]
+            if owner not in found:
+                found.append(owner)
+                if len(found) == len(self._nodes):
+                    break
+        return found
+
+    def __len__(self):
+        return len(self._nodes)
@@ -0,0 +1,175 @@
+# encoding: utf-8
+"""
+Block (hi/lo) id allocation
+An allocator leases a block of `block_size` consecutive ids from a shared
+counter in one atomic step, then hands them out from memory. Processes and
+hosts sharing the counter never get the same id, and the counter is only
+touched once per block. Ids left on a block when a process exits or forks
+are skipped, so codes are unique but not gapless.
+
+    from pyshorteners.ids import SqliteBlockAllocator
+    from pyshorteners.shorteners import Local
+
+    engine = Local(allocator=SqliteBlockAllocator('ids.db'))
+"""
+import os
+import sqlite3
+import threading
+
+from . import forksafe
+from .utils import base62_encode_range
+
+
+class BlockAllocator(object):
+    """
+    Base class for the allocators, subclasses implement `_lease`
+    """
+
+    def __init__(self, block_size=1000):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = self._end = 0
+        forksafe.register(self)
+
+    def _after_fork(self):
+        # the rest of the block belongs to the parent
+        self._lock = threading.Lock()
+        self._next = self._end = 0
+
+    def _lease(self, size):
+        """
+        Reserves `size` ids on the shared counter, returns the first one
+        """
+        raise NotImplementedError
+
+    def next_id(self):
+        with self._lock:
+            if self._next >= self._end:
+                self._next = self._lease(self.block_size)
+                self._end = self._next + self.block_size
+            self._next += 1
+            return self._next - 1
+
+    def take(self, count):
+        """
+        Returns `count` new ids as a list of ranges, usually one
+        """
+        ranges = []
+        with self._lock:
+            while count:
+                if self._next >= self._end:
+                    size = max(self.block_size, count)
+                    self._next = self._lease(size)
+                    self._end = self._next + size
+                stop = min(self._end, self._next + count)
+                ranges.append(range(self._next, stop))
+                count -= stop - self._next
+                self._next = stop
+        return ranges
+
+    def codes(self, count):
+        """
+        Returns `count` new base62 codes
+        """
+        codes = []
+        for ids in self.take(count):
+            codes.extend(base62_encode_range(ids.start, ids.stop))
+        return codes
+
+
+class MemoryAllocator(BlockAllocator):
+    """
+    Counter of a single process, starting at `start`. A forked child does
+    not continue it, since the parent hands out the same ids
+    """
+
+    def __init__(self, start=1, block_size=1000):
+        super(MemoryAllocator, self).__init__(block_size)
+        self._counter = start
+
+    def _after_fork(self):
+        super(MemoryAllocator, self)._after_fork()
+        self._counter = None
+
+    def _lease(self, size):
+        if self._counter is None:
+            raise RuntimeError('A MemoryAllocator can not be used after a '
+                               'fork, use a SqliteBlockAllocator or a '
+                               'FileBlockAllocator')
+        start = self._counter
+        self._counter += size
+        return start
+
+
+class SqliteBlockAllocator(BlockAllocator):
+    """
+    Counter on a SQLite database shared by the processes of a host.
+    `name` keeps several counters on one database, `start` is the first id
+    of a new counter
+    """
+
+    def __init__(self, path, name='links', start=1, block_size=1000):
+        super(SqliteBlockAllocator, self).__init__(block_size)
+        self.path = path
+        self.name = name
+        self._connect()
+        self._conn.execute('CREATE TABLE IF NOT EXISTS id_blocks ('
+                           'name TEXT PRIMARY KEY, '
+                           'next INTEGER NOT NULL)')
+        self._conn.execute('INSERT OR IGNORE INTO id_blocks (name, next) '
+                           'VALUES (?, ?)', (name, start))
+
+    def _connect(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False,
+                                     isolation_level=None, timeout=30)
+
+    def _after_fork(self):
+        super(SqliteBlockAllocator, self)._after_fork()
+        self._connect()
+
+    def _lease(self, size):
+        conn = self._conn
+        # takes the write lock before reading, so leases never overlap
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            start = conn.execute('SELECT next FROM id_blocks WHERE name = ?',
+                                 (self.name,)).fetchone()[0]
+            conn.execute('UPDATE id_blocks SET next = ? WHERE name = ?',
+                         (start + size, self.name))
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return start
+
+    def close(self):
+        self._conn.close()
+
+
+class FileBlockAllocator(BlockAllocator):
+    """
+    Counter on a text file guarded by an exclusive `fcntl` lock, for unix
+    hosts. `start` is the first id of a new counter
+    """
+
+    def __init__(self, path, start=1, block_size=1000):
+        super(FileBlockAllocator, self).__init__(block_size)
+        self.path = path
+        self.start = start
+
+    def _lease(self, size):
+        import fcntl
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            content = os.read(fd, 32).strip()
+            start = int(content) if content else self.start
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, str(start + size).encode('ascii'))
+            os.fsync(fd)
+        finally:
+            # closing releases the lock
+            os.close(fd)
+        return start
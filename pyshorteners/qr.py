@@ -0,0 +1,388 @@
+# encoding: utf-8
+"""
+QR code encoder rendering PNG and SVG images locally
+Byte mode only, versions 1 to 40, error correction levels L, M, Q and H.
+
+    from pyshorteners import qr
+
+    png = qr.render('http://tinyurl.com/1c2', 120, 120, 'png')
+"""
+import struct
+import zlib
+
+from .cache import LRUCache
+
+# index 0 is unused, tables are indexed by version
+ECC_CODEWORDS_PER_BLOCK = {
+    'L': (-1, 7, 10, 15, 20, 26, 18, 20, 24, 30, 18, 20, 24, 26, 30, 22, 24,
+          28, 30, 28, 28, 28, 28, 30, 30, 26, 28, 30, 30, 30, 30, 30, 30, 30,
+          30, 30, 30, 30, 30, 30, 30),
+    'M': (-1, 10, 16, 26, 18, 24, 16, 18, 22, 22, 26, 30, 22, 22, 24, 24, 28,
+          28, 26, 26, 26, 26, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28,
+          28, 28, 28, 28, 28, 28, 28),
+    'Q': (-1, 13, 22, 18, 26, 18, 24, 18, 22, 20, 24, 28, 26, 24, 20, 30, 24,
+          28, 28, 26, 30, 28, 30, 30, 30, 30, 28, 30, 30, 30, 30, 30, 30, 30,
+          30, 30, 30, 30, 30, 30, 30),
+    'H': (-1, 17, 28, 22, 16, 22, 28, 26, 26, 24, 28, 24, 28, 22, 24, 24, 30,
+          28, 28, 26, 28, 30, 24, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30,
+          30, 30, 30, 30, 30, 30, 30),
+}
+ECC_BLOCKS = {
+    'L': (-1, 1, 1, 1, 1, 1, 2, 2, 2, 2, 4, 4, 4, 4, 4, 6, 6, 6, 6, 7, 8, 8,
+          9, 9, 10, 12, 12, 12, 13, 14, 15, 16, 17, 18, 19, 19, 20, 21, 22,
+          24, 25),
+    'M': (-1, 1, 1, 1, 2, 2, 4, 4, 4, 5, 5, 5, 8, 9, 9, 10, 10, 11, 13, 14,
+          16, 17, 17, 18, 20, 21, 23, 25, 26, 28, 29, 31, 33, 35, 37, 38, 40,
+          43, 45, 47, 49),
+    'Q': (-1, 1, 1, 2, 2, 4, 4, 6, 6, 8, 8, 8, 10, 12, 16, 12, 17, 16, 18, 21,
+          20, 23, 23, 25, 27, 29, 34, 34, 35, 38, 40, 43, 45, 48, 51, 53, 56,
+          59, 62, 65, 68),
+    'H': (-1, 1, 1, 2, 4, 4, 4, 5, 6, 8, 8, 11, 11, 16, 16, 18, 16, 19, 21,
+          25, 25, 25, 34, 30, 32, 35, 37, 40, 42, 45, 48, 51, 54, 57, 60, 63,
+          66, 70, 74, 77, 81),
+}
+FORMAT_BITS = {'L': 1, 'M': 0, 'Q': 3, 'H': 2}
+
+MASKS = (
+    lambda x, y: (x + y) % 2 == 0,
+    lambda x, y: y % 2 == 0,
+    lambda x, y: x % 3 == 0,
+    lambda x, y: (x + y) % 3 == 0,
+    lambda x, y: (x // 3 + y // 2) % 2 == 0,
+    lambda x, y: x * y % 2 + x * y % 3 == 0,
+    lambda x, y: (x * y % 2 + x * y % 3) % 2 == 0,
+    lambda x, y: ((x + y) % 2 + x * y % 3) % 2 == 0,
+)
+
+# rendered images, keyed by (data, width, height, format)
+images = LRUCache(1024)
+
+_EXP = [0] * 512
+_LOG = [0] * 256
+_value = 1
+for _i in range(255):
+    _EXP[_i] = _value
+    _LOG[_value] = _i
+    _value <<= 1
+    if _value & 0x100:
+        _value ^= 0x11D
+for _i in range(255, 512):
+    _EXP[_i] = _EXP[_i - 255]
+
+
+def _multiply(x, y):
+    if not x or not y:
+        return 0
+    return _EXP[_LOG[x] + _LOG[y]]
+
+
+def _reed_solomon(data, degree):
+    """
+    Returns the `degree` error correction codewords of `data`
+    """
+    divisor = [1]
+    for i in range(degree):
+        divisor = [c ^ _multiply(n, _EXP[i]) for c, n
+                   in zip(divisor + [0], [0] + divisor)]
+    divisor = divisor[1:]
+    result = [0] * degree
+    for byte in data:
+        factor = byte ^ result.pop(0)
+        result.append(0)
+        for i, coefficient in enumerate(divisor):
+            result[i] ^= _multiply(coefficient, factor)
+    return result
+
+
+def _raw_modules(version):
+    result = (16 * version + 128) * version + 64
+    if version >= 2:
+        aligns = version // 7 + 2
+        result -= (25 * aligns - 10) * aligns - 55
+        if version >= 7:
+            result -= 36
+    return result
+
+
+def _data_codewords(version, ecc):
+    blocks = ECC_BLOCKS[ecc][version]
+    ecc_codewords = ECC_CODEWORDS_PER_BLOCK[ecc][version] * blocks
+    return _raw_modules(version) // 8 - ecc_codewords
+
+
+def _alignment_positions(version):
+    if version == 1:
+        return []
+    aligns = version // 7 + 2
+    size = version * 4 + 17
+    if version == 32:
+        step = 26
+    else:
+        step = (version * 4 + aligns * 2 + 1) // (aligns * 2 - 2) * 2
+    positions = [size - 7 - i * step for i in range(aligns - 1)]
+    return [6] + positions[::-1]
+
+
+class _Matrix(object):
+
+    def __init__(self, version):
+        self.version = version
+        self.size = version * 4 + 17
+        self.modules = [[False] * self.size for _ in range(self.size)]
+        self.reserved = [[False] * self.size for _ in range(self.size)]
+
+    def set(self, x, y, dark):
+        self.modules[y][x] = dark
+        self.reserved[y][x] = True
+
+    def draw_function_patterns(self):
+        size = self.size
+        for i in range(size):
+            self.set(6, i, i % 2 == 0)
+            self.set(i, 6, i % 2 == 0)
+        for x, y in ((3, 3), (size - 4, 3), (3, size - 4)):
+            for dy in range(-4, 5):
+                for dx in range(-4, 5):
+                    if 0 <= x + dx < size and 0 <= y + dy < size:
+                        distance = max(abs(dx), abs(dy))
+                        self.set(x + dx, y + dy, distance not in (2, 4))
+        positions = _alignment_positions(self.version)
+        last = len(positions) - 1
+        for i, x in enumerate(positions):
+            for j, y in enumerate(positions):
+                if (i, j) in ((0, 0), (0, last), (last, 0)):
+                    continue
+                for dy in range(-2, 3):
+                    for dx in range(-2, 3):
+                        self.set(x + dx, y + dy, max(abs(dx), abs(dy)) != 1)
+        # reserve the format bits before placing the data
+        self.draw_format_bits('M', 0)
+        if self.version >= 7:
+            remainder = self.version
+            for _ in range(12):
+                remainder = (remainder << 1) ^ ((remainder >> 11) * 0x1F25)
+            bits = self.version << 12 | remainder
+            for i in range(18):
+                dark = (bits >> i) & 1 == 1
+                a, b = size - 11 + i % 3, i // 3
+                self.set(a, b, dark)
+                self.set(b, a, dark)
+
+    def draw_format_bits(self, ecc, mask):
+        data = FORMAT_BITS[ecc] << 3 | mask
+        remainder = data
+        for _ in range(10):
+            remainder = (remainder << 1) ^ ((remainder >> 9) * 0x537)
+        bits = (data << 10 | remainder) ^ 0x5412
+
+        def bit(i):
+            return (bits >> i) & 1 == 1
+
+        size = self.size
+        for i in range(6):
+            self.set(8, i, bit(i))
+        self.set(8, 7, bit(6))
+        self.set(8, 8, bit(7))
+        self.set(7, 8, bit(8))
+        for i in range(9, 15):
+            self.set(14 - i, 8, bit(i))
+        for i in range(8):
+            self.set(size - 1 - i, 8, bit(i))
+        for i in range(8, 15):
+            self.set(8, size - 15 + i, bit(i))
+        self.set(8, size - 8, True)
+
+    def draw_codewords(self, codewords):
+        size = self.size
+        total = len(codewords) * 8
+        i = 0
+        right = size - 1
+        while right >= 1:
+            if right == 6:
+                right = 5
+            upward = (right + 1) & 2 == 0
+            for vertical in range(size):
+                y = size - 1 - vertical if upward else vertical
+                for x in (right, right - 1):
+                    if not self.reserved[y][x] and i < total:
+                        byte = codewords[i >> 3]
+                        self.modules[y][x] = (byte >> (7 - (i & 7))) & 1 == 1
+                        i += 1
+            right -= 2
+
+    def masked(self, mask):
+        test = MASKS[mask]
+        return [[dark != (not reserved and test(x, y))
+                 for x, (dark, reserved) in enumerate(zip(row, flags))]
+                for y, (row, flags) in enumerate(zip(self.modules,
+                                                     self.reserved))]
+
+
+def _penalty(modules):
+    size = len(modules)
+    penalty = 0
+    columns = [list(column) for column in zip(*modules)]
+    finder = ([True, False, True, True, True, False, True] + [False] * 4,
+              [False] * 4 + [True, False, True, True, True, False, True])
+    for line in modules + columns:
+        run = 1
+        for i in range(1, size + 1):
+            if i < size and line[i] == line[i - 1]:
+                run += 1
+                continue
+            if run >= 5:
+                penalty += run - 2
+            run = 1
+        for i in range(size - 10):
+            if line[i:i + 11] in finder:
+                penalty += 40
+    for y in range(size - 1):
+        for x in range(size - 1):
+            row, below = modules[y], modules[y + 1]
+            if row[x] == row[x + 1] == below[x] == below[x + 1]:
+                penalty += 3
+    dark = sum(sum(row) for row in modules)
+    total = size * size
+    penalty += (abs(dark * 20 - total * 10) + total - 1) // total * 10 - 10
+    return penalty
+
+
+def encode(data, ecc='M', mask=None):
+    """
+    Returns the QR code of `data` as a list of rows, True meaning dark
+    """
+    if not isinstance(data, bytes):
+        data = data.encode('utf-8')
+    for version in range(1, 41):
+        count_bits = 8 if version < 10 else 16
+        capacity = _data_codewords(version, ecc) * 8
+        if 4 + count_bits + len(data) * 8 <= capacity:
+            break
+    else:
+        raise ValueError('Data too long to fit on a QR code')
+
+    bits = [0, 1, 0, 0]
+    bits += [(len(data) >> i) & 1 for i in reversed(range(count_bits))]
+    for byte in data:
+        bits += [(byte >> i) & 1 for i in reversed(range(8))]
+    bits += [0] * min(4, capacity - len(bits))
+    bits += [0] * (-len(bits) % 8)
+    codewords = [int(''.join(str(bit) for bit in bits[i:i + 8]), 2)
+                 for i in range(0, len(bits), 8)]
+    pad = 0xEC
+    while len(codewords) < capacity // 8:
+        codewords.append(pad)
+        pad ^= 0xEC ^ 0x11
+
+    blocks_count = ECC_BLOCKS[ecc][version]
+    ecc_size = ECC_CODEWORDS_PER_BLOCK[ecc][version]
+    raw_codewords = _raw_modules(version) // 8
+    short_blocks = blocks_count - raw_codewords % blocks_count
+    short_size = raw_codewords // blocks_count
+    blocks = []
+    start = 0
+    for i in range(blocks_count):
+        size = short_size - ecc_size + (0 if i < short_blocks else 1)
+        block = codewords[start:start + size]
+        start += size
+        blocks.append((block, _reed_solomon(block, ecc_size)))
+    interleaved = []
+    for i in range(short_size - ecc_size + 1):
+        interleaved += [block[i] for block, _ in blocks if i < len(block)]
+    for i in range(ecc_size):
+        interleaved += [ecc_block[i] for _, ecc_block in blocks]
+
+    matrix = _Matrix(version)
+    matrix.draw_function_patterns()
+    matrix.draw_codewords(interleaved)
+
+    candidates = range(8) if mask is None else [mask]
+    best = None
+    for candidate in candidates:
+        matrix.draw_format_bits(ecc, candidate)
+        modules = matrix.masked(candidate)
+        if mask is not None:
+            return modules
+        penalty = _penalty(modules)
+        if best is None or penalty < best[0]:
+            best = (penalty, modules)
+    return best[1]
+
+
+def _pixels(modules, width, height, border):
+    """
+    Yields one row of booleans per pixel row, True meaning dark
+    """
+    size = len(modules) + border * 2
+    light = [False] * size
+    rows = [light] * border + [[False] * border + row + [False] * border
+                               for row in modules] + [light] * border
+    columns = [x * size // width for x in range(width)]
+    for y in range(height):
+        row = rows[y * size // height]
+        yield [row[x] for x in columns]
+
+
+def to_png(modules, width, height, border=4):
+    def chunk(kind, data):
+        crc = zlib.crc32(kind + data) & 0xFFFFFFFF
+        length = struct.pack('>I', len(data))
+        return length + kind + data + struct.pack('>I', crc)
+
+    raw = bytearray()
+    previous = None
+    for pixels in _pixels(modules, width, height, border):
+        if pixels != previous:
+            packed = bytearray([0])  # no filter
+            for i in range(0, width, 8):
+                byte = 0
+                for j, dark in enumerate(pixels[i:i + 8]):
+                    if not dark:
+                        byte |= 0x80 >> j
+                packed.append(byte)
+            previous = pixels
+        raw += packed
+    header = struct.pack('>IIBBBBB', width, height, 1, 0, 0, 0, 0)
+    chunks = [chunk(b'IHDR', header),
+              chunk(b'IDAT', zlib.compress(bytes(raw), 9)),
+              chunk(b'IEND', b'')]
+    return b'\x89PNG\r\n\x1a\n' + b''.join(chunks)
+
+
+def to_svg(modules, width, height, border=4):
+    size = len(modules) + border * 2
+    path = []
+    for y, row in enumerate(modules):
+        x = 0
+        while x < len(row):
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < len(row) and row[x]:
+                x += 1
+            path.append('M{0},{1}h{2}v1h-{2}z'.format(start + border,
+                                                      y + border, x - start))
+    svg = ('<svg xmlns="http://www.w3.org/2000/svg" version="1.1" '
+           'width="{0}" height="{1}" viewBox="0 0 {2} {2}" '
+           'shape-rendering="crispEdges">'
+           '<rect width="100%" height="100%" fill="#ffffff"/>'
+           '<path d="{3}" fill="#000000"/></svg>').format(
+               width, height, size, ''.join(path))
+    return svg.encode('utf-8')
+
+
+def render(data, width=120, height=120, format='png', ecc='M'):
+    """
+    Returns the QR code image of `data` as PNG or SVG bytes.
+    Images are kept on the `images` cache
+    """
+    renderers = {'png': to_png, 'svg': to_svg}
+    if format not in renderers:
+        raise ValueError('format must be one of png or svg')
+    key = (data, width, height, format, ecc)
+    image = images.get(key)
+    if image is None:
+        image = renderers[format](encode(data, ecc), width, height)
+        images.set(key, image)
+    return image
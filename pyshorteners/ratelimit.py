@@ -0,0 +1,57 @@
+# encoding: utf-8
+"""
+Token bucket rate limiting
+The bucket lives on shared memory, so one limiter passed to worker processes
+enforces a single limit for all of them. Calls wait for a token until the
+current deadline at most, see `pyshorteners.deadline`.
+"""
+import multiprocessing
+import time
+
+from .deadline import current
+from .exceptions import DeadlineExceededException
+
+
+class RateLimiter(object):
+    """
+    Allows `rate` calls per second, with bursts of up to `burst` calls
+    """
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self.rate = float(rate)
+        self.burst = burst
+        self._lock = multiprocessing.Lock()
+        self._tokens = multiprocessing.RawValue('d', burst)
+        self._updated = multiprocessing.RawValue('d', time.time())
+
+    def _take(self):
+        """
+        Takes a token, returning 0, or the seconds to wait for the next one
+        """
+        with self._lock:
+            now = time.time()
+            refill = (now - self._updated.value) * self.rate
+            tokens = min(self.burst, self._tokens.value + refill)
+            self._updated.value = now
+            if tokens >= 1:
+                self._tokens.value = tokens - 1
+                return 0
+            self._tokens.value = tokens
+            return (1 - tokens) / self.rate
+
+    def acquire(self):
+        """
+        Blocks until the call is allowed. Raises `DeadlineExceededException`
+        at once when the next token comes after the current deadline
+        """
+        deadline = current()
+        wait = self._take()
+        while wait:
+            if deadline is not None and wait > deadline.remaining():
+                raise DeadlineExceededException(
+                    'Deadline of {0}s exceeded waiting for the rate '
+                    'limiter'.format(deadline.budget))
+            time.sleep(wait)
+            wait = self._take()
@@ -0,0 +1,122 @@
+# encoding: utf-8
+"""
+Routing of short links to the engine that created them
+
+`HostIndex` maps the short link hosts declared on every engine `domains`
+to the engine, so a mixed list of short links can be expanded through each
+provider api. Links from unknown hosts, or from engines that can not be
+built (e.g. missing credentials), use the generic redirect following
+`BaseShortener.expand`.
+"""
+from collections import OrderedDict
+
+from .shorteners import Shorteners, Simple
+from .utils import url_host
+from . import shorteners as registry
+
+GENERIC = 'Simple'
+
+
+class HostIndex(object):
+    """
+    `engines` - engine classes or instances to index, every engine listed
+    on `Shorteners` by default
+    `kwargs` - passed to the engine classes when they are built, e.g.
+    `bitly_token` or `api_key`
+    """
+
+    def __init__(self, engines=None, **kwargs):
+        if not kwargs.get('timeout'):
+            kwargs['timeout'] = 0.5
+        self.kwargs = kwargs
+        self._hosts = {}
+        self._instances = {}
+        if engines is None:
+            engines = [getattr(registry, name) for key, name
+                       in sorted(vars(Shorteners).items())
+                       if key.isupper() and hasattr(registry, name)]
+        for engine in engines:
+            self.register(engine)
+
+    def register(self, engine):
+        """
+        Indexes the `domains` of an engine class or instance
+        """
+        for host in engine.domains:
+            self._hosts[host.lower()] = engine
+
+    def provider(self, url):
+        """
+        Returns the name of the engine that created `url`, or 'Simple'
+        when the host is unknown
+        """
+        engine = self._hosts.get(url_host(url))
+        if engine is None:
+            return GENERIC
+        if not isinstance(engine, type):
+            engine = type(engine)
+        return engine.__name__
+
+    def engine_for(self, url):
+        """
+        Returns the engine instance to expand `url` with
+        """
+        engine = self._hosts.get(url_host(url))
+        if engine is None:
+            return self._generic()
+        if not isinstance(engine, type):
+            return engine
+        instance = self._instances.get(engine)
+        if instance is None:
+            try:
+                instance = engine(**self.kwargs)
+            except TypeError:
+                # keyed engine without its credentials
+                instance = self._generic()
+            self._instances[engine] = instance
+        return instance
+
+    def _generic(self):
+        instance = self._instances.get(Simple)
+        if instance is None:
+            instance = self._instances[Simple] = Simple(**self.kwargs)
+        return instance
+
+    def group(self, urls):
+        """
+        Groups `urls` by provider name, keeping the position of every url
+        """
+        groups = OrderedDict()
+        for position, url in enumerate(urls):
+            groups.setdefault(self.provider(url), []).append((position, url))
+        return groups
+
+    def expand(self, url):
+        return self.engine_for(url).expand(url)
+
+    def expand_many(self, urls):
+        """
+        Expands a mixed list of short links, one provider at a time, using
+        the engine `expand_many` when it has one.
+        Returns the results in the order of `urls`, a failed link gets the
+        raised exception instead of its expanded url
+        """
+        results = [None] * len(urls)
+        for _, items in self.group(urls).items():
+            engine = self.engine_for(items[0][1])
+            expand_many = getattr(engine, 'expand_many', None)
+            if expand_many is not None:
+                try:
+                    expanded = expand_many([url for _, url in items])
+                except Exception as e:
+                    # only this provider group fails
+                    expanded = [e] * len(items)
+                for (position, _), result in zip(items, expanded):
+                    results[position] = result
+                continue
+            for position, url in items:
+                try:
+                    results[position] = engine.expand(url)
+                except Exception as e:
+                    results[position] = e
+        return results
@@ -0,0 +1,228 @@
+# encoding: utf-8
+"""
+Redirect service on top of the shorteners
+`GET /<code>` redirects to the url stored for `code`
+`POST /shorten` shortens the `url` field of a json or form body
+
+`WSGIApp` and `ASGIApp` share the same `RedirectService`:
+
+    from pyshorteners.server import WSGIApp
+    from pyshorteners.stores import SqliteStore
+    from pyshorteners.shorteners import Local
+
+    store = SqliteStore('links.db')
+    app = WSGIApp(engine=Local(domain='https://sho.rt/', store=store))
+"""
+import asyncio
+import json
+from urllib.parse import parse_qs, quote
+
+from .cache import LRUCache
+from .clicks import ClickCounter
+from .exceptions import DeadlineExceededException, ResponseErrorException
+from .shorteners import Local
+from .singleflight import AsyncSingleFlight
+from .stores import MemoryStore
+from .utils import is_valid_url
+
+STATUS_LINES = {
+    200: '200 OK',
+    201: '201 Created',
+    301: '301 Moved Permanently',
+    302: '302 Found',
+    400: '400 Bad Request',
+    404: '404 Not Found',
+    405: '405 Method Not Allowed',
+    502: '502 Bad Gateway',
+    504: '504 Gateway Timeout',
+}
+
+# reserved characters and escapes are kept, headers only take latin-1 and
+# clients expect ascii
+_LOCATION_SAFE = "!#$%&'()*+,/:;=?@[]~"
+
+
+class RedirectService(object):
+    """
+    Resolves codes and shortens urls, independent of the server interface
+
+    `engine` - a `BaseShortener` instance, a new `Local` engine by default
+    `store` - mapping store for the codes served here, the `engine` store
+    when it has one
+    `clicks` - a `ClickCounter` recording the redirects, the `engine` one
+    when it has one. A new counter flushing to `store` every second is
+    used otherwise
+    `permanent` - answer redirects with 301 instead of 302
+    `cache_size` - number of hot codes kept in memory
+    """
+
+    def __init__(self, engine=None, store=None, clicks=None, permanent=False,
+                 cache_size=10000):
+        if engine is None:
+            engine = Local(store=store if store is not None
+                           else MemoryStore())
+        if store is None:
+            store = getattr(engine, 'store', None)
+        if store is None:
+            store = MemoryStore()
+        if clicks is None:
+            clicks = getattr(engine, 'clicks', None)
+        if clicks is None:
+            clicks = ClickCounter(store)
+        self.engine = engine
+        self.store = store
+        self.clicks = clicks
+        self.redirect_status = 301 if permanent else 302
+        self.hot = LRUCache(cache_size)
+
+    def resolve(self, code):
+        url = self.hot.get(code)
+        if url is None:
+            url = self.store.get(code)
+            if url is None:
+                return None
+            self.hot.set(code, url)
+        return url
+
+    def redirect(self, code):
+        """
+        Returns status, headers and body for a `GET /<code>` request
+        """
+        url = self.resolve(code) if code else None
+        if url is None:
+            return 404, [('Content-Type', 'text/plain')], b'Not Found'
+        self.clicks.incr(code)
+        location = quote(url, safe=_LOCATION_SAFE)
+        return (self.redirect_status,
+                [('Location', location), ('Content-Length', '0')], b'')
+
+    @staticmethod
+    def parse_url(body, content_type=''):
+        """
+        Returns the `url` field of a json or form body
+        """
+        try:
+            if content_type.startswith('application/json'):
+                return json.loads(body.decode('utf-8')).get('url')
+            return parse_qs(body.decode('utf-8')).get('url', [None])[0]
+        except (ValueError, AttributeError):
+            return None
+
+    def shorten(self, body, content_type=''):
+        """
+        Returns status, headers and body for a `POST /shorten` request
+        """
+        return self.shorten_url(self.parse_url(body, content_type))
+
+    def shorten_url(self, url):
+        if not url or not is_valid_url(url):
+            return self._json(400, {'error': 'Please enter a valid url'})
+
+        import requests
+
+        try:
+            short = self.engine.short(url)
+        except (DeadlineExceededException,
+                requests.exceptions.Timeout) as e:
+            return self._json(504, {'error': str(e)})
+        except (ResponseErrorException,
+                requests.exceptions.RequestException) as e:
+            return self._json(502, {'error': str(e)})
+
+        code = short.rstrip('/').rsplit('/', 1)[-1]
+        if self.store.get(code) != url:
+            self.store.set(code, url)
+        self.hot.set(code, url)
+        return self._json(201, {'url': url, 'short': short})
+
+    @staticmethod
+    def _json(status, data):
+        body = json.dumps(data).encode('utf-8')
+        return status, [('Content-Type', 'application/json'),
+                        ('Content-Length', str(len(body)))], body
+
+    def total_clicks(self, code):
+        return self.clicks.total(code)
+
+    def dispatch(self, method, path, body=b'', content_type=''):
+        if path == '/shorten':
+            if method != 'POST':
+                return 405, [('Allow', 'POST')], b''
+            return self.shorten(body, content_type)
+        if method not in ('GET', 'HEAD'):
+            return 405, [('Allow', 'GET, HEAD')], b''
+        return self.redirect(path.lstrip('/'))
+
+
+class WSGIApp(object):
+    """
+    WSGI application, takes the same arguments as `RedirectService`
+    """
+
+    def __init__(self, service=None, **kwargs):
+        self.service = service or RedirectService(**kwargs)
+
+    def __call__(self, environ, start_response):
+        method = environ['REQUEST_METHOD']
+        body = b''
+        if method == 'POST':
+            try:
+                length = int(environ.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                length = 0
+            body = environ['wsgi.input'].read(length)
+        status, headers, body = self.service.dispatch(
+            method, environ.get('PATH_INFO', '/'), body,
+            environ.get('CONTENT_TYPE', ''))
+        start_response(STATUS_LINES[status], headers)
+        return [body]
+
+
+class ASGIApp(object):
+    """
+    ASGI application, takes the same arguments as `RedirectService`.
+    Shortening runs on the event loop default executor since engines
+    make blocking requests, concurrent requests for the same url share
+    a single engine call
+    """
+
+    def __init__(self, service=None, **kwargs):
+        self.service = service or RedirectService(**kwargs)
+        self.flights = AsyncSingleFlight()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return
+        method = scope['method']
+        path = scope['path']
+        if method == 'POST' and path == '/shorten':
+            body = await self._read_body(receive)
+            content_type = ''
+            for name, value in scope.get('headers', []):
+                if name.lower() == b'content-type':
+                    content_type = value.decode('latin-1')
+            url = self.service.parse_url(body, content_type)
+            loop = asyncio.get_running_loop()
+            status, headers, body = await self.flights.do(
+                ('short', url), loop.run_in_executor, None,
+                self.service.shorten_url, url)
+        else:
+            status, headers, body = self.service.dispatch(method, path)
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode('latin-1'),
+                         value.encode('latin-1'))
+                        for name, value in headers],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    @staticmethod
+    async def _read_body(receive):
+        body = b''
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get('body', b'')
+            more_body = message.get('more_body', False)
+        return body
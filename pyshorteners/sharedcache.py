@@ -0,0 +1,204 @@
+# encoding: utf-8
+"""
+Cache backend on shared memory, for the worker processes of one host
+The table is a fixed number of slots on a `multiprocessing.shared_memory`
+block, grouped in sets of `ways` slots. A key can only live on the set its
+hash points to, and a full set evicts its least recently used slot.
+
+Lookups take no lock: every slot carries a version, odd while a writer is
+changing it, and a reader retries when the version moved under it. Writers
+lock the stripe of their set.
+
+Create the cache before forking the workers, or hand it to processes started
+by `multiprocessing`, so all of them share its block and locks.
+"""
+import hashlib
+import multiprocessing
+import struct
+import time
+from multiprocessing import shared_memory
+
+from .cache import BaseCache
+
+# header: magic, slots, slot size, ways
+_HEADER = struct.Struct('<8sQQQ')
+# slot: version, key hash (0 means empty), expires (0 never), last used,
+# key length, value length
+_SLOT = struct.Struct('<QQddHH')
+_VERSION = struct.Struct('<Q')
+_USED = struct.Struct('<d')
+_USED_OFFSET = 24
+_MAGIC = b'PYSHSHM1'
+_RETRIES = 16
+
+
+def _hash(key):
+    digest = hashlib.blake2b(key, digest_size=8).digest()
+    return struct.unpack('<Q', digest)[0] or 1
+
+
+class SharedMemoryCache(BaseCache):
+    """
+    `slots` - number of entries the table holds, 65536 default value
+    `slot_size` - bytes of a slot, pairs whose key and value do not fit in
+    `slot_size` - 36 bytes are not cached. 256 default value
+    `ways` - slots of a set, 8 default value
+    `stripes` - number of writer locks, 64 default value
+    """
+
+    def __init__(self, slots=65536, slot_size=256, ways=8, stripes=64):
+        if slots % ways:
+            raise ValueError('slots must be a multiple of ways')
+        if slot_size <= _SLOT.size:
+            raise ValueError('slot_size must be over {0}'.format(_SLOT.size))
+        self.slots = slots
+        self.slot_size = slot_size
+        self.ways = ways
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=_HEADER.size + slots * slot_size)
+        _HEADER.pack_into(self._shm.buf, 0, _MAGIC, slots, slot_size, ways)
+        self._locks = [multiprocessing.Lock() for _ in range(stripes)]
+        self._owner = True
+        self._attach()
+
+    def _attach(self):
+        self._buf = self._shm.buf
+        self._sets = self.slots // self.ways
+        self._capacity = self.slot_size - _SLOT.size
+
+    def __getstate__(self):
+        return {'slots': self.slots, 'slot_size': self.slot_size,
+                'ways': self.ways, 'name': self._shm.name,
+                'locks': self._locks}
+
+    def __setstate__(self, state):
+        self.slots = state['slots']
+        self.slot_size = state['slot_size']
+        self.ways = state['ways']
+        self._shm = shared_memory.SharedMemory(state['name'])
+        self._locks = state['locks']
+        self._owner = False
+        self._attach()
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @staticmethod
+    def _key(key):
+        return '\0'.join(key).encode('utf-8')
+
+    def _set_of(self, key_hash):
+        number = key_hash % self._sets
+        first = _HEADER.size + number * self.ways * self.slot_size
+        return number, range(first, first + self.ways * self.slot_size,
+                             self.slot_size)
+
+    def _read(self, offset, key_hash, key):
+        """
+        Returns the (expires, value bytes) of the slot at `offset` when it
+        holds `key`, None otherwise
+        """
+        buf = self._buf
+        for _ in range(_RETRIES):
+            version, slot_hash, expires, _, key_size, value_size = \
+                _SLOT.unpack_from(buf, offset)
+            if slot_hash != key_hash:
+                return None
+            if version & 1:
+                continue
+            start = offset + _SLOT.size
+            data = bytes(buf[start:start + key_size + value_size])
+            if _VERSION.unpack_from(buf, offset)[0] != version:
+                continue
+            if data[:key_size] != key:
+                return None
+            return expires, data[key_size:]
+        return None
+
+    def get(self, key, default=None):
+        key = self._key(key)
+        key_hash = _hash(key)
+        _, offsets = self._set_of(key_hash)
+        for offset in offsets:
+            found = self._read(offset, key_hash, key)
+            if found is None:
+                continue
+            expires, value = found
+            now = time.time()
+            if expires and expires < now:
+                return default
+            # racy on purpose, it only orders the evictions
+            _USED.pack_into(self._buf, offset + _USED_OFFSET, now)
+            return value.decode('utf-8')
+        return default
+
+    def _write(self, offset, key_hash, expires, key, value):
+        buf = self._buf
+        version = _VERSION.unpack_from(buf, offset)[0]
+        _VERSION.pack_into(buf, offset, version + 1)
+        _SLOT.pack_into(buf, offset, version + 1, key_hash, expires,
+                        time.time(), len(key), len(value))
+        start = offset + _SLOT.size
+        buf[start:start + len(key) + len(value)] = key + value
+        _VERSION.pack_into(buf, offset, version + 2)
+
+    def set(self, key, value, ttl=None):
+        key = self._key(key)
+        value = value.encode('utf-8')
+        if len(key) + len(value) > self._capacity:
+            return
+        key_hash = _hash(key)
+        number, offsets = self._set_of(key_hash)
+        now = time.time()
+        expires = now + ttl if ttl is not None else 0
+        with self._locks[number % len(self._locks)]:
+            victim, victim_used = None, None
+            for offset in offsets:
+                _, slot_hash, slot_expires, used, _, _ = \
+                    _SLOT.unpack_from(self._buf, offset)
+                if slot_hash == key_hash and \
+                        self._read(offset, key_hash, key) is not None:
+                    victim = offset
+                    break
+                if slot_hash == 0 or (slot_expires and slot_expires < now):
+                    used = -1
+                if victim is None or used < victim_used:
+                    victim, victim_used = offset, used
+            self._write(victim, key_hash, expires, key, value)
+
+    def delete(self, key):
+        key = self._key(key)
+        key_hash = _hash(key)
+        number, offsets = self._set_of(key_hash)
+        with self._locks[number % len(self._locks)]:
+            for offset in offsets:
+                if self._read(offset, key_hash, key) is not None:
+                    self._write(offset, 0, 0, b'', b'')
+
+    def clear(self):
+        for number in range(self._sets):
+            with self._locks[number % len(self._locks)]:
+                first = _HEADER.size + number * self.ways * self.slot_size
+                for slot in range(self.ways):
+                    self._write(first + slot * self.slot_size, 0, 0, b'',
+                                b'')
+
+    def __len__(self):
+        starts = range(_HEADER.size,
+                       _HEADER.size + self.slots * self.slot_size,
+                       self.slot_size)
+        return sum(1 for start in starts
+                   if _SLOT.unpack_from(self._buf, start)[1])
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def close(self):
+        """
+        Detaches the block, which the creating process also removes
+        """
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
@@ -1,6 +1,6 @@
 # encoding: utf-8
 import logging
-import inspect
+import threading
 
 # flake8: noqa
 from .base import Simple, BaseShortener
@@ -19,9 +19,11 @@ from .clckru import Clckru
 from .qpsru import Qpsru
 from .dagd import Dagd
 from .chilpit import Chilpit
+from .local import Local
+from .balanced import Balanced
 
-from ..utils import is_valid_url
-from ..exceptions import UnknownShortenerException
+from .. import forksafe
+from ..client import Client, get_engine_class
 
 # Log Configs
 logger = logging.getLogger('pyshorteners')
@@ -52,91 +54,103 @@ class Shorteners(object):
     QPSRU = 'Qpsru'
     DAGD = 'Dagd'
     CHILPIT = 'Chilpit'
+    LOCAL = 'Local'
+    BALANCED = 'Balanced'
 
 
 class Shortener(object):
     """
     Factory class for all Shorteners
+    Keeps the last shortened and expanded urls on `shorten` and `expanded`,
+    calls are made through a `pyshorteners.client.Client`, which is the
+    one to share between threads
     """
 
     def __init__(self, engine=Shorteners.SIMPLE, **kwargs):
         self.kwargs = kwargs
         self.shorten = None
         self.expanded = None
+        self._client = None
+        self._lock = threading.Lock()
         self.debug = kwargs.pop('debug', False)
-
-        if inspect.isclass(engine) and issubclass(engine, BaseShortener):
-            self.engine = engine.__name__
-            self._class = engine
-        else:
-            self.engine = engine
-            module = __import__('pyshorteners.shorteners')
-            try:
-                self._class = getattr(module.shorteners, self.engine)
-            except AttributeError:
-                raise UnknownShortenerException(
-                    'Please enter a valid shortener.'
-                    ' {} class does not exist'.format(self.engine)
-                )
+        self.cache = kwargs.pop('cache', None)
+        self.cache_ttl = kwargs.pop('cache_ttl', None)
+        self.negative_cache = kwargs.pop('negative_cache', None)
+        self.coalesce = kwargs.pop('coalesce', False)
+        self.rate_limiter = kwargs.pop('rate_limiter', None)
+        self.batch_delay = kwargs.pop('batch_delay', None)
+        self.batch_size = kwargs.pop('batch_size', 50)
+        self.limit_concurrency = kwargs.pop('limit_concurrency', False)
+        self.deadline = kwargs.pop('deadline', None)
+        self.on_deadline = kwargs.pop('on_deadline', 'raise')
+
+        self._class = get_engine_class(engine)
+        self.engine = self._class.__name__
 
         for key, item in list(kwargs.items()):
             setattr(self, key, item)
+        forksafe.register(self)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
 
     @property
     def api_url(self):
         return self._class.api_url
 
-    def total_clicks(self, url=None):
-        if self.debug:
-            logger.info('total_clicks property called with url:'
-                        ' {0}'.format(url))
+    @property
+    def client(self):
+        # built on first use, so keyed engines only complain about missing
+        # credentials when called. Threads calling first share one client,
+        # and so its coalesced calls
+        if self._client is not None:
+            return self._client
+        with self._lock:
+            if self._client is None:
+                self._client = Client(self._class, cache=self.cache,
+                                      cache_ttl=self.cache_ttl,
+                                      negative_cache=self.negative_cache,
+                                      coalesce=self.coalesce,
+                                      rate_limiter=self.rate_limiter,
+                                      batch_delay=self.batch_delay,
+                                      batch_size=self.batch_size,
+                                      limit_concurrency=self.limit_concurrency,
+                                      deadline=self.deadline,
+                                      on_deadline=self.on_deadline,
+                                      debug=self.debug,
+                                      **self.kwargs)
+        return self._client
 
+    def total_clicks(self, url=None):
         url = url or self.shorten
         if not url:
             raise TypeError('You need to pass an url or have an already '
                             'shortened one')
+        return self.client.total_clicks(url)
 
-        if not is_valid_url(url):
-            raise ValueError('Please enter a valid url')
-
-        return self._class(**self.kwargs).total_clicks(url)
-
-    def short(self, url):
-        if self.debug:
-            logger.info('Short method called with url: {0}'.format(url))
-
-        if not is_valid_url(url):
-            raise ValueError('Please enter a valid url')
+    def short(self, url, deadline=None):
+        self.shorten = self.client.short(url, deadline)
         self.expanded = url
-
-        if not self.kwargs.get('timeout'):
-            self.kwargs['timeout'] = 0.5
-
-        self.shorten = self._class(**self.kwargs).short(url)
-        if self.debug:
-            logger.info('Shorten url result: {0}'.format(self.shorten))
         return self.shorten
 
-    def expand(self, url=None):
-        if self.debug:
-            logger.info('Expand method called with url: {0}'.format(url))
-
-        if url and not is_valid_url(url):
-            raise ValueError('Please enter a valid url')
-
+    def expand(self, url=None, deadline=None):
         if url:
-            if not self.kwargs.get('timeout'):
-                self.kwargs['timeout'] = 0.5
-            self.expanded = self._class(**self.kwargs).expand(url)
-        if self.debug:
-            logger.info('Expanded url result: {0}'.format(self.expanded))
+            self.expanded = self.client.expand(url, deadline)
         return self.expanded
 
-    def qrcode(self, width=120, height=120):
+    def short_many(self, urls, max_workers=8, processes=None,
+                   deadline=None):
+        return self.client.short_many(urls, max_workers, processes, deadline)
+
+    def expand_many(self, urls, max_workers=8, processes=None,
+                    deadline=None):
+        return self.client.expand_many(urls, max_workers, processes,
+                                       deadline)
+
+    def qrcode(self, width=120, height=120, format=None):
         if not self.shorten:
             return None
+        return self.client.qrcode(self.shorten, width, height, format)
 
-        qrcode_url = ('http://chart.apis.google.com/chart?cht=qr&'
-                      'chl={0}&chs={1}x{2}'.format(self.shorten, width,
-                                                   height))
-        return qrcode_url
+    def qrcode_many(self, urls, width=120, height=120, format='png'):
+        return self.client.qrcode_many(urls, width, height, format)
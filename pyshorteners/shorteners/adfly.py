@@ -1,33 +1,50 @@
 # encoding: utf-8
 """
 Adf.ly shortener implementation
-Needs api key and uid
+Needs api key and uid. `key` can be a list of keys to rotate, with a list
+of their uids on `uid`, or a single uid they share
 """
+from ..credentials import CredentialPool
 from ..exceptions import ShorteningErrorException
 from .base import BaseShortener
 
 
 class Adfly(BaseShortener):
     api_url = 'http://api.adf.ly/api.php'
+    domains = ('adf.ly',)
 
     def __init__(self, **kwargs):
         if not all([kwargs.get('key', False), kwargs.get('uid', False)]):
             raise TypeError('Please input the key and uid value')
-        self.key = kwargs.get('key')
-        self.uid = kwargs.get('uid')
+        keys, uids = kwargs.get('key'), kwargs.get('uid')
+        if isinstance(keys, CredentialPool):
+            self.credentials = keys
+        else:
+            if not isinstance(keys, (list, tuple)):
+                keys = [keys]
+            if not isinstance(uids, (list, tuple)):
+                uids = [uids] * len(keys)
+            if len(keys) != len(uids):
+                raise TypeError('Please input one uid per key')
+            self.credentials = CredentialPool(zip(keys, uids))
+        self.key, self.uid = self.credentials.credentials[0]
         self.type = kwargs.get('type', 'int')
         super(Adfly, self).__init__(**kwargs)
 
     def short(self, url):
-        data = {
-            'domain': 'adf.ly',
-            'advert_type': self.type,  # int or banner
-            'key': self.key,
-            'uid': self.uid,
-            'url': url,
-        }
-        response = self._get(self.api_url, params=data)
+        def request(credential):
+            key, uid = credential
+            data = {
+                'domain': 'adf.ly',
+                'advert_type': self.type,  # int or banner
+                'key': key,
+                'uid': uid,
+                'url': url,
+            }
+            return self._get(self.api_url, params=data)
+        response = self.credentials.send(request)
         if response.ok:
             return response.text
         raise ShorteningErrorException('There was an error shortening this '
-                                       'url - {0}'.format(response.content))
+                                       'url - {0}'.format(response.content),
+                                       status_code=response.status_code)
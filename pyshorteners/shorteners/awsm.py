@@ -1,22 +1,25 @@
 # encoding: utf-8
 """
 Aw.sm Shortener Implementation
-Needs a API_KEY
+Needs a API_KEY, or a list of them to rotate
 Optional Params
 `tool` - String
 `channel` - 'twitter' 'facebook'. 'twitter' default value
 """
+from ..credentials import CredentialPool
 from ..exceptions import ShorteningErrorException
 from .base import BaseShortener
 
 
 class Awsm(BaseShortener):
     api_url = 'http://api.awe.sm/'
+    domains = ('awe.sm',)
 
     def __init__(self, **kwargs):
         if not kwargs.get('api_key', False):
             raise TypeError('api_key missing from kwargs')
-        self.api_key = kwargs.get('api_key')
+        self.credentials = CredentialPool.of(kwargs.get('api_key'))
+        self.api_key = self.credentials.credentials[0]
         self.tool = kwargs.get('tool', Awsm._generate_random_tool())
         self.channel = kwargs.get('channel', 'twitter')
         super(Awsm, self).__init__(**kwargs)
@@ -34,17 +37,20 @@ class Awsm(BaseShortener):
                        for _ in range(4))
 
     def short(self, url):
-        params = {
-            'v': 3,
-            'url': url,
-            'key': self.api_key,
-            'tool': self.tool,
-            'channel': self.channel
-        }
-        url = '{0}url.txt'.format(self.api_url)
-        response = self._post(url, params=params)
+        def request(api_key):
+            params = {
+                'v': 3,
+                'url': url,
+                'key': api_key,
+                'tool': self.tool,
+                'channel': self.channel
+            }
+            return self._post('{0}url.txt'.format(self.api_url),
+                              params=params)
+        response = self.credentials.send(request)
         if response.ok:
             return response.text
         raise ShorteningErrorException('There was an error shortening '
                                        'this url - {0}'.format(
-                                           response.content))
+                                           response.content),
+                                       status_code=response.status_code)
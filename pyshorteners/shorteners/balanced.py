@@ -0,0 +1,200 @@
+# encoding: utf-8
+"""
+Latency aware load balancing across interchangeable shorteners
+Each call picks an engine from the pool with a probability inversely
+proportional to its moving average latency and error rate. A share of the
+calls (`exploration`) picks an engine at random, so engines that recovered
+from errors get traffic back. A call failing with a retryable error (see
+`ResponseErrorException.retryable`) or a request error is retried on the
+other engines, other errors are raised at once.
+Optional params
+`engines` - engine names, classes or instances. Tinyurl, Isgd, Dagd,
+Clckru and Qpsru by default. A dict names each engine, otherwise engines
+are named after their class, `Class#position` when a class is listed
+several times. `stats`, `selections` and the hash ring use these names
+`alpha` - weight of the newest observation on the moving averages, 0.2
+default value
+`exploration` - share of random picks, 0.1 default value
+`routing` - 'latency' by default, 'hash' sends each canonical url to the
+engine a consistent hash ring picks, so the same url always gets the same
+short link, and only fails over to the next engines on the ring
+`limit_concurrency` - each engine gets an adaptive concurrency limit from
+`pyshorteners.concurrency.bulkheads`, calls finding a full engine go to the
+next one
+"""
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from .base import BaseShortener
+from .clckru import Clckru
+from .dagd import Dagd
+from .isgd import Isgd
+from .qpsru import Qpsru
+from .tinyurl import Tinyurl
+from .. import forksafe
+from ..concurrency import bulkheads
+from ..exceptions import (ConcurrencyLimitException,
+                          DeadlineExceededException, ResponseErrorException)
+from ..hashring import HashRing
+from ..utils import canonicalize_url, url_host
+
+DEFAULT_ENGINES = (Tinyurl, Isgd, Dagd, Clckru, Qpsru)
+# how much an error rate of 100% inflates an engine latency
+ERROR_PENALTY = 10.0
+
+
+class EngineStats(object):
+
+    def __init__(self, latency=0.1):
+        self.latency = latency
+        self.error_rate = 0.0
+        self.selections = 0
+
+    @property
+    def score(self):
+        return self.latency * (1 + ERROR_PENALTY * self.error_rate)
+
+
+class Balanced(BaseShortener):
+
+    def __init__(self, **kwargs):
+        super(Balanced, self).__init__(**kwargs)
+        engine_kwargs = dict((key, value) for key, value in kwargs.items()
+                             if key not in ('engines', 'alpha',
+                                            'exploration', 'routing',
+                                            'limit_concurrency'))
+        engines = kwargs.get('engines', DEFAULT_ENGINES)
+        if isinstance(engines, dict):
+            names, engines = list(engines.keys()), list(engines.values())
+        else:
+            names = None
+        engines = [self._build(engine, engine_kwargs) for engine in engines]
+        if not engines:
+            raise TypeError('engines must list at least one engine')
+        self.pool = OrderedDict(zip(names or self._names(engines), engines))
+        self.engines = list(self.pool.values())
+        self.alpha = kwargs.get('alpha', 0.2)
+        self.exploration = kwargs.get('exploration', 0.1)
+        self.routing = kwargs.get('routing', 'latency')
+        if self.routing not in ('latency', 'hash'):
+            raise TypeError('routing must be latency or hash')
+        self.limit_concurrency = kwargs.get('limit_concurrency', False)
+        self.ring = HashRing(self.pool)
+        self.stats = dict((name, EngineStats()) for name in self.pool)
+        self.domains = tuple(domain for engine in self.engines
+                             for domain in engine.domains)
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        forksafe.register(self)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        # children must not pick the same engine sequence
+        self._random = random.Random()
+
+    @staticmethod
+    def _build(engine, kwargs):
+        if isinstance(engine, BaseShortener):
+            return engine
+        if not isinstance(engine, type):
+            module = __import__('pyshorteners.shorteners')
+            engine = getattr(module.shorteners, engine)
+        return engine(**kwargs)
+
+    @staticmethod
+    def _names(engines):
+        classes = [type(engine).__name__ for engine in engines]
+        return [name if classes.count(name) == 1
+                else '{0}#{1}'.format(name, position)
+                for position, name in enumerate(classes)]
+
+    @property
+    def selections(self):
+        return dict((name, stats.selections)
+                    for name, stats in self.stats.items())
+
+    def _order(self):
+        """
+        Returns the pool engine names, the picked one first
+        """
+        names = list(self.pool)
+        if self._random.random() < self.exploration:
+            first = self._random.choice(names)
+        else:
+            weights = [1.0 / max(self.stats[name].score, 1e-6)
+                       for name in names]
+            point = self._random.random() * sum(weights)
+            for first, weight in zip(names, weights):
+                point -= weight
+                if point <= 0:
+                    break
+        others = sorted((name for name in names if name != first),
+                        key=lambda name: self.stats[name].score)
+        return [first] + others
+
+    def _ring_order(self, url):
+        """
+        Returns the pool engine names in the ring order of `url`
+        """
+        return self.ring.nodes_for(canonicalize_url(url))
+
+    def _record(self, name, elapsed, failed):
+        # a quick failure says nothing of the engine latency, only its
+        # successes move it
+        alpha = self.alpha
+        error = 1.0 if failed else 0.0
+        with self._lock:
+            stats = self.stats[name]
+            stats.selections += 1
+            if not failed:
+                stats.latency += alpha * (elapsed - stats.latency)
+            stats.error_rate += alpha * (error - stats.error_rate)
+
+    def _call(self, names, operation, url):
+        error = None
+        for name in names:
+            start = time.time()
+            method = getattr(self.pool[name], operation)
+            try:
+                if self.limit_concurrency:
+                    result = bulkheads.get(name).call(method, url)
+                else:
+                    result = method(url)
+            except DeadlineExceededException:
+                # the caller budget ran out, the other engines would not
+                # get any time either
+                raise
+            except ConcurrencyLimitException as e:
+                # the engine was full, nothing was sent
+                error = e
+                continue
+            except ResponseErrorException as e:
+                if not e.retryable:
+                    # the call itself was refused, e.g. a bad url, the
+                    # engine is fine and the others would refuse it too
+                    raise
+                self._record(name, time.time() - start, True)
+                error = e
+                continue
+            except self.requests.exceptions.RequestException as e:
+                self._record(name, time.time() - start, True)
+                error = e
+                continue
+            self._record(name, time.time() - start, False)
+            return result
+        raise error
+
+    def short(self, url):
+        if self.routing == 'hash':
+            return self._call(self._ring_order(url), 'short', url)
+        return self._call(self._order(), 'short', url)
+
+    def expand(self, url):
+        host = url_host(url)
+        names = [name for name, engine in self.pool.items()
+                 if host in engine.domains]
+        if not names:
+            return super(Balanced, self).expand(url)
+        return self._call(names, 'expand', url)
@@ -1,8 +1,43 @@
 # encoding: utf-8
 
 from abc import ABCMeta, abstractmethod
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urljoin
 
-from ..exceptions import ExpandingErrorException
+from .. import forksafe
+from ..deadline import current
+from ..exceptions import DeadlineExceededException, ExpandingErrorException
+
+
+class SessionPool(object):
+    """
+    One `requests.Session` per process, shared by every engine so
+    connections are kept alive between calls. Cookies are never stored.
+    A forked child builds its own session instead of reusing the parent
+    connections
+    """
+
+    def __init__(self):
+        self._session = None
+        forksafe.register(self)
+
+    def get(self):
+        forksafe.check()
+        session = self._session
+        if session is None:
+            import requests
+            session = requests.Session()
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            self._session = session
+        return session
+
+    def _after_fork(self):
+        # the parent keeps using the inherited sockets, so they are
+        # dropped without being closed
+        self._session = None
+
+
+sessions = SessionPool()
 
 
 class BaseShortener(object):
@@ -13,36 +48,80 @@ class BaseShortener(object):
     __metaclass__ = ABCMeta
 
     api_url = None
+    # hosts of the short links created by the engine
+    domains = ()
 
     def __init__(self, **kwargs):
         import requests
         self.kwargs = kwargs
         self.requests = requests
 
-    def _get(self, url, params=None):
-        response = self.requests.get(url, params=params,
-                                     verify=self.kwargs.get('verify', True),
-                                     timeout=self.kwargs['timeout'])
-        return response
+    def _timeout(self):
+        """
+        Returns the timeout of a request. `timeout` is a number or a
+        (connect, read) tuple, `connect_timeout` and `read_timeout` override
+        its parts, and the current `pyshorteners.deadline` caps them to the
+        time left
+        """
+        timeout = self.kwargs.get('timeout')
+        connect = self.kwargs.get('connect_timeout')
+        read = self.kwargs.get('read_timeout')
+        if connect is not None or read is not None:
+            if not isinstance(timeout, tuple):
+                timeout = (timeout, timeout)
+            timeout = (timeout[0] if connect is None else connect,
+                       timeout[1] if read is None else read)
+        deadline = current()
+        if deadline is not None:
+            timeout = deadline.clamp(timeout)
+        return timeout
+
+    def _send(self, method, url, **kwargs):
+        deadline = current()
+        try:
+            return getattr(sessions.get(), method)(
+                url, verify=self.kwargs.get('verify', True),
+                timeout=self._timeout(), **kwargs)
+        except self.requests.exceptions.Timeout:
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceededException(
+                    'Deadline of {0}s exceeded waiting for {1}'.format(
+                        deadline.budget, url))
+            raise
+
+    def _get(self, url, params=None, allow_redirects=True):
+        return self._send('get', url, params=params,
+                          allow_redirects=allow_redirects)
 
     def _post(self, url, data=None, params=None, headers=None):
-        response = self.requests.post(url, data=data, params=params,
-                                      headers=headers,
-                                      verify=self.kwargs.get('verify', True),
-                                      timeout=self.kwargs['timeout'])
-        return response
+        return self._send('post', url, data=data, params=params,
+                          headers=headers)
+
+    def _follow(self, url):
+        """
+        GETs `url` following its redirects one hop at a time, so every hop
+        gets the timeouts left of the current deadline
+        """
+        for _ in range(sessions.get().max_redirects + 1):
+            response = self._get(url, allow_redirects=False)
+            if not response.is_redirect:
+                return response
+            url = urljoin(response.url, response.headers['location'])
+        raise self.requests.exceptions.TooManyRedirects(
+            'Exceeded {0} redirects'.format(sessions.get().max_redirects))
 
     @abstractmethod
     def short(self, url):
         raise NotImplementedError
 
     def expand(self, url):
-        response = self._get(url)
+        response = self._follow(url)
         if response.ok:
             return response.url
         raise ExpandingErrorException('There was an error expanding '
                                       'this url - {0}'.format(
-                                          response.content))
+                                          response.content),
+                                      status_code=response.status_code)
 
     def total_clicks(self, url=None):
         raise NotImplementedError
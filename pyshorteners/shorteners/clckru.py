@@ -9,6 +9,7 @@ from ..exceptions import ShorteningErrorException
 
 class Clckru(BaseShortener):
     api_url = 'https://clck.ru/--'
+    domains = ('clck.ru',)
 
     def short(self, url):
         params = {
@@ -18,4 +19,5 @@ class Clckru(BaseShortener):
         if response.ok:
             return response.text.strip()
         raise ShorteningErrorException('There was an error shortening this '
-                                       'url - {0}'.format(response.content))
+                                       'url - {0}'.format(response.content),
+                                       status_code=response.status_code)
@@ -10,6 +10,7 @@ from ..exceptions import ShorteningErrorException, ExpandingErrorException
 
 class Dagd(BaseShortener):
     api_url = 'https://da.gd/'
+    domains = ('da.gd',)
 
     def short(self, url):
         shorten_url = '{0}{1}'.format(self.api_url, 'shorten')
@@ -18,7 +19,8 @@ class Dagd(BaseShortener):
         if response.ok:
             return response.text.strip()
         raise ShorteningErrorException('There was an error shortening this '
-                                       'url - {0}'.format(response.content))
+                                       'url - {0}'.format(response.content),
+                                       status_code=response.status_code)
 
     def expand(self, url):
         # da.gd's coshorten expects only the shorturl identifier
@@ -32,4 +34,5 @@ class Dagd(BaseShortener):
         if response.ok:
             return response.text.strip()
         raise ExpandingErrorException('There was an error expanding this '
-                                      'url - {0}'.format(response.content))
+                                      'url - {0}'.format(response.content),
+                                      status_code=response.status_code)
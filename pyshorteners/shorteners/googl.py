@@ -1,28 +1,79 @@
 # encoding: utf-8
 """
 Googl Shortener Implementation
-Needs a API_KEY
+Needs a API_KEY, or a list of them to rotate
+`short_many` and `expand_many` pack up to `batch_limit` calls on one
+multipart/mixed request to the batch endpoint
 """
 import json
+import re
+import uuid
+from urllib.parse import urlencode, urlparse
 
+from ..credentials import CredentialPool
 from ..exceptions import ShorteningErrorException, ExpandingErrorException
 from .base import BaseShortener
 
+_BOUNDARY = re.compile(r'boundary="?([^";]+)"?')
+_CONTENT_ID = re.compile(r'^content-id:\s*<response-item(\d+)>\s*$',
+                         re.IGNORECASE | re.MULTILINE)
+
+
+def _split_head(text):
+    """
+    Splits a http message on its first blank line
+    """
+    for separator in ('\r\n\r\n', '\n\n'):
+        if separator in text:
+            return text.split(separator, 1)
+    return text, ''
+
+
+def _parse_batch_response(response):
+    """
+    Returns a dict of item position -> (status code, body) of a multipart
+    batch response. Raises ValueError when it is malformed
+    """
+    match = _BOUNDARY.search(response.headers.get('content-type', ''))
+    if match is None:
+        raise ValueError('Not a multipart response')
+    delimiter = '--' + match.group(1)
+    items = {}
+    for part in response.text.split(delimiter)[1:]:
+        if part.startswith('--'):
+            break
+        head, message = _split_head(part.strip('\r\n'))
+        content_id = _CONTENT_ID.search(head)
+        if content_id is None:
+            continue
+        status_line, body = _split_head(message)
+        try:
+            status_code = int(status_line.split(None, 2)[1])
+        except (IndexError, ValueError):
+            raise ValueError('Bad status line {0!r}'.format(status_line))
+        items[int(content_id.group(1))] = (status_code, body.strip())
+    return items
+
 
 class Google(BaseShortener):
     api_url = 'https://www.googleapis.com/urlshortener/v1/url'
+    batch_url = 'https://www.googleapis.com/batch/urlshortener/v1'
+    batch_limit = 1000
+    domains = ('goo.gl',)
 
     def __init__(self, **kwargs):
         if not kwargs.get('api_key', False):
             raise TypeError('api_key missing from kwargs')
-        self.api_key = kwargs.get('api_key')
+        self.credentials = CredentialPool.of(kwargs.get('api_key'))
+        self.api_key = self.credentials.credentials[0]
         super(Google, self).__init__(**kwargs)
 
     def short(self, url):
         params = json.dumps({'longUrl': url})
         headers = {'content-type': 'application/json'}
-        url = '{0}?key={1}'.format(self.api_url, self.api_key)
-        response = self._post(url, data=params, headers=headers)
+        response = self.credentials.send(lambda api_key: self._post(
+            '{0}?key={1}'.format(self.api_url, api_key), data=params,
+            headers=headers))
         if response.ok:
             try:
                 data = response.json()
@@ -32,12 +83,13 @@ class Google(BaseShortener):
             if 'id' in data:
                 return data['id']
         raise ShorteningErrorException('There was an error shortening this '
-                                       'url - {0}'.format(response.content))
+                                       'url - {0}'.format(response.content),
+                                       status_code=response.status_code)
 
     def expand(self, url):
         params = {'shortUrl': url}
-        url = '{0}?key={1}'.format(self.api_url, self.api_key)
-        response = self._get(url, params=params)
+        response = self.credentials.send(lambda api_key: self._get(
+            '{0}?key={1}'.format(self.api_url, api_key), params=params))
 
         if response.ok:
             try:
@@ -50,4 +102,84 @@ class Google(BaseShortener):
                 return data['longUrl']
         raise ExpandingErrorException('There was an error expanding '
                                       'this url - {0}'.format(
-                                          response.content))
+                                          response.content),
+                                      status_code=response.status_code)
+
+    def _batch(self, requests):
+        """
+        Sends the (method, path, json body) calls of `requests` on one
+        request
+        """
+        boundary = 'batch_{0}'.format(uuid.uuid4().hex)
+        parts = []
+        for position, (method, path, body) in enumerate(requests):
+            lines = ['--' + boundary,
+                     'Content-Type: application/http',
+                     'Content-ID: <item{0}>'.format(position),
+                     '',
+                     '{0} {1} HTTP/1.1'.format(method, path)]
+            if body is None:
+                lines.append('')
+            else:
+                lines += ['Content-Type: application/json', '',
+                          json.dumps(body)]
+            parts.append('\r\n'.join(lines) + '\r\n')
+        data = ''.join(parts) + '--{0}--\r\n'.format(boundary)
+        headers = {'content-type':
+                   'multipart/mixed; boundary={0}'.format(boundary)}
+        return self._post(self.batch_url, data=data.encode('utf-8'),
+                          headers=headers)
+
+    def _many(self, urls, call, field, exception, action):
+        path = urlparse(self.api_url).path
+        results = []
+        for start in range(0, len(urls), self.batch_limit):
+            chunk = urls[start:start + self.batch_limit]
+            response = self.credentials.send(
+                lambda api_key: self._batch([call(path, url, api_key)
+                                             for url in chunk]))
+            if not response.ok:
+                raise exception('There was an error {0} the urls - '
+                                '{1}'.format(action, response.content),
+                                status_code=response.status_code)
+            try:
+                items = _parse_batch_response(response)
+            except ValueError as e:
+                raise exception('There was an error {0} the urls - '
+                                '{1}'.format(action, e),
+                                status_code=response.status_code)
+            for position in range(len(chunk)):
+                status_code, body = items.get(position, (None, ''))
+                try:
+                    data = json.loads(body)
+                except ValueError:
+                    data = {}
+                if status_code and status_code < 300 and field in data:
+                    results.append(data[field])
+                else:
+                    results.append(exception(
+                        'There was an error {0} this url - {1}'.format(
+                            action, body), status_code=status_code))
+        return results
+
+    def short_many(self, urls):
+        """
+        Returns the short urls of `urls` in order, with the exception in
+        place of the failed ones
+        """
+        def call(path, url, api_key):
+            return ('POST', '{0}?key={1}'.format(path, api_key),
+                    {'longUrl': url})
+        return self._many(urls, call, 'id', ShorteningErrorException,
+                          'shortening')
+
+    def expand_many(self, urls):
+        """
+        Returns the expanded urls of `urls` in order, with the exception in
+        place of the failed ones
+        """
+        def call(path, url, api_key):
+            query = urlencode({'shortUrl': url, 'key': api_key})
+            return ('GET', '{0}?{1}'.format(path, query), None)
+        return self._many(urls, call, 'longUrl', ExpandingErrorException,
+                          'expanding')
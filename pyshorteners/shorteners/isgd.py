@@ -2,13 +2,17 @@
 """
 Is.gd shortener implementation
 No config params needed
+Expanding uses is.gd forward lookup, following the short link is only
+the fallback when the lookup is unavailable
 """
 from .base import BaseShortener
-from ..exceptions import ShorteningErrorException
+from ..exceptions import ShorteningErrorException, ExpandingErrorException
 
 
 class Isgd(BaseShortener):
     api_url = 'http://is.gd/create.php'
+    lookup_url = 'https://is.gd/forward.php'
+    domains = ('is.gd',)
 
     def short(self, url):
         params = {
@@ -19,4 +23,23 @@ class Isgd(BaseShortener):
         if response.ok:
             return response.text.strip()
         raise ShorteningErrorException('There was an error shortening this '
-                                       'url - {0}'.format(response.content))
+                                       'url - {0}'.format(response.content),
+                                       status_code=response.status_code)
+
+    def expand(self, url):
+        params = {
+            'format': 'simple',
+            'shorturl': url.rstrip('/').rsplit('/', 1)[-1],
+        }
+        try:
+            response = self._get(self.lookup_url, params=params)
+        except self.requests.exceptions.RequestException:
+            return super(Isgd, self).expand(url)
+        if response.ok:
+            return response.text.strip()
+        error = ExpandingErrorException('There was an error expanding this '
+                                        'url - {0}'.format(response.content),
+                                        status_code=response.status_code)
+        if error.retryable:
+            return super(Isgd, self).expand(url)
+        raise error
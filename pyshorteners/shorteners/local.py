@@ -0,0 +1,105 @@
+# encoding: utf-8
+"""
+Local (offline) shortener implementation
+Allocates sequential base62 codes and keeps the mappings on a store,
+no network calls are made.
+Optional params
+`domain` - base url for the short links. 'http://localhost/' default value
+`store` - a `pyshorteners.stores.BaseStore` instance. A new `MemoryStore`
+is used when missing
+`clicks` - a `pyshorteners.clicks.ClickCounter` feeding the store, its
+unflushed clicks are included on `total_clicks`
+`allocator` - a `pyshorteners.ids.BlockAllocator` handing out the ids,
+required when several processes write to one store. A counter starting
+after the codes already on the store is used when missing. A forked child
+restarts it after the codes of its copy of a process local store, and can
+not shorten new urls on a shared store
+"""
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from .base import BaseShortener
+from .. import forksafe
+from ..exceptions import ExpandingErrorException
+from ..ids import MemoryAllocator
+from ..stores import MemoryStore
+from ..utils import base62_encode
+
+
+class Local(BaseShortener):
+    api_url = 'http://localhost/'
+
+    def __init__(self, **kwargs):
+        self.domain = kwargs.get('domain', self.api_url)
+        if not self.domain.endswith('/'):
+            self.domain += '/'
+        self.domains = (urlparse(self.domain).hostname,)
+        self.store = kwargs.get('store')
+        if self.store is None:
+            self.store = MemoryStore()
+        self.clicks = kwargs.get('clicks')
+        self.allocator = kwargs.get('allocator')
+        if self.allocator is None:
+            self.allocator = MemoryAllocator(len(self.store) + 1)
+            forksafe.register(self)
+        super(Local, self).__init__(**kwargs)
+
+    def _after_fork(self):
+        # the child has its own copy of a process local store, its codes
+        # can not clash with the parent ones
+        if not getattr(self.store, 'shared', True):
+            self.allocator = MemoryAllocator(len(self.store) + 1)
+
+    def _code(self, url):
+        if url.startswith(self.domain):
+            return url[len(self.domain):]
+        return url.rstrip('/').rsplit('/', 1)[-1]
+
+    def short(self, url):
+        code = self.store.get_code(url)
+        if code is None:
+            code = base62_encode(self.allocator.next_id())
+            self.store.set(code, url)
+        return self.domain + code
+
+    def short_many(self, urls):
+        """
+        Returns the short urls of `urls` in order, the ids of the new ones
+        are taken and encoded in one go
+        """
+        codes = [self.store.get_code(url) for url in urls]
+        missing = [position for position, code in enumerate(codes)
+                   if code is None]
+        new_urls = list(OrderedDict.fromkeys(urls[position]
+                                             for position in missing))
+        new_codes = dict(zip(new_urls, self.allocator.codes(len(new_urls))))
+        for url in new_urls:
+            self.store.set(new_codes[url], url)
+        for position in missing:
+            codes[position] = new_codes[urls[position]]
+        return [self.domain + code for code in codes]
+
+    def expand(self, url):
+        expanded = self.store.get(self._code(url))
+        if expanded is None:
+            raise ExpandingErrorException('There was an error expanding this '
+                                          'url - {0} is unknown'.format(url))
+        return expanded
+
+    def expand_many(self, urls):
+        """
+        Returns the expanded urls of `urls` in order, with the exception in
+        place of the unknown ones
+        """
+        results = []
+        for url in urls:
+            try:
+                results.append(self.expand(url))
+            except ExpandingErrorException as e:
+                results.append(e)
+        return results
+
+    def total_clicks(self, url=None):
+        if self.clicks is not None:
+            return self.clicks.total(self._code(url))
+        return self.store.clicks(self._code(url))
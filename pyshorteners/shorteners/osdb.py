@@ -10,6 +10,7 @@ from ..exceptions import ShorteningErrorException
 
 class Osdb(BaseShortener):
     api_url = 'http://osdb.link/'
+    domains = ('osdb.link',)
     p = re.compile(r'(http:\/\/osdb.link\/[a-zA-Z0-9]+)')
 
     def _parse(self, response):
@@ -24,4 +25,5 @@ class Osdb(BaseShortener):
         if response.ok:
             return self._parse(response.text)
         raise ShorteningErrorException('There was an error shortening this '
-                                       'url - {0}'.format(response.content))
+                                       'url - {0}'.format(response.content),
+                                       status_code=response.status_code)
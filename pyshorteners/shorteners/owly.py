@@ -3,24 +3,28 @@
 Ow.ly url shortner api implementation
 Located at: http://ow.ly/api-docs
 Doesnt' need anything from the app
+`api_key` can be a list of keys to rotate
 """
 from .base import BaseShortener
+from ..credentials import CredentialPool
 from ..exceptions import ShorteningErrorException, ExpandingErrorException
 
 
 class Owly(BaseShortener):
     api_url = 'http://ow.ly/api/1.1/url/'
+    domains = ('ow.ly',)
 
     def __init__(self, **kwargs):
         if not kwargs.get('api_key', False):
             raise TypeError('api_key is missing from kwargs')
-        self.api_key = kwargs.get('api_key')
+        self.credentials = CredentialPool.of(kwargs.get('api_key'))
+        self.api_key = self.credentials.credentials[0]
         super(Owly, self).__init__(**kwargs)
 
     def short(self, url):
         shorten_url = '{0}{1}'.format(self.api_url, 'shorten')
-        data = {'apiKey': self.api_key, 'longUrl': url}
-        response = self._get(shorten_url, params=data)
+        response = self.credentials.send(lambda api_key: self._get(
+            shorten_url, params={'apiKey': api_key, 'longUrl': url}))
         if response.ok:
             try:
                 data = response.json()
@@ -29,12 +33,13 @@ class Owly(BaseShortener):
                                                ' this url')
             return data['results']['shortUrl']
         raise ShorteningErrorException('There was an error shortening this '
-                                       'url - {0}'.format(response.content))
+                                       'url - {0}'.format(response.content),
+                                       status_code=response.status_code)
 
     def expand(self, url):
         expand_url = '{0}{1}'.format(self.api_url, 'expand')
-        data = {'apiKey': self.api_key, 'shortUrl': url}
-        response = self._get(expand_url, params=data)
+        response = self.credentials.send(lambda api_key: self._get(
+            expand_url, params={'apiKey': api_key, 'shortUrl': url}))
         if response.ok:
             try:
                 data = response.json()
@@ -43,4 +48,5 @@ class Owly(BaseShortener):
                                               ' this url')
             return data['results']['longUrl']
         raise ExpandingErrorException('There was an error shortening this '
-                                      'url - {0}'.format(response.content))
+                                      'url - {0}'.format(response.content),
+                                      status_code=response.status_code)
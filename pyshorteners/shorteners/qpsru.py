@@ -9,6 +9,7 @@ from ..exceptions import ShorteningErrorException
 
 class Qpsru(BaseShortener):
     api_url = 'http://qps.ru/api'
+    domains = ('qps.ru',)
 
     def short(self, url):
         params = {
@@ -18,4 +19,5 @@ class Qpsru(BaseShortener):
         if response.ok:
             return response.text.strip()
         raise ShorteningErrorException('There was an error shortening this '
-                                       'url - {0}'.format(response.content))
+                                       'url - {0}'.format(response.content),
+                                       status_code=response.status_code)
@@ -10,6 +10,7 @@ from ..exceptions import ShorteningErrorException, ExpandingErrorException
 
 class Readability(BaseShortener):
     api_url = 'http://www.readability.com/api/shortener/v1/urls/'
+    domains = ('rdd.me',)
 
     def short(self, url):
         params = {'url': url}
@@ -23,7 +24,8 @@ class Readability(BaseShortener):
                                                    response.content))
             return data['meta']['rdd_url']
         raise ShorteningErrorException('There was an error shortening this '
-                                       'url - {0}'.format(response.content))
+                                       'url - {0}'.format(response.content),
+                                       status_code=response.status_code)
 
     def expand(self, url):
         url_id = url.split('/')[-1]
@@ -38,4 +40,5 @@ class Readability(BaseShortener):
             return data['meta']['full_url']
         raise ExpandingErrorException('There was an error expanding'
                                       ' this url - {0}'.format(
-                                          response.content))
+                                          response.content),
+                                      status_code=response.status_code)
@@ -9,6 +9,7 @@ from ..exceptions import ShorteningErrorException
 
 class Sentala(BaseShortener):
     api_url = 'http://senta.la/api.php'
+    domains = ('senta.la',)
 
     def short(self, url):
         params = {
@@ -20,4 +21,5 @@ class Sentala(BaseShortener):
         if response.ok:
             return response.text.strip()
         raise ShorteningErrorException('There was an error shortening this '
-                                       'url - {0}'.format(response.content))
+                                       'url - {0}'.format(response.content),
+                                       status_code=response.status_code)
@@ -1,17 +1,43 @@
 """
 TinyURL.com shortener implementation
 No config params needed
+Expanding reads the destination from the tinyurl preview page, following
+the short link is only the fallback when the preview is unavailable
 """
+import re
+from html import unescape
+
 from .base import BaseShortener
-from ..exceptions import ShorteningErrorException
+from ..exceptions import ShorteningErrorException, ExpandingErrorException
 
 
 class Tinyurl(BaseShortener):
     api_url = 'http://tinyurl.com/api-create.php'
+    preview_url = 'https://preview.tinyurl.com/'
+    domains = ('tinyurl.com',)
+    p = re.compile(r'id="redirecturl"\s+href="([^"]+)"')
 
     def short(self, url):
         response = self._get(self.api_url, params=dict(url=url))
         if response.ok:
             return response.text
         raise ShorteningErrorException('There was an error shortening this '
-                                       'url - {0}'.format(response.content))
+                                       'url - {0}'.format(response.content),
+                                       status_code=response.status_code)
+
+    def expand(self, url):
+        preview_url = '{0}{1}'.format(self.preview_url,
+                                      url.rstrip('/').rsplit('/', 1)[-1])
+        try:
+            response = self._get(preview_url)
+        except self.requests.exceptions.RequestException:
+            return super(Tinyurl, self).expand(url)
+        match = self.p.search(response.text) if response.ok else None
+        if match:
+            return unescape(match.group(1))
+        if response.status_code == 404:
+            raise ExpandingErrorException('There was an error expanding this '
+                                          'url - {0}'.format(
+                                              response.content),
+                                          status_code=response.status_code)
+        return super(Tinyurl, self).expand(url)
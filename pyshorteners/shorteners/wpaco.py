@@ -9,6 +9,7 @@ from ..exceptions import ShorteningErrorException
 
 class WPACO(BaseShortener):
     api_url = 'http://wp-a.co/api/'
+    domains = ('wp-a.co',)
 
     def short(self, url):
         params = {
@@ -21,4 +22,5 @@ class WPACO(BaseShortener):
         if response.ok:
             return response.text.strip()
         raise ShorteningErrorException('There was an error shortening this '
-                                       'url - {0}'.format(response.content))
+                                       'url - {0}'.format(response.content),
+                                       status_code=response.status_code)
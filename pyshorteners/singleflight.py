@@ -0,0 +1,91 @@
+# encoding: utf-8
+"""
+Request coalescing
+Concurrent calls sharing a key wait for the first one (the leader) and get
+its result or exception, so only one request reaches the provider.
+"""
+import asyncio
+import threading
+
+from . import forksafe
+from .deadline import outlived, wait
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent calls made from threads
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        forksafe.register(self)
+
+    def _after_fork(self):
+        # calls in flight belong to the parent threads
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            wait(call.done)
+            if outlived(call.error):
+                # the leader ran out of its own time, not of this call's
+                return self.do(key, fn, *args, **kwargs)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def __len__(self):
+        return len(self._calls)
+
+
+class AsyncSingleFlight(object):
+    """
+    Coalesces concurrent calls made from coroutines of the same event loop.
+    `fn` must return an awaitable
+    """
+
+    def __init__(self):
+        self._calls = {}
+        forksafe.register(self)
+
+    def _after_fork(self):
+        self._calls = {}
+
+    async def do(self, key, fn, *args, **kwargs):
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn(*args, **kwargs))
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+        # a cancelled waiter must not cancel the call the others wait on
+        return await asyncio.shield(future)
+
+    def __len__(self):
+        return len(self._calls)
@@ -0,0 +1,11 @@
+# encoding: utf-8
+# flake8: noqa
+from .base import BaseStore
+from .memory import MemoryStore
+from .sqlite import SqliteStore
+from .log import LogStore
+from .compact import CompactStore
+from .bloom import BloomStore
+
+__all__ = ['BaseStore', 'MemoryStore', 'SqliteStore', 'LogStore',
+           'CompactStore', 'BloomStore']
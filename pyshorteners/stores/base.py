@@ -0,0 +1,55 @@
+# encoding: utf-8
+
+from abc import ABCMeta, abstractmethod
+
+
+class BaseStore(object):
+    """
+    Base class for all short code -> url mapping stores
+    """
+
+    __metaclass__ = ABCMeta
+
+    # whether other processes see the mappings, e.g. on a file, instead of
+    # each one keeping its own copy
+    shared = False
+
+    @abstractmethod
+    def get(self, code):
+        """
+        Returns the url stored for `code` or None
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_code(self, url):
+        """
+        Returns the code already assigned to `url` or None
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, code, url):
+        raise NotImplementedError
+
+    def urls(self):
+        """
+        Returns an iterable over the urls stored, each one once
+        """
+        raise NotImplementedError
+
+    def incr_clicks(self, code, amount=1):
+        raise NotImplementedError
+
+    def clicks(self, code):
+        raise NotImplementedError
+
+    @abstractmethod
+    def __len__(self):
+        raise NotImplementedError
+
+    def __contains__(self, code):
+        return self.get(code) is not None
+
+    def close(self):
+        pass
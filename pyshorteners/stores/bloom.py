@@ -0,0 +1,71 @@
+# encoding: utf-8
+"""
+Mapping store wrapper keeping a bloom filter of its urls
+`get_code` of an url the filter never saw answers None without a store
+lookup. An empty filter over a store already holding mappings is filled
+with the store urls. Persist the filter next to the store, since urls set
+without the wrapper are unknown to it.
+"""
+from .base import BaseStore
+from ..bloom import BloomFilter
+
+
+class BloomStore(BaseStore):
+    """
+    `store` - the wrapped mapping store
+    `bloom` - a `pyshorteners.bloom.BloomFilter`, one is created from
+    `capacity`, `error_rate` and `path` by default
+    """
+
+    def __init__(self, store, bloom=None, capacity=1000000, error_rate=0.01,
+                 path=None):
+        self.store = store
+        if bloom is None:
+            bloom = BloomFilter(capacity, error_rate, path)
+        if not len(bloom) and len(store):
+            # otherwise the stored urls would be shortened again
+            bloom.update(store.urls())
+        self.bloom = bloom
+
+    @property
+    def shared(self):
+        return self.store.shared
+
+    def get(self, code):
+        return self.store.get(code)
+
+    def get_code(self, url):
+        if url not in self.bloom:
+            return None
+        return self.store.get_code(url)
+
+    def seen(self, url):
+        """
+        False when `url` was never set, True when it probably was
+        """
+        return url in self.bloom
+
+    def set(self, code, url):
+        self.store.set(code, url)
+        self.bloom.add(url)
+
+    def incr_clicks(self, code, amount=1):
+        self.store.incr_clicks(code, amount)
+
+    def clicks(self, code):
+        return self.store.clicks(code)
+
+    def __len__(self):
+        return len(self.store)
+
+    def __contains__(self, code):
+        return code in self.store
+
+    def flush(self):
+        self.bloom.flush()
+        if hasattr(self.store, 'flush'):
+            self.store.flush()
+
+    def close(self):
+        self.bloom.close()
+        self.store.close()
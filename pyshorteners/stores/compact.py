@@ -0,0 +1,227 @@
+# encoding: utf-8
+"""
+Compact in memory mapping store
+Urls are split into an interned host (`scheme://netloc`), an interned path
+prefix (up to the last `/`) and a suffix. Codes and suffixes are packed on a
+single bytearray and every other field lives on typed arrays, so no python
+object is kept per mapping. Once `max_prefixes` prefixes are interned, urls
+with a new prefix keep it on their suffix, so urls like `/user/<id>/profile`
+do not grow the prefix table with every mapping.
+Writes are serialized by a lock, reads take none.
+"""
+import sys
+import threading
+from array import array
+
+from .base import BaseStore
+from .. import forksafe
+
+_EMPTY = -1
+_MAX_LOAD = 0.7
+
+
+class _ArrayIndex(object):
+    """
+    Open addressing hash table of entry numbers backed by an array
+    """
+
+    def __init__(self, capacity=1024):
+        self.slots = array('q', [_EMPTY]) * capacity
+        self.count = 0
+
+    def _probe(self, key, matches):
+        # the table is read once, it may be replaced by a writer meanwhile
+        slots = self.slots
+        mask = len(slots) - 1
+        position = hash(key) & mask
+        while True:
+            entry = slots[position]
+            if entry == _EMPTY or matches(entry):
+                return position, entry
+            position = (position + 1) & mask
+
+    def find(self, key, matches):
+        """
+        Returns the slot position holding an entry for which
+        `matches(entry)` is true, or the first empty slot position
+        """
+        return self._probe(key, matches)[0]
+
+    def lookup(self, key, matches):
+        """
+        Returns the entry for which `matches(entry)` is true, or `_EMPTY`
+        """
+        return self._probe(key, matches)[1]
+
+    def put(self, position, entry, keys):
+        if self.slots[position] == _EMPTY:
+            self.count += 1
+        self.slots[position] = entry
+        if self.count > len(self.slots) * _MAX_LOAD:
+            self._grow(keys)
+
+    def _grow(self, keys):
+        # `keys(entry)` rebuilds the key of an entry to rehash it. The new
+        # table is filled before readers see it
+        old = self.slots
+        slots = array('q', [_EMPTY]) * (len(old) * 2)
+        mask = len(slots) - 1
+        for entry in old:
+            if entry == _EMPTY:
+                continue
+            position = hash(keys(entry)) & mask
+            while slots[position] != _EMPTY:
+                position = (position + 1) & mask
+            slots[position] = entry
+        self.slots = slots
+
+    def nbytes(self):
+        return self.slots.itemsize * len(self.slots)
+
+
+class CompactStore(BaseStore):
+
+    def __init__(self, max_prefixes=4096):
+        self.max_prefixes = max_prefixes
+        self._lock = threading.Lock()
+        self._hosts = []
+        self._host_ids = {}
+        self._prefixes = []
+        self._prefix_ids = {}
+        self._data = bytearray()
+        self._offsets = array('Q', [0])
+        self._code_sizes = array('B')
+        self._entry_hosts = array('I')
+        self._entry_prefixes = array('I')
+        self._clicks = array('Q')
+        self._by_code = _ArrayIndex()
+        self._by_url = _ArrayIndex()
+        forksafe.register(self)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _intern(value, values, ids):
+        value_id = ids.get(value)
+        if value_id is None:
+            value_id = ids[value] = len(values)
+            values.append(value)
+        return value_id
+
+    @staticmethod
+    def _split(url):
+        start = url.find('://')
+        start = url.find('/', start + 3 if start >= 0 else 0)
+        if start < 0:
+            return url, '', ''
+        cut = url.rfind('/') + 1
+        return url[:start], url[start:cut], url[cut:]
+
+    def _code(self, entry):
+        start = self._offsets[entry]
+        end = start + self._code_sizes[entry]
+        return self._data[start:end].decode('utf-8')
+
+    def _url(self, entry):
+        start = self._offsets[entry] + self._code_sizes[entry]
+        end = self._offsets[entry + 1]
+        return ''.join((self._hosts[self._entry_hosts[entry]],
+                        self._prefixes[self._entry_prefixes[entry]],
+                        self._data[start:end].decode('utf-8')))
+
+    def _code_matches(self, code):
+        return lambda entry: self._code(entry) == code
+
+    def _url_matches(self, url):
+        return lambda entry: self._url(entry) == url
+
+    def _find_code(self, code):
+        return self._by_code.find(code, self._code_matches(code))
+
+    def _find_url(self, url):
+        return self._by_url.find(url, self._url_matches(url))
+
+    def get(self, code):
+        entry = self._by_code.lookup(code, self._code_matches(code))
+        if entry == _EMPTY:
+            return None
+        return self._url(entry)
+
+    def get_code(self, url):
+        entry = self._by_url.lookup(url, self._url_matches(url))
+        if entry == _EMPTY:
+            return None
+        return self._code(entry)
+
+    def set(self, code, url):
+        host, prefix, suffix = self._split(url)
+        code_bytes = code.encode('utf-8')
+        if len(code_bytes) > 255:
+            raise ValueError('Codes are limited to 255 bytes')
+
+        with self._lock:
+            if prefix not in self._prefix_ids and \
+                    len(self._prefixes) >= self.max_prefixes:
+                prefix, suffix = '', prefix + suffix
+            position = self._find_code(code)
+            previous = self._by_code.slots[position]
+            entry = len(self._code_sizes)
+            self._data += code_bytes
+            self._data += suffix.encode('utf-8')
+            self._offsets.append(len(self._data))
+            self._code_sizes.append(len(code_bytes))
+            self._entry_hosts.append(self._intern(host, self._hosts,
+                                                  self._host_ids))
+            self._entry_prefixes.append(self._intern(prefix, self._prefixes,
+                                                     self._prefix_ids))
+            # an overwritten code keeps its clicks, its old entry is left
+            # unused
+            self._clicks.append(0 if previous == _EMPTY
+                                else self._clicks[previous])
+            # readers only find the entry once all its fields are appended
+            self._by_code.put(position, entry, self._code)
+
+            position = self._find_url(url)
+            if self._by_url.slots[position] == _EMPTY:
+                self._by_url.put(position, entry, self._url)
+
+    def urls(self):
+        # the url index holds one entry per url
+        return [self._url(entry) for entry in self._by_url.slots
+                if entry != _EMPTY]
+
+    def incr_clicks(self, code, amount=1):
+        with self._lock:
+            entry = self._by_code.slots[self._find_code(code)]
+            if entry != _EMPTY:
+                self._clicks[entry] += amount
+
+    def clicks(self, code):
+        entry = self._by_code.lookup(code, self._code_matches(code))
+        if entry == _EMPTY:
+            return 0
+        return self._clicks[entry]
+
+    def __len__(self):
+        return self._by_code.count
+
+    def memory_usage(self):
+        """
+        Returns the approximated number of bytes held by the store
+        """
+        size = len(self._data)
+        for values in (self._offsets, self._code_sizes, self._entry_hosts,
+                       self._entry_prefixes, self._clicks):
+            size += values.itemsize * len(values)
+        size += self._by_code.nbytes() + self._by_url.nbytes()
+        for values, ids in ((self._hosts, self._host_ids),
+                            (self._prefixes, self._prefix_ids)):
+            size += sys.getsizeof(values) + sys.getsizeof(ids)
+            size += sum(sys.getsizeof(value) for value in values)
+        return size
+
+    def bytes_per_entry(self):
+        if not len(self):
+            return 0.0
+        return float(self.memory_usage()) / len(self)
@@ -0,0 +1,319 @@
+# encoding: utf-8
+"""
+Append-only log mapping store
+Mappings are appended to `<path>.log` and located through two memory mapped
+open addressing indexes, `<path>.codes.idx` and `<path>.urls.idx`.
+Opening a store only maps the files, so startup time does not depend on the
+number of mappings, and a lookup is one index probe plus one slice of the log.
+Several processes may write to one store: writes hold an exclusive `fcntl`
+lock on `<path>.lock`, on unix hosts, and pick up the indexes grown by the
+other processes.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from .base import BaseStore
+from .. import forksafe
+
+# record: code length, url length, code, url
+_RECORD = struct.Struct('<HI')
+# index header: magic, capacity, count
+_HEADER = struct.Struct('<8sQQ')
+# index slot: key hash, record offset + 1 (0 means empty), counter
+_SLOT = struct.Struct('<QQQ')
+_MAGIC = b'PYSHIDX1'
+_MAX_LOAD = 0.7
+
+
+def _hash(key):
+    digest = hashlib.blake2b(key, digest_size=8).digest()
+    return struct.unpack('<Q', digest)[0]
+
+
+class _HashIndex(object):
+    """
+    Open addressing hash table stored on a memory mapped file
+    """
+
+    def __init__(self, path, capacity=1024):
+        self.path = path
+        if not os.path.exists(path):
+            self._create(path, capacity)
+        self._open()
+
+    @staticmethod
+    def _create(path, capacity):
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, capacity, 0))
+            f.truncate(_HEADER.size + capacity * _SLOT.size)
+
+    def _open(self):
+        with open(self.path, 'r+b') as f:
+            mm = mmap.mmap(f.fileno(), 0)
+            inode = os.fstat(f.fileno()).st_ino
+        magic, capacity, _ = _HEADER.unpack_from(mm, 0)
+        if magic != _MAGIC:
+            raise ValueError('{0} is not a valid index file'.format(self.path))
+        # readers take no lock, so the map, its mask and the file it maps
+        # are published together and read once per lookup
+        self._table = (mm, capacity - 1, inode)
+
+    @property
+    def capacity(self):
+        return self._table[1] + 1
+
+    @property
+    def count(self):
+        # kept on the header, other processes may have added slots
+        return _HEADER.unpack_from(self._table[0], 0)[2]
+
+    def refresh(self):
+        """
+        Maps the index again when another process replaced it by a grown
+        one, returns whether it did
+        """
+        if os.stat(self.path).st_ino == self._table[2]:
+            return False
+        self._open()
+        return True
+
+    def find(self, key_hash, matches):
+        """
+        Returns the position, record offset and counter of the slot holding
+        `key_hash` for which `matches(offset)` is true, or of the first
+        empty slot. Record offsets are stored shifted by one, 0 means empty
+        """
+        mm, mask, _ = self._table
+        position = key_hash & mask
+        while True:
+            start = _HEADER.size + position * _SLOT.size
+            slot_hash, offset, counter = _SLOT.unpack_from(mm, start)
+            if not offset or (slot_hash == key_hash and matches(offset - 1)):
+                return start, offset, counter
+            position = (position + 1) & mask
+
+    # writes run under the store locks, so the map does not change between
+    # `find` and them
+
+    def write(self, start, key_hash, offset, counter=0):
+        mm = self._table[0]
+        is_new = not _SLOT.unpack_from(mm, start)[1]
+        _SLOT.pack_into(mm, start, key_hash, offset + 1, counter)
+        if is_new:
+            count = self.count + 1
+            _HEADER.pack_into(mm, 0, _MAGIC, self.capacity, count)
+            if count > self.capacity * _MAX_LOAD:
+                self._grow()
+
+    def set_counter(self, start, counter):
+        mm = self._table[0]
+        slot_hash, offset, _ = _SLOT.unpack_from(mm, start)
+        _SLOT.pack_into(mm, start, slot_hash, offset, counter)
+
+    def _grow(self):
+        old = self._table[0]
+        capacity = self.capacity * 2
+        mask = capacity - 1
+        tmp_path = self.path + '.tmp'
+        self._create(tmp_path, capacity)
+        with open(tmp_path, 'r+b') as f:
+            new = mmap.mmap(f.fileno(), 0)
+        for position in range(self.capacity):
+            start = _HEADER.size + position * _SLOT.size
+            slot = _SLOT.unpack_from(old, start)
+            if not slot[1]:
+                continue
+            target = slot[0] & mask
+            start = _HEADER.size + target * _SLOT.size
+            while _SLOT.unpack_from(new, start)[1]:
+                target = (target + 1) & mask
+                start = _HEADER.size + target * _SLOT.size
+            _SLOT.pack_into(new, start, *slot)
+        _HEADER.pack_into(new, 0, _MAGIC, capacity, self.count)
+        new.flush()
+        new.close()
+        os.replace(tmp_path, self.path)
+        # readers may still hold the old map, it is released once unused
+        self._open()
+
+    def offsets(self):
+        """
+        Yields the record offsets of the used slots
+        """
+        mm, mask, _ = self._table
+        for position in range(mask + 1):
+            start = _HEADER.size + position * _SLOT.size
+            offset = _SLOT.unpack_from(mm, start)[1]
+            if offset:
+                yield offset - 1
+
+    def flush(self):
+        self._table[0].flush()
+
+    def close(self):
+        self._table[0].close()
+
+
+class LogStore(BaseStore):
+    shared = True
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._lock_file = os.open(path + '.lock', os.O_RDWR | os.O_CREAT,
+                                  0o644)
+        self._log = open(path + '.log', 'a+b')
+        # (map, mapped size) of the log, replaced as a whole
+        self._mapping = (None, 0)
+        self._codes = _HashIndex(path + '.codes.idx')
+        self._urls = _HashIndex(path + '.urls.idx')
+        forksafe.register(self)
+
+    def _after_fork(self):
+        # a flock is shared by the descriptors of one open file, the child
+        # opens its own to exclude the parent
+        self._lock = threading.Lock()
+        os.close(self._lock_file)
+        self._lock_file = os.open(self.path + '.lock', os.O_RDWR)
+
+    @contextmanager
+    def _locked(self):
+        # the thread lock serializes the threads of this process, the file
+        # lock the processes writing to the store
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                self._codes.refresh()
+                self._urls.refresh()
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _view(self, end):
+        # the log only grows, so the map is refreshed when a record
+        # lies past its end
+        mm, mapped = self._mapping
+        if end > mapped:
+            mm = mmap.mmap(self._log.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapping = (mm, len(mm))
+        return mm
+
+    def _record(self, offset):
+        mm = self._view(offset + _RECORD.size)
+        code_size, url_size = _RECORD.unpack_from(mm, offset)
+        start = offset + _RECORD.size
+        mm = self._view(start + code_size + url_size)
+        return start, code_size, url_size, mm
+
+    def _code_matches(self, key):
+        def matches(offset):
+            start, code_size, _, mm = self._record(offset)
+            return mm[start:start + code_size] == key
+        return matches
+
+    def _url_matches(self, key):
+        def matches(offset):
+            start, code_size, url_size, mm = self._record(offset)
+            start += code_size
+            return mm[start:start + url_size] == key
+        return matches
+
+    def _find_code(self, code):
+        key = code.encode('utf-8')
+        key_hash = _hash(key)
+        return (key_hash,) + self._codes.find(key_hash,
+                                              self._code_matches(key))
+
+    def _find_url(self, url):
+        key = url.encode('utf-8')
+        key_hash = _hash(key)
+        return (key_hash,) + self._urls.find(key_hash,
+                                             self._url_matches(key))
+
+    @staticmethod
+    def _lookup(find, index, key):
+        # another process may have grown the index since it was mapped
+        found = find(key)
+        if not found[2] and index.refresh():
+            found = find(key)
+        return found
+
+    def get(self, code):
+        offset = self._lookup(self._find_code, self._codes, code)[2]
+        if not offset:
+            return None
+        start, code_size, url_size, mm = self._record(offset - 1)
+        start += code_size
+        return mm[start:start + url_size].decode('utf-8')
+
+    def get_code(self, url):
+        offset = self._lookup(self._find_url, self._urls, url)[2]
+        if not offset:
+            return None
+        start, code_size, _, mm = self._record(offset - 1)
+        return mm[start:start + code_size].decode('utf-8')
+
+    def set(self, code, url):
+        code_key = code.encode('utf-8')
+        url_key = url.encode('utf-8')
+        header = _RECORD.pack(len(code_key), len(url_key))
+        with self._locked():
+            # the log is shared, the record lands at its current end
+            offset = self._log.seek(0, os.SEEK_END)
+            self._log.write(header + code_key + url_key)
+            self._log.flush()
+
+            code_hash, slot, _, clicks = self._find_code(code)
+            self._codes.write(slot, code_hash, offset, clicks)
+
+            url_hash, slot, known, _ = self._find_url(url)
+            if not known:
+                self._urls.write(slot, url_hash, offset)
+
+    def urls(self):
+        self._urls.refresh()
+        for offset in self._urls.offsets():
+            start, code_size, url_size, mm = self._record(offset)
+            start += code_size
+            yield mm[start:start + url_size].decode('utf-8')
+
+    def incr_clicks(self, code, amount=1):
+        with self._locked():
+            _, slot, offset, clicks = self._find_code(code)
+            if offset:
+                self._codes.set_counter(slot, clicks + amount)
+
+    def clicks(self, code):
+        return self._lookup(self._find_code, self._codes, code)[3]
+
+    def __len__(self):
+        with self._lock:
+            self._codes.refresh()
+        return self._codes.count
+
+    def flush(self):
+        with self._lock:
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._codes.flush()
+            self._urls.flush()
+
+    def close(self):
+        self.flush()
+        self._codes.close()
+        self._urls.close()
+        if self._mapping[0] is not None:
+            self._mapping[0].close()
+        self._log.close()
+        os.close(self._lock_file)
@@ -0,0 +1,36 @@
+# encoding: utf-8
+"""
+In memory mapping store
+Nothing is persisted, mappings live as long as the store instance
+"""
+from .base import BaseStore
+
+
+class MemoryStore(BaseStore):
+
+    def __init__(self):
+        self._urls = {}
+        self._codes = {}
+        self._clicks = {}
+
+    def get(self, code):
+        return self._urls.get(code)
+
+    def get_code(self, url):
+        return self._codes.get(url)
+
+    def set(self, code, url):
+        self._urls[code] = url
+        self._codes.setdefault(url, code)
+
+    def urls(self):
+        return list(self._codes)
+
+    def incr_clicks(self, code, amount=1):
+        self._clicks[code] = self._clicks.get(code, 0) + amount
+
+    def clicks(self, code):
+        return self._clicks.get(code, 0)
+
+    def __len__(self):
+        return len(self._urls)
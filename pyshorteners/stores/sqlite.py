@@ -0,0 +1,92 @@
+# encoding: utf-8
+"""
+SQLite backed mapping store
+Needs a `path` to the database file, ':memory:' is accepted
+"""
+import sqlite3
+import threading
+
+from .base import BaseStore
+from .. import forksafe
+
+
+class SqliteStore(BaseStore):
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connect()
+        self._conn.execute('CREATE TABLE IF NOT EXISTS links ('
+                           'code TEXT PRIMARY KEY, '
+                           'url TEXT NOT NULL, '
+                           'clicks INTEGER NOT NULL DEFAULT 0)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS links_url '
+                           'ON links (url)')
+
+    @property
+    def shared(self):
+        return self.path != ':memory:'
+
+    def _connect(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False,
+                                     isolation_level=None)
+        if self.path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+        forksafe.register(self)
+
+    def _after_fork(self):
+        # sqlite connections must not cross a fork, the inherited one is
+        # left alone and a new one is opened. An in memory database can
+        # not be shared, the child keeps its copy
+        self._lock = threading.Lock()
+        if self.path != ':memory:':
+            self._connect()
+
+    def _fetchone(self, query, params):
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+        return row[0] if row else None
+
+    def get(self, code):
+        return self._fetchone('SELECT url FROM links WHERE code = ?',
+                              (code,))
+
+    def get_code(self, url):
+        return self._fetchone('SELECT code FROM links WHERE url = ? '
+                              'LIMIT 1', (url,))
+
+    def set(self, code, url):
+        """
+        Raises ValueError when `code` is already mapped to another url,
+        e.g. by a process leasing the same ids
+        """
+        with self._lock:
+            self._conn.execute('INSERT INTO links (code, url) VALUES (?, ?) '
+                               'ON CONFLICT (code) DO NOTHING', (code, url))
+            row = self._conn.execute('SELECT url FROM links WHERE code = ?',
+                                     (code,)).fetchone()
+        if row[0] != url:
+            raise ValueError('Code {0} is already mapped to {1}'.format(
+                code, row[0]))
+
+    def urls(self):
+        with self._lock:
+            rows = self._conn.execute('SELECT DISTINCT url FROM links')
+            return [row[0] for row in rows.fetchall()]
+
+    def incr_clicks(self, code, amount=1):
+        with self._lock:
+            self._conn.execute('UPDATE links SET clicks = clicks + ? '
+                               'WHERE code = ?', (amount, code))
+
+    def clicks(self, code):
+        return self._fetchone('SELECT clicks FROM links WHERE code = ?',
+                              (code,)) or 0
+
+    def __len__(self):
+        return self._fetchone('SELECT COUNT(*) FROM links', ())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,222 @@
+# encoding: utf-8
+"""
+Scan resistant cache backend (W-TinyLFU)
+New entries land on a small window LRU. An entry leaving the window only
+enters the main cache when a count-min sketch says it was requested more
+often than the entries it would evict, so one-off urls of a bulk job do not
+flush the hot ones. The main cache is a segmented LRU: entries hit again
+move from probation to the protected segment.
+
+Budgets are in bytes of the stored keys and urls, not in entries.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from . import forksafe
+from .cache import BaseCache
+
+_SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9,
+          0xD6E8FEB86659FD93)
+_MASK64 = (1 << 64) - 1
+# counters saturate at 15, like 4 bit counters
+_MAX_COUNT = 15
+
+
+class CountMinSketch(object):
+    """
+    Approximate request counts on `depth` rows of `width` counters. Every
+    counter is halved after `10 * width` additions, so old popularity fades
+    """
+
+    def __init__(self, width=1024, depth=4):
+        width = 1 << max(width - 1, 1).bit_length()
+        self._rows = [bytearray(width) for _ in range(depth)]
+        self._seeds = _SEEDS[:depth]
+        self._mask = width - 1
+        self.sample = 10 * width
+        self._additions = 0
+
+    def _indexes(self, key):
+        key_hash = hash(key) & _MASK64
+        for seed in self._seeds:
+            mixed = (key_hash ^ seed) * 0xFF51AFD7ED558CCD & _MASK64
+            yield (mixed >> 32) & self._mask
+
+    def add(self, key):
+        indexes = list(self._indexes(key))
+        counts = [row[index] for row, index in zip(self._rows, indexes)]
+        lowest = min(counts)
+        if lowest < _MAX_COUNT:
+            # conservative update: only the lowest counters grow
+            for row, index, count in zip(self._rows, indexes, counts):
+                if count == lowest:
+                    row[index] = count + 1
+        self._additions += 1
+        if self._additions >= self.sample:
+            self._age()
+
+    def _age(self):
+        self._rows = [bytearray(count >> 1 for count in row)
+                      for row in self._rows]
+        self._additions //= 2
+
+    def estimate(self, key):
+        return min(row[index]
+                   for row, index in zip(self._rows, self._indexes(key)))
+
+
+def _weight(key, value):
+    if isinstance(key, tuple):
+        return sum(len(part) for part in key) + len(value)
+    return len(key) + len(value)
+
+
+class TinyLFUCache(BaseCache):
+    """
+    `maxbytes` - bytes of keys and values the cache holds, 16MB default
+    value
+    `window` - share of `maxbytes` given to the window LRU, 0.01 default
+    value
+    `protected` - share of the main cache given to its protected segment,
+    0.8 default value
+    """
+
+    def __init__(self, maxbytes=16 * 1024 * 1024, window=0.01,
+                 protected=0.8):
+        self.maxbytes = maxbytes
+        self._window_budget = max(1, int(maxbytes * window))
+        self._main_budget = maxbytes - self._window_budget
+        self._protected_budget = int(self._main_budget * protected)
+        # about one counter per 64 bytes entry
+        self.sketch = CountMinSketch(max(1024, maxbytes // 64))
+        self._window = OrderedDict()
+        self._probation = OrderedDict()
+        self._protected = OrderedDict()
+        self._sizes = {'window': 0, 'probation': 0, 'protected': 0}
+        # key: (segment name, weight)
+        self._entries = {}
+        self._expires = {}
+        self._lock = threading.Lock()
+        forksafe.register(self)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+
+    def _segment(self, name):
+        return getattr(self, '_' + name)
+
+    def _insert(self, name, key, value, weight):
+        self._segment(name)[key] = value
+        self._sizes[name] += weight
+        self._entries[key] = (name, weight)
+
+    def _remove(self, key):
+        name, weight = self._entries.pop(key)
+        self._sizes[name] -= weight
+        self._expires.pop(key, None)
+        return self._segment(name).pop(key)
+
+    def _move(self, key, name):
+        current, weight = self._entries[key]
+        self._sizes[current] -= weight
+        self._insert(name, key, self._segment(current).pop(key), weight)
+
+    @property
+    def size(self):
+        """
+        Bytes of keys and values held
+        """
+        return sum(self._sizes.values())
+
+    def get(self, key, default=None):
+        with self._lock:
+            self.sketch.add(key)
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if key in self._expires and self._expires[key] < time.time():
+                self._remove(key)
+                return default
+            name = entry[0]
+            if name == 'probation':
+                self._promote(key)
+            else:
+                self._segment(name).move_to_end(key)
+            return self._segment(self._entries[key][0])[key]
+
+    def _promote(self, key):
+        self._move(key, 'protected')
+        while self._sizes['protected'] > self._protected_budget:
+            self._move(next(iter(self._protected)), 'probation')
+
+    def set(self, key, value, ttl=None):
+        weight = _weight(key, value)
+        with self._lock:
+            self.sketch.add(key)
+            if key in self._entries:
+                name = self._entries[key][0]
+                self._remove(key)
+            else:
+                name = 'window'
+            if weight > self._main_budget:
+                return
+            self._insert(name, key, value, weight)
+            if ttl is not None:
+                self._expires[key] = time.time() + ttl
+            self._evict()
+
+    def _evict(self):
+        while self._sizes['window'] > self._window_budget:
+            candidate = next(iter(self._window))
+            if self._admit(candidate, self._entries[candidate][1]):
+                self._move(candidate, 'probation')
+            else:
+                self._remove(candidate)
+        while self._sizes['probation'] + self._sizes['protected'] > \
+                self._main_budget:
+            # an updated entry grew past the budget
+            segment = self._probation or self._protected
+            self._remove(next(iter(segment)))
+
+    def _admit(self, candidate, weight):
+        """
+        Makes room for `candidate` on the main cache when it is requested
+        more often than each entry it would evict
+        """
+        used = self._sizes['probation'] + self._sizes['protected']
+        free = self._main_budget - used
+        victims = []
+        for segment in (self._probation, self._protected):
+            for key in segment:
+                if free >= weight:
+                    break
+                victims.append(key)
+                free += self._entries[key][1]
+        if victims:
+            frequency = self.sketch.estimate(candidate)
+            if any(self.sketch.estimate(key) >= frequency
+                   for key in victims):
+                return False
+            for key in victims:
+                self._remove(key)
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            for name in self._sizes:
+                self._segment(name).clear()
+                self._sizes[name] = 0
+            self._entries.clear()
+            self._expires.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
@@ -1,22 +1,112 @@
 # coding: utf-8
 
 import re
+import string
+from urllib.parse import (urlparse, urlsplit, urlunsplit, parse_qsl,
+                          urlencode)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443, 'ftp': 21}
+
+BASE62_ALPHABET = string.digits + string.ascii_letters
+_BASE62_INDEX = dict((char, index) for index, char
+                     in enumerate(BASE62_ALPHABET))
+
+URL_REGEX = re.compile(
+    r'^(?:http|ftp)s?://'  # http:// or https://
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?'
+    r'|[A-Z0-9-]{2,}\.?)|'  # domain...
+    r'localhost|'  # localhost...
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}|'  # ...or ipv4
+    r'\[?[A-F0-9]*:[A-F0-9:]+\]?)'  # ...or ipv6
+    r'(?::\d+)?'  # optional port
+    r'(?:/?|[/?]\S+)$', re.IGNORECASE)
 
 
 def is_valid_url(url):
     """
     Validates URL input
     """
-    regex = re.compile(
-        r'^(?:http|ftp)s?://'  # http:// or https://
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+(?:[A-Z]{2,6}\.?'
-        r'|[A-Z0-9-]{2,}\.?)|'  # domain...
-        r'localhost|'  # localhost...
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}|'  # ...or ipv4
-        r'\[?[A-F0-9]*:[A-F0-9:]+\]?)'  # ...or ipv6
-        r'(?::\d+)?'  # optional port
-        r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-
-    if regex.search(url):
+    if URL_REGEX.search(url):
         return True
     return False
+
+
+def url_host(url):
+    """
+    Returns the lowercase host of `url` without a leading `www.`
+    """
+    host = (urlparse(url).hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    return host
+
+
+def canonicalize_url(url):
+    """
+    Returns the canonical form of `url`, the same for the spellings of one
+    destination: lowercase scheme and host, no default port, `/` for an
+    empty path, sorted query params and no fragment
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if ':' in host:
+        host = '[{0}]'.format(host)
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = '{0}:{1}'.format(host, parts.port)
+    if parts.username:
+        credentials = parts.username
+        if parts.password:
+            credentials += ':' + parts.password
+        host = '{0}@{1}'.format(credentials, host)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or '/', query, ''))
+
+
+def base62_encode(number):
+    """
+    Encodes a non negative integer as a base62 string
+    """
+    if number < 0:
+        raise ValueError('Only non negative numbers can be encoded')
+    if number < 62:
+        return BASE62_ALPHABET[number]
+    chars = []
+    while number:
+        number, remainder = divmod(number, 62)
+        chars.append(BASE62_ALPHABET[remainder])
+    return ''.join(reversed(chars))
+
+
+def base62_encode_range(start, stop):
+    """
+    Encodes the integers from `start` to `stop` (excluded) as base62
+    strings. Numbers sharing all but their last digit are encoded together
+    """
+    if start < 0:
+        raise ValueError('Only non negative numbers can be encoded')
+    codes = []
+    number = start
+    while number < stop:
+        prefix, digit = divmod(number, 62)
+        end = min(stop, (prefix + 1) * 62)
+        head = base62_encode(prefix) if prefix else ''
+        codes.extend([head + char for char in
+                      BASE62_ALPHABET[digit:digit + end - number]])
+        number = end
+    return codes
+
+
+def base62_decode(code):
+    """
+    Decodes a base62 string back to its integer value
+    """
+    if not code:
+        raise ValueError('Cannot decode an empty code')
+    number = 0
+    try:
+        for char in code:
+            number = number * 62 + _BASE62_INDEX[char]
+    except KeyError:
+        raise ValueError('{0} is not a valid base62 code'.format(code))
+    return number
@@ -18,11 +18,13 @@ setup(
         'Development Status :: 5 - Production/Stable',
         'Intended Audience :: Developers',
         'Operating System :: OS Independent',
-        'Programming Language :: Python :: 2',
         'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
         'Topic :: Internet :: WWW/HTTP :: Dynamic Content',
         'Topic :: Software Development :: Libraries :: Python Modules',
     ],
+    python_requires='>=3.7',
     install_requires=['requests', ],
+    extras_require={'redis': ['redis']},
     packages=find_packages(exclude=['*tests*']),
 )
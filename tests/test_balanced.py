@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import time
+
+from pyshorteners import Shortener, Shorteners
+from pyshorteners.exceptions import (ConcurrencyLimitException,
+                                     DeadlineExceededException,
+                                     ShorteningErrorException)
+from pyshorteners.shorteners import Balanced, Local
+from pyshorteners.shorteners.base import BaseShortener
+
+import pytest
+import responses
+
+expanded = 'http://www.test.com'
+
+
+class Failing(BaseShortener):
+    def short(self, url):
+        raise ShorteningErrorException('error', status_code=500)
+
+
+class Refusing(BaseShortener):
+    def short(self, url):
+        raise ShorteningErrorException('bad url', status_code=400)
+
+
+def test_balanced_default_pool():
+    s = Shortener(Shorteners.BALANCED)
+    engine = s.client.engine
+    assert sorted(engine.selections) == ['Clckru', 'Dagd', 'Isgd', 'Qpsru',
+                                         'Tinyurl']
+    assert 'tinyurl.com' in engine.domains
+
+
+def test_balanced_fails_over_and_learns():
+    local = Local()
+    engine = Balanced(engines=[Failing(), local], exploration=0.0, timeout=1)
+    for i in range(50):
+        assert engine.short('{0}/{1}'.format(expanded, i)).startswith(
+            'http://localhost/')
+
+    # every call succeeded on Local, Failing got picked less and less
+    assert engine.selections['Local'] == 50
+    assert engine.selections['Failing'] < 25
+    assert engine.stats['Failing'].error_rate > 0
+    assert engine.stats['Local'].error_rate == 0.0
+
+
+class SlowLocal(Local):
+    def short(self, url):
+        time.sleep(0.01)
+        return super(SlowLocal, self).short(url)
+
+
+def test_balanced_fast_failures_do_not_look_fast():
+    engine = Balanced(engines=[Failing(), SlowLocal()], exploration=0.0)
+    for i in range(50):
+        engine.short('{0}/{1}'.format(expanded, i))
+
+    assert engine.stats['Failing'].latency == 0.1
+    assert engine.stats['Failing'].score > engine.stats['SlowLocal'].score
+    assert engine.selections['Failing'] < 10
+
+
+class Full(BaseShortener):
+    def short(self, url):
+        raise ConcurrencyLimitException('full')
+
+
+class OutOfTime(BaseShortener):
+    def short(self, url):
+        raise DeadlineExceededException('late')
+
+
+def test_balanced_limiter_and_deadline_errors_are_not_recorded():
+    engine = Balanced(engines=[Full(), Local()], routing='hash')
+    for i in range(10):
+        engine.short('{0}/{1}'.format(expanded, i))
+    assert engine.selections['Full'] == 0
+    assert engine.stats['Full'].error_rate == 0.0
+
+    engine = Balanced(engines=[OutOfTime(), Local()], exploration=1.0)
+    with pytest.raises(DeadlineExceededException):
+        for i in range(20):
+            engine.short('{0}/{1}'.format(expanded, i))
+    assert engine.selections['OutOfTime'] == 0
+
+
+def test_balanced_non_retryable_errors_do_not_fail_over():
+    local = Local()
+    engine = Balanced(engines=[Refusing(), local], routing='hash')
+    urls = ['{0}/{1}'.format(expanded, i) for i in range(20)]
+    refused = 0
+    for url in urls:
+        try:
+            engine.short(url)
+        except ShorteningErrorException as e:
+            assert e.status_code == 400
+            refused += 1
+    assert 0 < refused < len(urls)
+    assert engine.stats['Refusing'].error_rate == 0.0
+    assert len(local.store) == len(urls) - refused
+
+
+def test_balanced_exploration_keeps_picking_every_engine():
+    engine = Balanced(engines=[Failing(), Local()], exploration=1.0)
+    engine.stats['Failing'].error_rate = 1.0
+    for i in range(50):
+        engine.short('{0}/{1}'.format(expanded, i))
+    assert engine.selections['Failing'] > 5
+
+
+def test_balanced_raises_when_every_engine_fails():
+    engine = Balanced(engines=[Failing()])
+    with pytest.raises(ShorteningErrorException):
+        engine.short(expanded)
+
+
+@responses.activate
+def test_balanced_expand_routes_by_host():
+    responses.add(responses.GET, 'https://da.gd/coshorten/abc',
+                  body=expanded)
+    engine = Balanced(timeout=1)
+    assert engine.expand('http://da.gd/abc') == expanded
+    assert engine.selections['Dagd'] == 1
+
+
+def test_balanced_hash_routing_is_sticky():
+    engines = [Local(domain='http://a/'), Local(domain='http://b/'),
+               Local(domain='http://c/')]
+    engine = Balanced(engines=engines, routing='hash')
+    assert sorted(engine.stats) == ['Local#0', 'Local#1', 'Local#2']
+    urls = ['{0}/{1}'.format(expanded, i) for i in range(60)]
+    hosts = [engine.short(url)[:9] for url in urls]
+    assert sorted(set(hosts)) == ['http://a/', 'http://b/', 'http://c/']
+
+    # other spellings of an url go to the same engine
+    for url, host in zip(urls, hosts):
+        spelling = url.replace(expanded, 'HTTP://WWW.Test.com:80') + '#top'
+        assert engine.short(spelling)[:9] == host
+
+    with pytest.raises(TypeError):
+        Balanced(engines=engines, routing='random')
+
+
+def test_balanced_named_engines():
+    engines = [Local(domain='http://a/'), Local(domain='http://b/')]
+    engine = Balanced(engines={'a': engines[0], 'b': engines[1]})
+    engine.short(expanded)
+    assert sorted(engine.selections) == ['a', 'b']
+    assert sum(engine.selections.values()) == 1
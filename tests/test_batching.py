@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import threading
+import time
+
+from pyshorteners.batching import MicroBatcher
+from pyshorteners.client import Client
+from pyshorteners.exceptions import ExpandingErrorException
+from pyshorteners.shorteners import Local
+
+import pytest
+
+
+def _run_threads(target, count):
+    results = [None] * count
+
+    def work(number):
+        try:
+            results[number] = target(number)
+        except Exception as e:
+            results[number] = e
+
+    threads = [threading.Thread(target=work, args=(number,))
+               for number in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_micro_batcher_groups_calls():
+    batches = []
+
+    def double(items):
+        batches.append(items)
+        return [item * 2 if item != 7 else ValueError('seven')
+                for item in items]
+
+    batcher = MicroBatcher(double, max_size=100, max_delay=0.05)
+    results = _run_threads(batcher.submit, 20)
+    assert [result for number, result in enumerate(results)
+            if number != 7] == [number * 2 for number in range(20)
+                                if number != 7]
+    assert isinstance(results[7], ValueError)
+    assert len(batches) < 5
+
+
+def test_micro_batcher_max_size_and_delay():
+    batches = []
+
+    def identity(items):
+        batches.append(len(items))
+        return items
+
+    batcher = MicroBatcher(identity, max_size=5, max_delay=1)
+    start = time.time()
+    assert _run_threads(batcher.submit, 10) == list(range(10))
+    # full batches do not wait for the delay
+    assert time.time() - start < 0.5
+    assert sorted(batches) == [5, 5]
+
+    batcher = MicroBatcher(identity, max_delay=0.01)
+    start = time.time()
+    assert batcher.submit('a') == 'a'
+    assert 0.01 <= time.time() - start < 0.5
+
+
+def test_micro_batcher_failing_batch():
+    def fail(items):
+        raise ValueError('down')
+
+    batcher = MicroBatcher(fail, max_delay=0.01)
+    with pytest.raises(ValueError):
+        batcher.submit(1)
+
+
+class CountingLocal(Local):
+
+    def __init__(self, **kwargs):
+        super(CountingLocal, self).__init__(**kwargs)
+        self.batches = []
+
+    def expand_many(self, urls):
+        self.batches.append(len(urls))
+        return super(CountingLocal, self).expand_many(urls)
+
+
+def test_client_batches_single_calls():
+    engine = CountingLocal()
+    shorts = engine.short_many(['http://www.test.com/{0}'.format(i)
+                                for i in range(30)])
+    client = Client(engine, batch_delay=0.05)
+
+    def expand(number):
+        if number == 29:
+            return client.expand('http://localhost/unknown')
+        return client.expand(shorts[number])
+
+    results = _run_threads(expand, 30)
+    assert results[:29] == ['http://www.test.com/{0}'.format(i)
+                            for i in range(29)]
+    assert isinstance(results[29], ExpandingErrorException)
+    assert sum(engine.batches) == 30
+    assert len(engine.batches) < 10
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# encoding: utf-8
+from pyshorteners.bloom import BloomFilter
+
+import pytest
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=10000, error_rate=0.01)
+    urls = ['http://www.test.com/{0}'.format(i) for i in range(10000)]
+    bloom.update(urls)
+    assert all(url in bloom for url in urls)
+    assert len(bloom) == 10000
+
+
+def test_bloom_filter_error_rate():
+    bloom = BloomFilter(capacity=10000, error_rate=0.01)
+    bloom.update('http://www.test.com/{0}'.format(i) for i in range(10000))
+    false_positives = sum(1 for i in range(10000)
+                          if 'http://www.other.com/{0}'.format(i) in bloom)
+    assert false_positives < 200
+    assert 0.005 < bloom.error_rate < 0.015
+
+    with pytest.raises(ValueError):
+        BloomFilter(error_rate=1)
+
+
+def test_bloom_filter_persists(tmpdir):
+    path = str(tmpdir.join('urls.bloom'))
+    bloom = BloomFilter(capacity=1000, error_rate=0.001, path=path)
+    bloom.add('http://www.test.com')
+    bits, hashes = bloom.bits, bloom.hashes
+    bloom.close()
+
+    # the stored sizing wins over the arguments
+    bloom = BloomFilter(capacity=10, path=path)
+    assert (bloom.bits, bloom.hashes) == (bits, hashes)
+    assert 'http://www.test.com' in bloom
+    assert 'http://www.test2.com' not in bloom
+    assert len(bloom) == 1
+    bloom.close()
+
+    with open(path, 'r+b') as f:
+        f.write(b'INVALID!')
+    with pytest.raises(ValueError):
+        BloomFilter(path=path)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import time
+
+from pyshorteners import Shortener, Shorteners
+from pyshorteners.cache import LRUCache, NegativeCache, RedisCache
+from pyshorteners.client import Client
+from pyshorteners.exceptions import (ShorteningErrorException,
+                                     ExpandingErrorException)
+
+import responses
+import pytest
+
+expanded = 'http://www.test.com'
+shorten = 'http://tinyurl.com/qndjkl'
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert 'b' not in cache
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+
+
+def test_negative_cache_ttl():
+    cache = NegativeCache(ttl=0.05)
+    cache.set('a', ShorteningErrorException('error', status_code=400))
+    with pytest.raises(ShorteningErrorException) as e:
+        cache.raise_for('a')
+    assert e.value.status_code == 400
+
+    time.sleep(0.06)
+    cache.raise_for('a')
+    assert 'a' not in cache
+
+
+def test_negative_cache_skips_retryable_errors():
+    cache = NegativeCache()
+    cache.set('a', ShorteningErrorException('error', status_code=503))
+    cache.set('b', ShorteningErrorException('error', status_code=429))
+    cache.set('c', ExpandingErrorException('error'))
+    assert len(cache) == 0
+
+
+@responses.activate
+def test_shortener_negative_cache():
+    s = Shortener(Shorteners.TINYURL, negative_cache=NegativeCache(ttl=60))
+    responses.add(responses.GET, s.api_url, body='blocked', status=400)
+
+    for _ in range(3):
+        with pytest.raises(ShorteningErrorException):
+            s.short(expanded)
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_shortener_negative_cache_server_errors():
+    s = Shortener(Shorteners.TINYURL, negative_cache=NegativeCache(ttl=60))
+    responses.add(responses.GET, s.api_url, body='down', status=502)
+
+    for _ in range(3):
+        with pytest.raises(ShorteningErrorException):
+            s.short(expanded)
+    assert len(responses.calls) == 3
+
+
+def test_lru_cache_ttl_and_batches():
+    cache = LRUCache()
+    cache.set_many([(('expand', 'a'), '1'), (('expand', 'b'), '2')], ttl=0.05)
+    cache.set(('expand', 'c'), '3')
+    assert cache.get_many([('expand', 'a'), ('expand', 'c'),
+                           ('expand', 'd')]) == ['1', '3', None]
+
+    time.sleep(0.06)
+    assert cache.get(('expand', 'a')) is None
+    assert cache.get(('expand', 'c')) == '3'
+
+
+def test_redis_cache():
+    fakeredis = pytest.importorskip('fakeredis')
+    client = fakeredis.FakeRedis()
+    cache = RedisCache(client)
+    cache.set_many([(('short', 'Tinyurl', expanded), shorten),
+                    (('expand', shorten), expanded)], ttl=60)
+    assert cache.get_many([('short', 'Tinyurl', expanded),
+                           ('expand', shorten),
+                           ('expand', 'http://unknown')]) == \
+        [shorten, expanded, None]
+    assert client.ttl('pyshorteners:expand:' + shorten) == 60
+
+    cache.delete(('expand', shorten))
+    assert cache.get(('expand', shorten)) is None
+    assert cache.get_many([]) == []
+
+
+@responses.activate
+def test_nodes_share_redis_cache():
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fakeredis.FakeServer()
+    nodes = [Shortener(Shorteners.TINYURL,
+                       cache=RedisCache(fakeredis.FakeRedis(server=server)))
+             for _ in range(3)]
+    responses.add(responses.GET, nodes[0].api_url, body=shorten)
+
+    for node in nodes:
+        assert node.short(expanded) == shorten
+        assert node.expand(shorten) == expanded
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_client_many_uses_cache_batches():
+    cache = LRUCache()
+    client = Client(Shorteners.TINYURL, cache=cache)
+    responses.add(responses.GET, client.api_url, body=shorten)
+    cache.set(('short', 'Tinyurl', 'http://www.test.com/1'), 'http://cached')
+
+    results = client.short_many([expanded, 'http://www.test.com/1', 'bad'])
+    assert results[:2] == [shorten, 'http://cached']
+    assert isinstance(results[2], ValueError)
+    assert len(responses.calls) == 1
+    assert cache.get(('expand', shorten)) == expanded
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import threading
+
+from pyshorteners import Shortener, Shorteners
+from pyshorteners.clicks import ClickCounter
+from pyshorteners.stores import MemoryStore
+
+
+def test_click_counter_threads():
+    store = MemoryStore()
+    counter = ClickCounter(store, interval=None)
+
+    def click():
+        for _ in range(1000):
+            counter.incr('a')
+
+    threads = [threading.Thread(target=click) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert store.clicks('a') == 0
+    assert counter.total('a') == 8000
+    counter.flush()
+    assert store.clicks('a') == 8000
+    assert counter.total('a') == 8000
+
+    counter.incr('a', 5)
+    counter.flush()
+    counter.flush()
+    assert store.clicks('a') == 8005
+
+
+def test_click_counter_drops_idle_codes_and_exited_threads():
+    store = MemoryStore()
+    counter = ClickCounter(store, interval=None)
+
+    def click():
+        for i in range(1000):
+            counter.incr(str(i))
+
+    thread = threading.Thread(target=click)
+    thread.start()
+    thread.join()
+    counter.incr('a', 2)
+    counter.incr('b')
+    counter.flush()
+
+    assert store.clicks('999') == 1
+    assert len(counter._threads) == 1
+    slot = counter._threads[0]
+
+    # `b` is not clicked over the next interval, `a` is
+    counter.incr('a')
+    counter.flush()
+    assert slot.idle == ['b']
+    counter.incr('a')
+    assert slot.counts == {'a': 4}
+    assert counter.total('a') == 4
+    assert counter.total('b') == 1
+    counter.flush()
+    assert store.clicks('a') == 4
+
+    counter.incr('b')
+    counter.flush()
+    assert store.clicks('b') == 2
+
+
+def test_click_counter_loses_no_clicks_while_flushing():
+    store = MemoryStore()
+    counter = ClickCounter(store, interval=0.001)
+
+    def click():
+        for i in range(20000):
+            counter.incr(str(i % 3))
+
+    threads = [threading.Thread(target=click) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.stop()
+    assert sum(store.clicks(str(i)) for i in range(3)) == 8 * 20000
+
+
+def test_click_counter_background_flush():
+    store = MemoryStore()
+    counter = ClickCounter(store, interval=0.01)
+    counter.incr('a')
+    counter.stop()
+    assert store.clicks('a') == 1
+
+
+def test_local_total_clicks_includes_unflushed():
+    store = MemoryStore()
+    counter = ClickCounter(store, interval=None)
+    s = Shortener(Shorteners.LOCAL, store=store, clicks=counter)
+    shorten = s.short('http://www.test.com')
+
+    counter.incr('1', 2)
+    assert s.total_clicks(shorten) == 2
+    counter.flush()
+    counter.incr('1')
+    assert s.total_clicks(shorten) == 3
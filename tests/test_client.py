@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import os
+import threading
+import time
+
+from pyshorteners import Shortener
+from pyshorteners.client import Client, get_engine_class
+from pyshorteners.exceptions import (UnknownShortenerException,
+                                     ShorteningErrorException)
+from pyshorteners.ratelimit import RateLimiter
+from pyshorteners.shorteners.base import BaseShortener
+from pyshorteners.shorteners import Local, Tinyurl
+
+import pytest
+
+
+def test_get_engine_class():
+    assert get_engine_class('Tinyurl') is Tinyurl
+    assert get_engine_class(Tinyurl) is Tinyurl
+    for engine in ('Unknown', 'Shortener', None):
+        with pytest.raises(UnknownShortenerException):
+            get_engine_class(engine)
+
+
+def test_client_does_not_change_its_kwargs():
+    kwargs = {'timeout': None}
+    client = Client('Tinyurl', **kwargs)
+    assert kwargs == {'timeout': None}
+    assert client.engine.kwargs['timeout'] == 0.5
+    assert client.name == 'Tinyurl'
+
+
+def test_client_with_engine_instance():
+    engine = Local()
+    client = Client(engine)
+    assert client.engine is engine
+    assert client.expand(client.short('http://www.test.com')) == \
+        'http://www.test.com'
+
+
+def test_client_shared_between_threads():
+    client = Client('Local')
+    results = {}
+
+    def work(number):
+        urls = ['http://www.test.com/{0}/{1}'.format(number, i)
+                for i in range(500)]
+        results[number] = [(url, client.short(url)) for url in urls]
+
+    threads = [threading.Thread(target=work, args=(number,))
+               for number in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    shorts = set()
+    for pairs in results.values():
+        for url, short in pairs:
+            assert client.expand(short) == url
+            shorts.add(short)
+    assert len(shorts) == 8 * 500
+
+
+def test_shortener_wraps_client():
+    s = Shortener('Local')
+    assert s.client is s.client
+    short = s.short('http://www.test.com')
+    assert s.shorten == short
+    assert s.client.short('http://www.test.com') == short
+
+
+class Picky(BaseShortener):
+
+    def short(self, url):
+        if 'fail' in url:
+            raise ShorteningErrorException('rejected', status_code=400)
+        return '{0}#{1}'.format(url, os.getpid())
+
+
+def test_short_many_in_order():
+    urls = ['http://www.test.com/{0}'.format(i) for i in range(50)]
+    urls[7] = 'http://www.test.com/fail'
+    results = Client(Picky).short_many(urls, max_workers=4)
+    assert [result.split('#')[0] for result in results[:7]] == urls[:7]
+    assert isinstance(results[7], ShorteningErrorException)
+    assert isinstance(Client().short_many(['test'])[0], ValueError)
+    assert Client().short_many([]) == []
+
+
+def test_short_many_processes():
+    urls = ['http://www.test.com/{0}'.format(i) for i in range(40)]
+    urls[33] = 'http://www.test.com/fail'
+    results = Client(Picky).short_many(urls, processes=2)
+    assert len(results) == 40
+    for url, result in zip(urls, results):
+        if url.endswith('fail'):
+            assert isinstance(result, ShorteningErrorException)
+            assert result.status_code == 400
+        else:
+            assert result.split('#')[0] == url
+    pids = set(int(result.split('#')[1]) for result in results
+               if not isinstance(result, Exception))
+    assert os.getpid() not in pids
+
+
+def test_short_many_processes_keeps_local_state():
+    client = Client('Local')
+    urls = ['http://www.test.com/{0}'.format(i) for i in range(16)]
+    results = client.short_many(urls, processes=4)
+    assert len(set(results)) == 16
+    assert client.expand_many(results, processes=4) == urls
+    assert client.expand(results[5]) == urls[5]
+
+
+def test_short_many_processes_share_rate_limit():
+    client = Client(Picky, rate_limiter=RateLimiter(40))
+    urls = ['http://www.test.com/{0}'.format(i) for i in range(20)]
+    start = time.time()
+    assert len(client.short_many(urls, processes=2)) == 20
+    assert time.time() - start >= 19 / 40.0
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import threading
+import time
+
+from pyshorteners.client import Client
+from pyshorteners.concurrency import AIMDLimiter, Bulkheads, bulkheads
+from pyshorteners.exceptions import (ConcurrencyLimitException,
+                                     ShorteningErrorException)
+from pyshorteners.shorteners import Balanced, Local
+from pyshorteners.shorteners.base import BaseShortener
+
+import pytest
+
+
+def test_aimd_limiter_increases_on_success():
+    limiter = AIMDLimiter(initial=2, maximum=5)
+    for _ in range(100):
+        limiter.call(lambda: None)
+    assert limiter.limit == 5
+    assert limiter.in_flight == 0
+
+
+def test_aimd_limiter_decreases_on_failures_and_latency():
+    limiter = AIMDLimiter(initial=32)
+    with pytest.raises(ShorteningErrorException):
+        limiter.call(_raise, ShorteningErrorException('down',
+                                                      status_code=503))
+    assert limiter.limit == 16
+
+    # provider answers that are not congestion keep the limit
+    time.sleep(0.01)
+    with pytest.raises(ShorteningErrorException):
+        limiter.call(_raise, ShorteningErrorException('bad', status_code=400))
+    assert limiter.limit > 16
+
+    limiter = AIMDLimiter(initial=32)
+    limiter.acquire()
+    limiter.release(0.01)
+    limiter.acquire()
+    limiter.release(0.1)
+    assert limiter.limit < 17
+    # a burst of slow answers only cuts once
+    limiter.acquire()
+    limiter.release(0.1)
+    assert limiter.limit > 8
+    # nor does the jitter of very fast ones
+    limiter = AIMDLimiter(initial=2)
+    limiter.acquire()
+    limiter.release(0.0001)
+    limiter.acquire()
+    limiter.release(0.001)
+    assert limiter.limit > 2
+
+
+def _raise(error):
+    raise error
+
+
+def test_aimd_limiter_max_wait():
+    limiter = AIMDLimiter(initial=1, max_wait=0.05)
+    limiter.acquire()
+    start = time.time()
+    with pytest.raises(ConcurrencyLimitException) as e:
+        limiter.acquire()
+    assert e.value.retryable
+    assert time.time() - start >= 0.05
+
+    threading.Timer(0.02, limiter.release, (0.01,)).start()
+    limiter.acquire()
+    assert limiter.in_flight == 1
+
+
+def test_bulkheads_isolate_engines():
+    heads = Bulkheads(initial=1, max_wait=0.05)
+    heads.get('Owly').acquire()
+    with pytest.raises(ConcurrencyLimitException):
+        heads.get('Owly').acquire()
+    heads.get('Tinyurl').acquire()
+    assert heads.get('Owly') is heads.get('Owly')
+    assert heads.limits == {'Owly': 1.0, 'Tinyurl': 1.0}
+
+
+class Stuck(BaseShortener):
+
+    def short(self, url):
+        raise AssertionError('a full engine must not be called')
+
+
+def test_balanced_skips_full_engines():
+    stuck = bulkheads.get('Stuck')
+    stuck.acquire()
+    stuck.limit = 1
+    try:
+        stuck.max_wait = 0.01
+        engine = Balanced(engines=[Stuck(), Local()], exploration=0.0,
+                          limit_concurrency=True)
+        engine.stats['Stuck'].latency = 0.001
+        assert engine.short('http://www.test.com') == 'http://localhost/1'
+    finally:
+        stuck.release(0.001)
+
+
+def test_client_limit_concurrency():
+    client = Client(Local(), limit_concurrency=True)
+    assert client.expand(client.short('http://www.test.com')) == \
+        'http://www.test.com'
+    assert bulkheads.get('Local').in_flight == 0
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import json
+import time
+
+from pyshorteners import Shortener, Shorteners
+from pyshorteners.credentials import CredentialPool
+from pyshorteners.exceptions import (QuotaExhaustedException,
+                                     ShorteningErrorException)
+from pyshorteners.shorteners import Adfly
+
+import responses
+import pytest
+
+shorten = 'http://bit.ly/test'
+expanded = 'http://www.test.com'
+
+
+class Response(object):
+
+    def __init__(self, status_code=200, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.ok = status_code < 400
+
+
+def test_pool_rotates_credentials():
+    pool = CredentialPool(['a', 'b', 'c'])
+    assert [pool.acquire() for _ in range(6)] == ['a', 'b', 'c'] * 2
+    assert pool.usage['a']['requests'] == 2
+    assert CredentialPool.of(pool) is pool
+    assert CredentialPool.of('a').credentials == ['a']
+    with pytest.raises(TypeError):
+        CredentialPool([])
+
+
+def test_pool_benches_throttled_credentials():
+    pool = CredentialPool(['a', 'b'], window=60)
+    answers = {'a': Response(429, headers={'retry-after': '0.05'}),
+               'b': Response(200)}
+    sent = []
+
+    def request(credential):
+        sent.append(credential)
+        return answers[credential]
+
+    assert pool.send(request) is answers['b']
+    assert pool.send(request) is answers['b']
+    assert sent == ['a', 'b', 'b']
+    assert pool.usage['a']['throttled'] == 1
+
+    # benched until the Retry-After delay is over
+    time.sleep(0.06)
+    answers['a'] = Response(200)
+    pool.send(request)
+    pool.send(request)
+    assert 'a' in sent[3:]
+
+
+def test_pool_quota_and_exhaustion():
+    pool = CredentialPool(['a', 'b'], window=60, quota=2)
+    assert sorted(pool.acquire() for _ in range(4)) == ['a', 'a', 'b', 'b']
+    with pytest.raises(QuotaExhaustedException) as e:
+        pool.acquire()
+    assert e.value.status_code == 429
+    assert e.value.retryable
+
+    pool = CredentialPool(['a'])
+    throttled = Response(403, b'{"error": "RATE_LIMIT_EXCEEDED"}')
+    with pytest.raises(QuotaExhaustedException):
+        pool.send(lambda credential: throttled)
+    assert pool.usage['a']['benched_until'] > time.time() + 3000
+
+    # Retry-After: 0 does not bench, the retries stop after every key
+    pool = CredentialPool(['a', 'b'])
+    sent = []
+
+    def request(credential):
+        sent.append(credential)
+        return Response(429, headers={'retry-after': '0'})
+
+    with pytest.raises(QuotaExhaustedException):
+        pool.send(request)
+    assert sent == ['a', 'b']
+
+    pool = CredentialPool(['a'])
+    assert pool.send(lambda credential: Response(403, b'forbidden')).ok \
+        is False
+    assert pool.usage['a']['errors'] == 1
+
+
+@responses.activate
+def test_bitly_rotates_tokens():
+    s = Shortener(Shorteners.BITLY, bitly_token=['TOKEN_1', 'TOKEN_2'])
+    url = '{0}v3/shorten'.format(s.api_url)
+
+    def callback(request):
+        if 'TOKEN_1' in request.url:
+            return (403, {}, 'RATE_LIMIT_EXCEEDED')
+        return (200, {}, shorten)
+
+    responses.add_callback(responses.GET, url, callback=callback)
+    for _ in range(3):
+        assert s.short(expanded) == shorten
+    usage = s.client.engine.credentials.usage
+    assert usage['TOKEN_1']['throttled'] == 1
+    assert usage['TOKEN_1']['requests'] == 1
+    assert usage['TOKEN_2']['requests'] == 3
+
+
+@responses.activate
+def test_google_pool_exhausted():
+    s = Shortener(Shorteners.GOOGLE, api_key=['KEY_1', 'KEY_2'])
+    body = json.dumps({'error': {'errors': [
+        {'reason': 'dailyLimitExceeded'}]}})
+    responses.add(responses.POST, s.api_url, body=body, status=403)
+    with pytest.raises(QuotaExhaustedException):
+        s.short(expanded)
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_adfly_key_uid_pairs():
+    s = Shortener(Shorteners.ADFLY, key=['KEY_1', 'KEY_2'], uid=['1', '2'])
+    responses.add(responses.GET, s.api_url, body=shorten)
+    s.short(expanded)
+    s.short(expanded)
+    urls = [call.request.url for call in responses.calls]
+    assert 'key=KEY_1' in urls[0] and 'uid=1' in urls[0]
+    assert 'key=KEY_2' in urls[1] and 'uid=2' in urls[1]
+
+    responses.replace(responses.GET, s.api_url, body='error', status=500)
+    with pytest.raises(ShorteningErrorException):
+        s.short(expanded)
+
+    with pytest.raises(TypeError):
+        Adfly(key=['KEY_1', 'KEY_2'], uid=['1'])
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import pickle
+import threading
+import time
+
+from pyshorteners import Shortener
+from pyshorteners.batching import MicroBatcher
+from pyshorteners.client import Client
+from pyshorteners.deadline import Deadline, current, scope
+from pyshorteners.exceptions import DeadlineExceededException
+from pyshorteners.shorteners.base import BaseShortener, Simple
+from pyshorteners.singleflight import SingleFlight
+
+import pytest
+import requests
+import responses
+
+
+class Slow(BaseShortener):
+    """
+    Takes 50ms per call, then sends a request
+    """
+
+    def short(self, url):
+        time.sleep(0.05)
+        self._timeout()
+        return url + '/short'
+
+
+def test_deadline_clamp():
+    deadline = Deadline(10)
+    assert 9 < deadline.remaining() <= 10
+    assert deadline.clamp(0.5) == 0.5
+    assert deadline.clamp((0.5, 30))[0] == 0.5
+    assert deadline.clamp((0.5, 30))[1] <= 10
+    assert deadline.clamp(None) <= 10
+
+    deadline = Deadline(0)
+    assert deadline.expired
+    with pytest.raises(DeadlineExceededException):
+        deadline.clamp(0.5)
+
+
+def test_deadline_pickles_the_time_left():
+    deadline = pickle.loads(pickle.dumps(Deadline(10)))
+    assert 9 < deadline.remaining() <= 10
+
+
+def test_scope_keeps_the_earlier_deadline():
+    assert current() is None
+    with scope(1) as outer:
+        assert current() is outer
+        with scope(10) as inner:
+            assert inner is outer
+        with scope(None) as inner:
+            assert inner is outer
+        with scope(0.5) as inner:
+            assert inner is not outer
+            assert current() is inner
+        assert current() is outer
+    assert current() is None
+
+
+def test_connect_and_read_timeouts():
+    assert Simple(timeout=2)._timeout() == 2
+    assert Simple(timeout=2, read_timeout=5)._timeout() == (2, 5)
+    assert Simple(timeout=(1, 3), connect_timeout=0.2)._timeout() == (0.2, 3)
+    with scope(1):
+        connect, read = Simple(connect_timeout=0.2,
+                               read_timeout=5)._timeout()
+    assert connect == 0.2
+    assert read <= 1
+
+
+@responses.activate
+def test_expand_follows_redirect_hops_within_the_deadline():
+    responses.add(responses.GET, 'http://a.com/', status=301,
+                  headers={'location': 'http://b.com/'})
+    responses.add(responses.GET, 'http://b.com/', status=302,
+                  headers={'location': '/final'})
+    responses.add(responses.GET, 'http://b.com/final', body='')
+    s = Shortener(deadline=1)
+    assert s.expand('http://a.com/') == 'http://b.com/final'
+    assert len(responses.calls) == 3
+
+    with pytest.raises(DeadlineExceededException):
+        s.expand('http://a.com/', deadline=0)
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_request_timeout_past_the_deadline():
+    def slow(request):
+        time.sleep(0.05)
+        raise requests.exceptions.ReadTimeout()
+
+    responses.add_callback(responses.GET, 'http://a.com/', callback=slow)
+    with pytest.raises(DeadlineExceededException):
+        Client(deadline=0.01).expand('http://a.com/')
+    # a timeout inside the budget is left as is
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        Client(deadline=5).expand('http://a.com/')
+
+    client = Client(deadline=0.01, on_deadline='original')
+    assert client.expand('http://a.com/') == 'http://a.com/'
+
+
+def test_client_deadline_policy():
+    url = 'http://www.test.com'
+    assert Client(Slow, deadline=1).short(url) == url + '/short'
+    with pytest.raises(DeadlineExceededException):
+        Client(Slow, deadline=0.01).short(url)
+    with pytest.raises(DeadlineExceededException):
+        Client(Slow).short(url, deadline=0.01)
+    assert Client(Slow, deadline=0.01, on_deadline='original').short(
+        url) == url
+
+    with pytest.raises(TypeError):
+        Client(Slow, on_deadline='ignore')
+
+
+def test_short_many_shares_the_deadline():
+    urls = ['http://www.test.com/{0}'.format(i) for i in range(10)]
+    results = Client(Slow).short_many(urls, max_workers=1, deadline=0.12)
+    assert results[0] == urls[0] + '/short'
+    assert isinstance(results[-1], DeadlineExceededException)
+
+    client = Client(Slow, on_deadline='original')
+    results = client.short_many(urls, max_workers=1, deadline=0.12)
+    assert results[0] == urls[0] + '/short'
+    assert results[-1] == urls[-1]
+
+
+def _slow_call():
+    time.sleep(0.1)
+    current().check()
+    return 'ok'
+
+
+def _in_thread(budget, fn, *args):
+    results = []
+
+    def run():
+        with scope(budget):
+            try:
+                results.append(fn(*args))
+            except Exception as e:
+                results.append(e)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, results
+
+
+def test_single_flight_follower_waits_until_its_deadline():
+    flights = SingleFlight()
+    leader, _ = _in_thread(5, flights.do, 'key', _slow_call)
+    time.sleep(0.01)
+    start = time.time()
+    with scope(0.02):
+        with pytest.raises(DeadlineExceededException):
+            flights.do('key', _slow_call)
+    assert time.time() - start < 0.08
+    leader.join()
+
+
+def test_single_flight_follower_outlives_the_leader_deadline():
+    flights = SingleFlight()
+    leader, results = _in_thread(0.02, flights.do, 'key', _slow_call)
+    time.sleep(0.01)
+    with scope(5):
+        assert flights.do('key', _slow_call) == 'ok'
+    leader.join()
+    assert isinstance(results[0], DeadlineExceededException)
+
+
+def test_micro_batch_followers_keep_their_deadline():
+    def slow_batch(items):
+        time.sleep(0.1)
+        try:
+            current().check()
+        except DeadlineExceededException as e:
+            return [e] * len(items)
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(slow_batch, max_delay=0.02)
+    leader, results = _in_thread(0.05, batcher.submit, 1)
+    time.sleep(0.005)
+    with scope(5):
+        assert batcher.submit(2) == 4
+    leader.join()
+    assert isinstance(results[0], DeadlineExceededException)
+
+    leader, results = _in_thread(5, batcher.submit, 1)
+    time.sleep(0.005)
+    with scope(0.03):
+        with pytest.raises(DeadlineExceededException):
+            batcher.submit(2)
+    leader.join()
+    assert results == [2]
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import os
+import threading
+import weakref
+
+from pyshorteners import forksafe
+from pyshorteners.cache import LRUCache
+from pyshorteners.clicks import ClickCounter
+from pyshorteners.ids import SqliteBlockAllocator
+from pyshorteners.shorteners import Local
+from pyshorteners.shorteners.base import sessions
+from pyshorteners.stores import LogStore, MemoryStore, SqliteStore
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'),
+                                reason='needs os.fork')
+
+
+def in_child(check):
+    """
+    Runs `check` on a forked child, failing when it raises
+    """
+    pid = os.fork()
+    if pid == 0:
+        try:
+            check()
+        except BaseException:
+            os._exit(1)
+        os._exit(0)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+
+
+def test_lock_held_while_forking():
+    cache = LRUCache()
+    cache.set('a', 1)
+    cache._lock.acquire()
+    try:
+        def check():
+            # would deadlock with the inherited lock
+            assert cache.get('a') == 1
+            cache.set('b', 2)
+        in_child(check)
+    finally:
+        cache._lock.release()
+
+
+def test_session_is_rebuilt_on_child():
+    parent = sessions.get()
+    in_child(lambda: assert_is_not(sessions.get(), parent))
+    assert sessions.get() is parent
+
+
+def assert_is_not(first, second):
+    assert first is not second
+
+
+def test_click_counter_does_not_count_twice():
+    counter = ClickCounter(MemoryStore(), interval=None)
+    counter.incr('a', 2)
+
+    def check():
+        assert counter.total('a') == 0
+        counter.incr('a')
+        counter.flush()
+        assert counter.store.clicks('a') == 1
+    in_child(check)
+
+    counter.flush()
+    assert counter.store.clicks('a') == 2
+
+
+def test_sqlite_store_reconnects(tmpdir):
+    store = SqliteStore(str(tmpdir.join('links.db')))
+    store.set('a', 'http://www.test.com')
+    parent_connection = store._conn
+
+    def check():
+        assert store._conn is not parent_connection
+        assert store.get('a') == 'http://www.test.com'
+        store.set('b', 'http://www.test2.com')
+    in_child(check)
+
+    assert store.get('b') == 'http://www.test2.com'
+
+
+def test_check_detects_forks_without_hooks(monkeypatch):
+    calls = []
+
+    class Resource(object):
+        def _after_fork(self):
+            calls.append(1)
+
+    monkeypatch.setattr(forksafe, '_objects', weakref.WeakSet())
+    resource = forksafe.register(Resource())
+    forksafe.check()
+    assert calls == []
+    monkeypatch.setattr(forksafe, '_pid', -1)
+    forksafe.check()
+    assert calls == [1]
+    assert forksafe._pid == os.getpid()
+    del resource
+
+
+def test_background_flusher_restarts_on_child():
+    store = MemoryStore()
+    counter = ClickCounter(store, interval=0.01)
+    counter.incr('a')
+
+    def check():
+        assert counter._flusher is None
+        counter.incr('b')
+        assert counter._flusher is not None
+        counter.stop()
+        assert store.clicks('b') == 1
+        assert threading.active_count() == 1
+    in_child(check)
+    counter.stop()
+
+
+def test_local_ids_are_not_reused_after_fork(tmpdir):
+    path = str(tmpdir.join('links.db'))
+    engine = Local(store=SqliteStore(path))
+    known = engine.short('http://www.test.com/known')
+
+    def check():
+        assert engine.short('http://www.test.com/known') == known
+        # the parent leases the same ids, so the child can not go on
+        with pytest.raises(RuntimeError):
+            engine.short('http://www.test.com/child')
+    in_child(check)
+
+    allocator = SqliteBlockAllocator(str(tmpdir.join('ids.db')),
+                                     block_size=10)
+    engine = Local(store=SqliteStore(str(tmpdir.join('shared.db'))),
+                   allocator=allocator)
+    engine.short('http://www.test.com/0')
+    in_child(lambda: engine.short('http://www.test.com/child'))
+    urls = ['http://www.test.com/{0}'.format(i) for i in range(30)]
+    shorts = [engine.short(url) for url in urls]
+    child = engine.short('http://www.test.com/child')
+    assert child not in shorts
+    assert [engine.expand(short) for short in shorts] == urls
+
+
+def test_local_memory_store_goes_on_after_fork():
+    engine = Local()
+    engine.short('http://www.test.com/0')
+
+    def check():
+        short = engine.short('http://www.test.com/child')
+        assert engine.expand(short) == 'http://www.test.com/child'
+    in_child(check)
+
+
+def test_log_store_writers_after_fork(tmpdir):
+    path = str(tmpdir.join('links'))
+    store = LogStore(path)
+    store.set('a', 'http://www.test.com/a')
+
+    def check():
+        store.set('c', 'http://www.test.com/c')
+        # enough to grow both indexes under the parent
+        for i in range(2000):
+            store.set(str(i), 'http://www.test.com/{0}'.format(i))
+    in_child(check)
+
+    store.set('b', 'http://www.test.com/b')
+    store.incr_clicks('1999')
+    for code in ('a', 'b', 'c', '1999'):
+        assert store.get(code) == 'http://www.test.com/' + code
+    assert store.get_code('http://www.test.com/42') == '42'
+    assert len(store) == 2003
+    store.close()
+
+    store = LogStore(path)
+    assert store.get('b') == 'http://www.test.com/b'
+    assert store.clicks('1999') == 1
+    assert len(store) == 2003
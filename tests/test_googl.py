@@ -110,3 +110,100 @@ def test_google_bad_params():
 
     with pytest.raises(TypeError):
         s.expand(expanded)
+
+
+def _batch_body(items, boundary='batch_abc'):
+    parts = []
+    for position, (status, body) in enumerate(items):
+        parts.append('--{0}\r\nContent-Type: application/http\r\n'
+                     'Content-ID: <response-item{1}>\r\n\r\n'
+                     'HTTP/1.1 {2}\r\nContent-Type: application/json\r\n'
+                     '\r\n{3}\r\n'.format(boundary, position, status, body))
+    return ''.join(parts) + '--{0}--\r\n'.format(boundary)
+
+
+def _add_batch(items, status=200):
+    responses.add(responses.POST, s.client.engine.batch_url,
+                  body=_batch_body(items), status=status,
+                  content_type='multipart/mixed; boundary=batch_abc')
+
+
+@responses.activate
+def test_googl_short_many():
+    _add_batch([('200 OK', json.dumps(dict(id=short_url))),
+                ('400 Bad Request', json.dumps(dict(error='invalid'))),
+                ('200 OK', json.dumps(dict(id='http://goo.gl/other')))])
+    results = s.short_many([expanded, 'http://www.invalid.com',
+                            expanded + '/2'])
+
+    assert results[0] == short_url
+    assert isinstance(results[1], ShorteningErrorException)
+    assert results[1].status_code == 400
+    assert results[2] == 'http://goo.gl/other'
+    assert len(responses.calls) == 1
+
+    request = responses.calls[0].request
+    assert request.headers['content-type'].startswith('multipart/mixed')
+    body = request.body.decode('utf-8')
+    assert body.count('POST /urlshortener/v1/url?key=FAKE_KEY') == 3
+    assert '"longUrl": "http://www.invalid.com"' in body
+
+
+@responses.activate
+def test_googl_expand_many():
+    _add_batch([('200 OK', json.dumps(dict(longUrl=expanded))),
+                ('404 Not Found', '{}')])
+    engine = s.client.engine
+    results = engine.expand_many([short_url, 'http://goo.gl/unknown'])
+
+    assert results[0] == expanded
+    assert isinstance(results[1], ExpandingErrorException)
+    assert results[1].status_code == 404
+    body = responses.calls[0].request.body.decode('utf-8')
+    assert 'GET /urlshortener/v1/url?' in body
+    assert urlencode({'shortUrl': short_url}) in body
+
+
+@responses.activate
+def test_googl_many_missing_items_and_batch_errors():
+    _add_batch([('200 OK', json.dumps(dict(id=short_url)))])
+    engine = s.client.engine
+    results = engine.short_many([expanded, expanded + '/2'])
+    assert results[0] == short_url
+    assert isinstance(results[1], ShorteningErrorException)
+    assert results[1].retryable
+
+    responses.reset()
+    _add_batch([], status=403)
+    with pytest.raises(ExpandingErrorException) as e:
+        engine.expand_many([short_url])
+    assert e.value.status_code == 403
+
+
+@responses.activate
+def test_googl_many_splits_large_batches():
+    engine = s.client.engine
+    engine.batch_limit = 2
+    try:
+        _add_batch([('200 OK', json.dumps(dict(id=short_url)))] * 2)
+        assert engine.short_many([expanded] * 3)[:2] == [short_url] * 2
+        assert len(responses.calls) == 2
+    finally:
+        del engine.batch_limit
+
+
+@responses.activate
+def test_googl_many_malformed_batch_response():
+    engine = s.client.engine
+    responses.add(responses.POST, engine.batch_url, body='{}',
+                  content_type='application/json')
+    with pytest.raises(ShorteningErrorException) as e:
+        engine.short_many([expanded])
+    assert e.value.status_code == 200
+
+    responses.reset()
+    responses.add(responses.POST, engine.batch_url,
+                  body=_batch_body([('garbage', '{}')]),
+                  content_type='multipart/mixed; boundary=batch_abc')
+    with pytest.raises(ExpandingErrorException):
+        engine.expand_many([short_url])
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# encoding: utf-8
+from pyshorteners.cache import LRUCache, ShardedCache
+from pyshorteners.hashring import HashRing
+from pyshorteners.utils import canonicalize_url
+
+import pytest
+
+keys = ['http://www.test.com/{0}'.format(i) for i in range(5000)]
+
+
+def test_canonicalize_url():
+    assert canonicalize_url('HTTP://WWW.Test.com:80?b=2&a=1#top') == \
+        'http://www.test.com/?a=1&b=2'
+    assert canonicalize_url('https://test.com:443/a') == \
+        canonicalize_url('https://TEST.com/a#b')
+    assert canonicalize_url('https://test.com:8443/a/') == \
+        'https://test.com:8443/a/'
+
+
+def test_hash_ring_is_stable_and_balanced():
+    ring = HashRing(['a', 'b', 'c', 'd'])
+    owners = [ring.node_for(key) for key in keys]
+    assert owners == [HashRing(['d', 'c', 'b', 'a']).node_for(key)
+                      for key in keys]
+    for node in 'abcd':
+        assert 700 < owners.count(node) < 1800
+    assert ring.nodes_for(keys[0])[0] == owners[0]
+    assert sorted(ring.nodes_for(keys[0])) == ['a', 'b', 'c', 'd']
+
+
+def test_hash_ring_moves_few_keys():
+    ring = HashRing(['a', 'b', 'c', 'd'])
+    before = [ring.node_for(key) for key in keys]
+    ring.add('e')
+    after = [ring.node_for(key) for key in keys]
+    moved = [(old, new) for old, new in zip(before, after) if old != new]
+    # only keys taken over by the new node move
+    assert all(new == 'e' for _, new in moved)
+    assert len(moved) < len(keys) * 0.3
+
+    ring.remove('e')
+    assert [ring.node_for(key) for key in keys] == before
+    assert len(ring) == 4
+
+    with pytest.raises(LookupError):
+        HashRing().node_for(keys[0])
+
+
+def test_sharded_cache():
+    shards = [LRUCache(), LRUCache(), LRUCache()]
+    cache = ShardedCache(shards)
+    items = [(('expand', key), key) for key in keys[:300]]
+    cache.set_many(items)
+    assert all(len(shard) > 50 for shard in shards)
+    assert cache.get_many([key for key, _ in items]) == \
+        [value for _, value in items]
+    assert cache.get(('expand', keys[0])) == keys[0]
+    assert shards[int(cache.ring.node_for('expand\0' + keys[0]))].get(
+        ('expand', keys[0])) == keys[0]
+
+
+def test_sharded_cache_routes_canonical_urls():
+    cache = ShardedCache([LRUCache() for _ in range(8)])
+    for key in keys[:50]:
+        spelling = key.replace('http://www.test.com',
+                               'HTTP://WWW.TEST.COM:80') + '#top'
+        assert cache.shard_for(('short', 'Tinyurl', key)) is \
+            cache.shard_for(('short', 'Tinyurl', spelling))
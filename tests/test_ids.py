@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import multiprocessing
+
+from pyshorteners.ids import (FileBlockAllocator, MemoryAllocator,
+                              SqliteBlockAllocator)
+from pyshorteners.shorteners import Local
+from pyshorteners.utils import base62_encode, base62_encode_range
+
+import pytest
+
+
+def test_base62_encode_range():
+    for start, stop in ((0, 200), (61, 63), (3800, 3900), (10 ** 9, 10 ** 9),
+                        (10 ** 12, 10 ** 12 + 130)):
+        assert base62_encode_range(start, stop) == \
+            [base62_encode(number) for number in range(start, stop)]
+    with pytest.raises(ValueError):
+        base62_encode_range(-1, 5)
+
+
+def test_memory_allocator_blocks():
+    allocator = MemoryAllocator(start=1, block_size=10)
+    assert [allocator.next_id() for _ in range(3)] == [1, 2, 3]
+    # the rest of the block first, then a new one
+    assert allocator.take(20) == [range(4, 11), range(11, 24)]
+    assert allocator.next_id() == 24
+    assert allocator.codes(3) == ['p', 'q', 'r']
+
+
+def _lease(args):
+    kind, path = args
+    if kind == 'sqlite':
+        allocator = SqliteBlockAllocator(path, block_size=7)
+    else:
+        allocator = FileBlockAllocator(path, block_size=7)
+    ids = [allocator.next_id() for _ in range(50)]
+    for ids_range in allocator.take(30):
+        ids.extend(ids_range)
+    return ids
+
+
+@pytest.mark.parametrize('kind', ['sqlite', 'file'])
+def test_block_allocators_between_processes(tmpdir, kind):
+    path = str(tmpdir.join('ids'))
+    pool = multiprocessing.Pool(4)
+    try:
+        results = pool.map(_lease, [(kind, path)] * 8)
+    finally:
+        pool.close()
+        pool.join()
+    ids = [number for result in results for number in result]
+    assert len(ids) == len(set(ids)) == 8 * 80
+    assert min(ids) == 1
+
+
+def test_local_with_block_allocator(tmpdir):
+    allocator = SqliteBlockAllocator(str(tmpdir.join('ids.db')),
+                                     block_size=100)
+    engines = [Local(allocator=allocator), Local(allocator=allocator)]
+    shorts = [engine.short('http://www.test.com/{0}'.format(i))
+              for i in range(10) for engine in engines]
+    assert len(set(shorts)) == 20
+
+
+def test_local_short_many():
+    engine = Local()
+    known = engine.short('http://www.test.com/known')
+    urls = ['http://www.test.com/{0}'.format(i) for i in range(100)]
+    urls += ['http://www.test.com/known', 'http://www.test.com/1']
+    shorts = engine.short_many(urls)
+    assert shorts[100] == known
+    assert shorts[101] == shorts[1]
+    assert len(set(shorts[:100])) == 100
+    assert all(engine.expand(short) == url
+               for short, url in zip(shorts, urls))
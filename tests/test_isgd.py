@@ -6,7 +6,8 @@ except ImportError:
     from urllib.parse import urlencode
 
 from pyshorteners import Shortener, Shorteners
-from pyshorteners.exceptions import ShorteningErrorException
+from pyshorteners.exceptions import (ShorteningErrorException,
+                                     ExpandingErrorException)
 
 import responses
 import pytest
@@ -47,3 +48,35 @@ def test_isgd_short_method_bad_response():
 
     with pytest.raises(ShorteningErrorException):
         s.short(expanded)
+
+
+@responses.activate
+def test_isgd_expand_uses_lookup():
+    params = urlencode({
+        'format': 'simple',
+        'shorturl': 'test',
+    })
+    mock_url = '{}?{}'.format(s._class.lookup_url, params)
+    responses.add(responses.GET, mock_url, body=expanded,
+                  match_querystring=True)
+
+    assert s.expand(shorten) == expanded
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_isgd_expand_unknown_url():
+    responses.add(responses.GET, s._class.lookup_url, body='unknown',
+                  status=400)
+
+    with pytest.raises(ExpandingErrorException):
+        s.expand(shorten)
+
+
+@responses.activate
+def test_isgd_expand_falls_back_to_redirect():
+    responses.add(responses.GET, s._class.lookup_url, status=503)
+    responses.add(responses.GET, shorten, status=200)
+
+    assert s.expand(shorten) == shorten
+    assert len(responses.calls) == 2
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+from pyshorteners import Shortener, Shorteners
+from pyshorteners.exceptions import ExpandingErrorException
+from pyshorteners.shorteners import Local
+from pyshorteners.stores import MemoryStore, SqliteStore
+from pyshorteners.utils import base62_encode, base62_decode
+
+import pytest
+
+expanded = 'http://www.test.com'
+
+
+def test_base62_roundtrip():
+    for number in (0, 1, 61, 62, 3843, 3844, 2 ** 64):
+        assert base62_decode(base62_encode(number)) == number
+    assert base62_encode(61) == 'Z'
+    assert base62_encode(62) == '10'
+
+    with pytest.raises(ValueError):
+        base62_decode('a-b')
+
+
+def test_local_short_and_expand():
+    s = Shortener(Shorteners.LOCAL)
+    shorten = s.short(expanded)
+
+    assert shorten == 'http://localhost/1'
+    assert s.short(expanded) == shorten
+    assert s.short('http://www.test2.com') == 'http://localhost/2'
+    assert s.expand(shorten) == expanded
+
+
+def test_local_custom_domain():
+    s = Shortener(Shorteners.LOCAL, domain='https://sho.rt')
+    assert s.short(expanded) == 'https://sho.rt/1'
+
+
+def test_local_expand_unknown_code():
+    s = Shortener(Shorteners.LOCAL)
+    with pytest.raises(ExpandingErrorException):
+        s.expand('http://localhost/abc')
+
+
+def test_local_total_clicks():
+    store = MemoryStore()
+    s = Shortener(Shorteners.LOCAL, store=store)
+    shorten = s.short(expanded)
+    assert s.total_clicks() == 0
+
+    store.incr_clicks('1', 3)
+    assert s.total_clicks(shorten) == 3
+
+
+def test_local_sqlite_store_persists(tmpdir):
+    path = str(tmpdir.join('links.db'))
+    engine = Local(store=SqliteStore(path))
+    shorten = engine.short(expanded)
+    engine.store.close()
+
+    engine = Local(store=SqliteStore(path))
+    assert engine.expand(shorten) == expanded
+    assert engine.short(expanded) == shorten
+    # the counter resumes after the persisted codes
+    assert engine.short('http://www.test2.com') == 'http://localhost/2'
+
+
+def test_sqlite_store_does_not_remap_codes():
+    store = SqliteStore()
+    store.set('a', expanded)
+    store.set('a', expanded)
+    with pytest.raises(ValueError):
+        store.set('a', 'http://www.test2.com')
+    assert store.get('a') == expanded
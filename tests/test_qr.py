@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import struct
+import zlib
+
+from pyshorteners import Shortener, Shorteners, qr
+
+import pytest
+
+shorten = 'http://localhost/1'
+
+
+def test_encode_sizes():
+    assert len(qr.encode('a')) == 21
+    assert len(qr.encode('a' * 100)) == 41
+    with pytest.raises(ValueError):
+        qr.encode('a' * 3000)
+
+
+def test_encode_known_matrix():
+    # 'http://localhost/1' at level M with mask 0, checked against the
+    # qrcode package
+    modules = qr.encode(shorten, mask=0)
+    rows = [''.join('1' if dark else '0' for dark in row) for row in modules]
+    assert len(rows) == 25
+    assert rows[0] == '1111111001110001101111111'
+    assert rows[8] == '1010101001110000000010010'
+    assert rows[20] == '1011101010010010111110001'
+
+
+def test_png():
+    png = qr.render(shorten, 100, 80, 'png')
+    assert png.startswith(b'\x89PNG\r\n\x1a\n')
+    width, height = struct.unpack('>II', png[16:24])
+    assert (width, height) == (100, 80)
+    length = struct.unpack('>I', png[33:37])[0]
+    raw = zlib.decompress(png[41:41 + length])
+    # one filter byte plus 13 bytes of pixels per row
+    assert len(raw) == 80 * 14
+
+
+def test_svg():
+    svg = qr.render(shorten, 120, 120, 'svg').decode('utf-8')
+    assert svg.startswith('<svg')
+    assert 'width="120"' in svg
+    assert 'viewBox="0 0 33 33"' in svg
+
+
+def test_render_cache():
+    qr.images.clear()
+    image = qr.render(shorten, 120, 120, 'png')
+    assert qr.render(shorten, 120, 120, 'png') is image
+    assert len(qr.images) == 1
+    with pytest.raises(ValueError):
+        qr.render(shorten, 120, 120, 'gif')
+
+
+def test_shortener_local_qrcode():
+    s = Shortener(Shorteners.LOCAL)
+    assert s.qrcode(format='png') is None
+    s.short('http://www.test.com')
+    assert s.qrcode(format='svg') == qr.render(shorten, 120, 120, 'svg')
+    images = s.qrcode_many([shorten, 'http://localhost/2'], 60, 60)
+    assert len(images) == 2
+    assert images[0] == qr.render(shorten, 60, 60, 'png')
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import time
+
+from pyshorteners.client import Client
+from pyshorteners.deadline import scope
+from pyshorteners.exceptions import DeadlineExceededException
+from pyshorteners.ratelimit import RateLimiter
+from pyshorteners.shorteners.base import BaseShortener
+
+import pytest
+
+
+def test_rate_limiter_burst_then_rate():
+    limiter = RateLimiter(20, burst=5)
+    start = time.time()
+    for _ in range(5):
+        limiter.acquire()
+    assert time.time() - start < 0.1
+    for _ in range(4):
+        limiter.acquire()
+    assert time.time() - start >= 4 / 20.0 - 0.01
+
+
+def test_rate_limiter_bad_rate():
+    with pytest.raises(ValueError):
+        RateLimiter(0)
+
+
+class Echo(BaseShortener):
+
+    def short(self, url):
+        return url + '/short'
+
+
+def test_rate_limiter_waits_until_the_deadline():
+    limiter = RateLimiter(0.5)
+    limiter.acquire()
+    start = time.time()
+    with scope(0.1):
+        with pytest.raises(DeadlineExceededException):
+            limiter.acquire()
+    assert time.time() - start < 0.1
+
+    url = 'http://www.test.com'
+    client = Client(Echo, rate_limiter=limiter, deadline=0.1)
+    with pytest.raises(DeadlineExceededException):
+        client.short(url)
+    client = Client(Echo, rate_limiter=limiter, deadline=0.1,
+                    on_deadline='original')
+    assert client.short(url) == url
+    assert time.time() - start < 0.5
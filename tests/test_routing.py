@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# encoding: utf-8
+from pyshorteners.exceptions import ExpandingErrorException
+from pyshorteners.routing import HostIndex
+from pyshorteners.shorteners import Bitly, Local, Simple
+
+import responses
+
+
+def test_provider():
+    index = HostIndex()
+    assert index.provider('http://bit.ly/test') == 'Bitly'
+    assert index.provider('https://J.MP/test') == 'Bitly'
+    assert index.provider('http://www.tinyurl.com/test') == 'Tinyurl'
+    assert index.provider('http://da.gd/test') == 'Dagd'
+    assert index.provider('http://unknown.com/test') == 'Simple'
+
+
+def test_engine_for_needs_credentials():
+    assert isinstance(HostIndex().engine_for('http://bit.ly/test'), Simple)
+    index = HostIndex(bitly_token='TOKEN')
+    assert isinstance(index.engine_for('http://bit.ly/test'), Bitly)
+    assert index.engine_for('http://bit.ly/a') is \
+        index.engine_for('http://bit.ly/b')
+
+
+def test_group():
+    urls = ['http://bit.ly/a', 'http://is.gd/b', 'http://bit.ly/c',
+            'http://unknown.com/d']
+    groups = HostIndex().group(urls)
+    assert list(groups.keys()) == ['Bitly', 'Isgd', 'Simple']
+    assert groups['Bitly'] == [(0, 'http://bit.ly/a'), (2, 'http://bit.ly/c')]
+
+
+@responses.activate
+def test_expand_many_routes_to_providers():
+    local = Local(domain='http://sho.rt/')
+    short = local.short('http://www.test.com')
+    responses.add(responses.GET, 'https://da.gd/coshorten/abc',
+                  body='http://www.dagd.com')
+    responses.add(responses.GET, 'http://unknown.com/x', status=404)
+
+    index = HostIndex()
+    index.register(local)
+    results = index.expand_many([short, 'http://da.gd/abc',
+                                 'http://unknown.com/x'])
+
+    assert results[:2] == ['http://www.test.com', 'http://www.dagd.com']
+    assert isinstance(results[2], ExpandingErrorException)
+
+
+@responses.activate
+def test_expand_many_keeps_other_providers_on_batch_errors():
+    local = Local(domain='http://sho.rt/')
+    short = local.short('http://www.test.com')
+    index = HostIndex(api_key='FAKE_KEY')
+    index.register(local)
+    responses.add(responses.POST, index.engine_for('http://goo.gl/a')
+                  .batch_url, status=500)
+
+    results = index.expand_many(['http://goo.gl/a', short,
+                                 'http://goo.gl/b'])
+    assert results[1] == 'http://www.test.com'
+    for result in (results[0], results[2]):
+        assert isinstance(result, ExpandingErrorException)
+        assert result.status_code == 500
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import asyncio
+import io
+import json
+
+from pyshorteners.exceptions import (DeadlineExceededException,
+                                     QuotaExhaustedException)
+from pyshorteners.server import ASGIApp, RedirectService, WSGIApp
+from pyshorteners.shorteners import Tinyurl
+from pyshorteners.shorteners.base import BaseShortener
+from pyshorteners.stores import MemoryStore
+
+import pytest
+import requests
+import responses
+
+expanded = 'http://www.test.com'
+
+
+def call(app, method, path, body=b'', content_type=''):
+    response = {}
+
+    def start_response(status, headers):
+        response['status'] = status
+        response['headers'] = dict(headers)
+
+    environ = {'REQUEST_METHOD': method, 'PATH_INFO': path,
+               'CONTENT_LENGTH': str(len(body)),
+               'CONTENT_TYPE': content_type, 'wsgi.input': io.BytesIO(body)}
+    response['body'] = b''.join(app(environ, start_response))
+    return response
+
+
+def test_wsgi_shorten_and_redirect():
+    app = WSGIApp()
+    response = call(app, 'POST', '/shorten',
+                    json.dumps({'url': expanded}).encode('utf-8'),
+                    'application/json')
+    assert response['status'] == '201 Created'
+    assert json.loads(response['body'].decode('utf-8')) == {
+        'url': expanded, 'short': 'http://localhost/1'}
+
+    response = call(app, 'GET', '/1')
+    assert response['status'] == '302 Found'
+    assert response['headers']['Location'] == expanded
+    assert app.service.total_clicks('1') == 1
+
+
+def test_wsgi_form_body_and_permanent_redirect():
+    app = WSGIApp(permanent=True)
+    response = call(app, 'POST', '/shorten', b'url=http%3A%2F%2Fwww.test.com',
+                    'application/x-www-form-urlencoded')
+    assert response['status'] == '201 Created'
+    assert call(app, 'GET', '/1')['status'] == '301 Moved Permanently'
+
+
+def test_wsgi_errors():
+    app = WSGIApp()
+    assert call(app, 'GET', '/unknown')['status'] == '404 Not Found'
+    assert call(app, 'GET', '/')['status'] == '404 Not Found'
+    assert call(app, 'GET', '/shorten')['status'] == '405 Method Not Allowed'
+    response = call(app, 'POST', '/shorten', b'url=test.com')
+    assert response['status'] == '400 Bad Request'
+
+
+@responses.activate
+def test_remote_engine_mappings_are_stored():
+    responses.add(responses.GET, Tinyurl.api_url,
+                  body='http://tinyurl.com/abc')
+    service = RedirectService(engine=Tinyurl(timeout=1), store=MemoryStore())
+
+    status, _, _ = service.shorten(b'url=' + expanded.encode('utf-8'))
+    assert status == 201
+    assert service.store.get('abc') == expanded
+    status, headers, _ = service.redirect('abc')
+    assert status == 302
+    assert ('Location', expanded) in headers
+
+
+def test_asgi_shorten_and_redirect():
+    app = ASGIApp()
+
+    def request(method, path, body=b''):
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': body}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {'type': 'http', 'method': method, 'path': path,
+                 'headers': [(b'content-type', b'application/json')]}
+        asyncio.run(app(scope, receive, send))
+        return messages
+
+    messages = request('POST', '/shorten',
+                       json.dumps({'url': expanded}).encode('utf-8'))
+    assert messages[0]['status'] == 201
+
+    messages = request('GET', '/1')
+    assert messages[0]['status'] == 302
+    assert (b'location', expanded.encode('utf-8')) in messages[0]['headers']
+
+    url = u'http://example.com/caf\xe9\u2603?q=a%20b'
+    messages = request('POST', '/shorten',
+                       json.dumps({'url': url}).encode('utf-8'))
+    assert messages[0]['status'] == 201
+    messages = request('GET', '/2')
+    assert messages[0]['status'] == 302
+    assert (b'location', b'http://example.com/caf%C3%A9%E2%98%83?q=a%20b') \
+        in messages[0]['headers']
+
+
+class Failing(BaseShortener):
+
+    def __init__(self, error, **kwargs):
+        self.error = error
+        super(Failing, self).__init__(**kwargs)
+
+    def short(self, url):
+        raise self.error
+
+
+@pytest.mark.parametrize('error, status', [
+    (requests.exceptions.ConnectionError(), 502),
+    (QuotaExhaustedException('throttled', status_code=429), 502),
+    (requests.exceptions.ReadTimeout(), 504),
+    (DeadlineExceededException('Deadline of 1s exceeded'), 504),
+])
+def test_engine_errors_are_gateway_errors(error, status):
+    app = WSGIApp(engine=Failing(error), store=MemoryStore())
+    response = call(app, 'POST', '/shorten', b'url=http%3A%2F%2Fa.com')
+    assert response['status'].startswith(str(status))
+    assert 'error' in json.loads(response['body'].decode('utf-8'))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import multiprocessing
+import time
+
+from pyshorteners.client import Client
+from pyshorteners.sharedcache import SharedMemoryCache
+from pyshorteners.shorteners import Local
+
+import pytest
+
+expanded = 'http://www.test.com'
+
+
+@pytest.fixture
+def cache():
+    cache = SharedMemoryCache(slots=64, slot_size=128, ways=4)
+    yield cache
+    cache.close()
+
+
+def test_shared_memory_cache_get_and_set(cache):
+    cache.set(('expand', 'http://sho.rt/1'), expanded)
+    cache.set(('short', 'Local', expanded), 'http://sho.rt/1')
+    assert cache.get(('expand', 'http://sho.rt/1')) == expanded
+    assert cache.get(('short', 'Local', expanded)) == 'http://sho.rt/1'
+    assert cache.get(('expand', 'http://sho.rt/2')) is None
+    assert len(cache) == 2
+
+    cache.set(('expand', 'http://sho.rt/1'), 'http://www.test2.com')
+    assert cache.get(('expand', 'http://sho.rt/1')) == 'http://www.test2.com'
+    assert len(cache) == 2
+
+    cache.delete(('expand', 'http://sho.rt/1'))
+    assert ('expand', 'http://sho.rt/1') not in cache
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_shared_memory_cache_ttl_and_large_values(cache):
+    cache.set(('expand', 'a'), expanded, ttl=0.05)
+    cache.set(('expand', 'b'), 'http://www.test.com/' + 'a' * 200)
+    assert cache.get(('expand', 'a')) == expanded
+    assert cache.get(('expand', 'b')) is None
+    time.sleep(0.06)
+    assert cache.get(('expand', 'a')) is None
+
+
+def test_shared_memory_cache_evicts_least_recently_used(cache):
+    keys = [('expand', str(i)) for i in range(1000)]
+    for key in keys:
+        cache.set(key, expanded)
+        # a hot key survives the scan
+        assert cache.get(keys[0]) == expanded
+    assert len(cache) == 64
+    assert cache.get(keys[-1]) == expanded
+
+
+def _fill(cache, number):
+    for i in range(50):
+        cache.set(('expand', '{0}/{1}'.format(number, i)), str(i))
+
+
+def test_shared_memory_cache_between_processes():
+    cache = SharedMemoryCache(slots=4096, slot_size=128)
+    try:
+        processes = [multiprocessing.Process(target=_fill, args=(cache, n))
+                     for n in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        for number in range(4):
+            for i in range(50):
+                assert cache.get(('expand', '{0}/{1}'.format(number, i))) \
+                    == str(i)
+    finally:
+        cache.close()
+
+
+def test_client_with_shared_memory_cache(cache):
+    client = Client(Local(), cache=cache)
+    short = client.short(expanded)
+    assert cache.get(('expand', short)) == expanded
+    assert Client(Local(), cache=cache).expand(short) == expanded
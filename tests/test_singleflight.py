@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import asyncio
+import threading
+import time
+
+from pyshorteners import Shortener
+from pyshorteners.client import Client
+from pyshorteners.exceptions import ShorteningErrorException
+from pyshorteners.shorteners.base import BaseShortener
+from pyshorteners.singleflight import AsyncSingleFlight, SingleFlight
+
+import pytest
+
+
+def run_threads(target, count=8):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(target()))
+               for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_single_flight_shares_result():
+    flights = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'result'
+
+    results = run_threads(lambda: flights.do('key', slow))
+    assert results == ['result'] * 8
+    assert len(calls) == 1
+    assert len(flights) == 0
+
+
+def test_single_flight_shares_exception():
+    flights = SingleFlight()
+    calls = []
+
+    def failing():
+        calls.append(1)
+        time.sleep(0.1)
+        raise ShorteningErrorException('error')
+
+    def call():
+        try:
+            flights.do('key', failing)
+        except ShorteningErrorException as e:
+            return e
+
+    results = run_threads(call)
+    assert all(isinstance(e, ShorteningErrorException) for e in results)
+    assert len(calls) == 1
+
+    # finished calls are not remembered
+    with pytest.raises(ShorteningErrorException):
+        flights.do('key', failing)
+    assert len(calls) == 2
+
+
+def test_shortener_coalesce():
+    calls = []
+
+    class SlowShortener(BaseShortener):
+        def short(self, url):
+            calls.append(url)
+            time.sleep(0.1)
+            return 'http://sho.rt/1'
+
+    s = Shortener(SlowShortener, coalesce=True)
+    results = run_threads(lambda: s.short('http://www.test.com'))
+    assert results == ['http://sho.rt/1'] * 8
+    assert calls == ['http://www.test.com']
+
+
+def test_clients_do_not_share_flights():
+    class SlowShortener(BaseShortener):
+        def __init__(self, domain, **kwargs):
+            self.domain = domain
+            super(SlowShortener, self).__init__(**kwargs)
+
+        def short(self, url):
+            time.sleep(0.1)
+            return self.domain + '1'
+
+    clients = [Client(SlowShortener, domain=domain, coalesce=True)
+               for domain in ('https://a.io/', 'https://b.io/')]
+    results = {}
+
+    def call(client):
+        results[client] = client.short('http://www.test.com')
+
+    threads = [threading.Thread(target=call, args=(client,))
+               for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [results[client] for client in clients] == ['https://a.io/1',
+                                                       'https://b.io/1']
+
+
+def test_async_single_flight():
+    flights = AsyncSingleFlight()
+    calls = []
+
+    async def slow(value):
+        calls.append(value)
+        await asyncio.sleep(0.05)
+        return value
+
+    async def main():
+        return await asyncio.gather(*[flights.do('key', slow, 'result')
+                                      for _ in range(8)])
+
+    assert asyncio.run(main()) == ['result'] * 8
+    assert calls == ['result']
+    assert len(flights) == 0
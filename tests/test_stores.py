@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import threading
+
+from pyshorteners import Shortener, Shorteners
+from pyshorteners.shorteners import Local
+from pyshorteners.stores import (BloomStore, CompactStore, LogStore,
+                                 MemoryStore, SqliteStore)
+
+import responses
+
+shorten = 'http://tinyurl.com/test'
+expanded = 'http://www.test.com'
+
+
+def test_log_store_get_and_set(tmpdir):
+    store = LogStore(str(tmpdir.join('links')))
+    assert store.get('a') is None
+    assert store.get_code(expanded) is None
+
+    store.set('a', expanded)
+    store.set('b', 'http://www.test2.com')
+    assert store.get('a') == expanded
+    assert store.get('b') == 'http://www.test2.com'
+    assert store.get_code(expanded) == 'a'
+    assert len(store) == 2
+    assert 'a' in store
+    assert 'c' not in store
+
+
+def test_log_store_overwrite_keeps_clicks(tmpdir):
+    store = LogStore(str(tmpdir.join('links')))
+    store.set('a', expanded)
+    store.incr_clicks('a', 2)
+    store.set('a', 'http://www.test2.com')
+
+    assert store.get('a') == 'http://www.test2.com'
+    assert store.clicks('a') == 2
+    assert len(store) == 1
+
+
+def test_log_store_grows_and_reopens(tmpdir):
+    path = str(tmpdir.join('links'))
+    store = LogStore(path)
+    for i in range(5000):
+        store.set(str(i), 'http://www.test.com/{0}'.format(i))
+    store.incr_clicks('42')
+    store.close()
+
+    store = LogStore(path)
+    assert len(store) == 5000
+    assert store.get('4999') == 'http://www.test.com/4999'
+    assert store.get_code('http://www.test.com/1234') == '1234'
+    assert store.clicks('42') == 1
+
+
+def _read_while_writing(store, written, write):
+    # readers check the codes already written while the writer adds more
+    done = threading.Event()
+    errors = []
+
+    def read():
+        while not done.is_set():
+            for i in range(written):
+                if store.get(str(i)) != 'http://www.test.com/{0}'.format(i):
+                    errors.append(i)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    try:
+        write()
+    finally:
+        done.set()
+        for reader in readers:
+            reader.join()
+    return errors
+
+
+def test_log_store_reads_while_growing(tmpdir):
+    store = LogStore(str(tmpdir.join('links')))
+    for i in range(200):
+        store.set(str(i), 'http://www.test.com/{0}'.format(i))
+
+    def write():
+        # grows the index several times
+        for i in range(200, 20000):
+            store.set(str(i), 'http://www.test.com/{0}'.format(i))
+
+    assert _read_while_writing(store, 200, write) == []
+    assert store.get('19999') == 'http://www.test.com/19999'
+
+
+def test_local_engine_on_log_store(tmpdir):
+    path = str(tmpdir.join('links'))
+    engine = Local(store=LogStore(path))
+    short = engine.short(expanded)
+    engine.store.close()
+
+    engine = Local(store=LogStore(path))
+    assert engine.expand(short) == expanded
+    assert engine.short('http://www.test2.com') == 'http://localhost/2'
+
+
+@responses.activate
+def test_shortener_cache():
+    s = Shortener(Shorteners.TINYURL, cache=MemoryStore())
+    mock_url = '{}?url={}'.format(s.api_url, expanded)
+    responses.add(responses.GET, mock_url, body=shorten,
+                  match_querystring=True)
+
+    assert s.short(expanded) == shorten
+    assert s.short(expanded) == shorten
+    assert len(responses.calls) == 1
+    # the mapping learned on short also serves expand
+    assert s.expand(shorten) == expanded
+    assert len(responses.calls) == 1
+
+
+def test_compact_store_get_and_set():
+    store = CompactStore()
+    urls = ['http://www.test.com/a/{0}?q={0}'.format(i) for i in range(3000)]
+    urls += ['http://www.test.com', 'http://www.test.com/', 'test']
+    for i, url in enumerate(urls):
+        store.set(str(i), url)
+
+    assert len(store) == len(urls)
+    for i, url in enumerate(urls):
+        assert store.get(str(i)) == url
+        assert store.get_code(url) == str(i)
+    assert store.get('unknown') is None
+    assert store.get_code('http://www.unknown.com') is None
+
+
+def test_compact_store_clicks_and_overwrite():
+    store = CompactStore()
+    store.set('a', expanded)
+    store.incr_clicks('a', 3)
+    store.set('a', 'http://www.test2.com')
+
+    assert store.get('a') == 'http://www.test2.com'
+    assert store.clicks('a') == 3
+    assert store.clicks('b') == 0
+    assert len(store) == 1
+
+
+def test_compact_store_interns_hosts_and_prefixes():
+    store = CompactStore()
+    assert store.bytes_per_entry() == 0.0
+    for i in range(1000):
+        store.set(str(i), 'https://www.test.com/some/long/path/{0}'.format(i))
+
+    assert store._hosts == ['https://www.test.com']
+    assert store._prefixes == ['/some/long/path/']
+    assert store.bytes_per_entry() < 80
+
+
+def test_compact_store_caps_prefixes():
+    store = CompactStore(max_prefixes=10)
+    urls = ['http://www.test.com/user/{0}/profile'.format(i)
+            for i in range(100)]
+    for i, url in enumerate(urls):
+        store.set(str(i), url)
+
+    assert len(store._prefixes) == 11
+    for i, url in enumerate(urls):
+        assert store.get(str(i)) == url
+        assert store.get_code(url) == str(i)
+
+
+def test_compact_store_concurrent_writes():
+    store = CompactStore()
+
+    def write(start):
+        for i in range(start, start + 5000):
+            store.set(str(i), 'http://www.test.com/{0}'.format(i))
+
+    writers = [threading.Thread(target=write, args=(start,))
+               for start in range(0, 20000, 5000)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    assert len(store) == 20000
+    for i in range(20000):
+        assert store.get(str(i)) == 'http://www.test.com/{0}'.format(i)
+
+
+def test_compact_store_reads_while_growing():
+    store = CompactStore()
+    for i in range(200):
+        store.set(str(i), 'http://www.test.com/{0}'.format(i))
+
+    def write():
+        for i in range(200, 20000):
+            store.set(str(i), 'http://www.test.com/{0}'.format(i))
+
+    assert _read_while_writing(store, 200, write) == []
+
+
+class CountingStore(MemoryStore):
+
+    def __init__(self):
+        super(CountingStore, self).__init__()
+        self.lookups = 0
+
+    def get_code(self, url):
+        self.lookups += 1
+        return super(CountingStore, self).get_code(url)
+
+
+def test_bloom_store_skips_lookups_of_new_urls(tmpdir):
+    path = str(tmpdir.join('urls.bloom'))
+    store = BloomStore(CountingStore(), capacity=1000, path=path)
+    engine = Local(store=store)
+    short = engine.short(expanded)
+
+    assert store.get_code(expanded) == '1'
+    assert store.store.lookups == 1
+    for i in range(100):
+        assert store.get_code('http://www.test.com/{0}'.format(i)) is None
+    assert store.store.lookups < 5
+    assert engine.expand(short) == expanded
+    assert store.seen(expanded)
+    store.close()
+
+    assert expanded in BloomStore(MemoryStore(), path=path).bloom
+
+
+def test_bloom_store_fills_a_new_filter_from_the_store(tmpdir):
+    path = str(tmpdir.join('links'))
+    engine = Local(store=LogStore(path))
+    short = engine.short('http://a.com')
+    engine.store.close()
+
+    engine = Local(store=BloomStore(LogStore(path), capacity=1000))
+    assert engine.short('http://a.com') == short
+    assert engine.short('http://b.com') != short
+
+
+def test_stores_list_their_urls(tmpdir):
+    urls = ['http://www.test.com/{0}'.format(i) for i in range(50)]
+    for store in (MemoryStore(), SqliteStore(), CompactStore(),
+                  LogStore(str(tmpdir.join('links')))):
+        for i, url in enumerate(urls):
+            store.set(str(i), url)
+        # a second code of an url does not list it twice
+        store.set('again', urls[0])
+        assert sorted(store.urls()) == sorted(urls)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# encoding: utf-8
+import time
+
+from pyshorteners.cache import LRUCache
+from pyshorteners.client import Client
+from pyshorteners.shorteners import Local
+from pyshorteners.tinylfu import CountMinSketch, TinyLFUCache
+
+expanded = 'http://www.test.com'
+
+
+def test_count_min_sketch():
+    sketch = CountMinSketch(width=64)
+    for _ in range(5):
+        sketch.add('a')
+    sketch.add('b')
+    assert sketch.estimate('a') >= 5
+    assert sketch.estimate('b') >= 1
+    assert sketch.estimate('a') > sketch.estimate('b')
+    for _ in range(100):
+        sketch.add('a')
+    assert sketch.estimate('a') == 15
+
+
+def test_count_min_sketch_ages():
+    sketch = CountMinSketch(width=64)
+    for _ in range(10):
+        sketch.add('a')
+    for i in range(sketch.sample):
+        sketch.add(('scan', str(i)))
+    assert sketch.estimate('a') < 10
+
+
+def _key(i):
+    return ('expand', 'http://sho.rt/{0}'.format(i))
+
+
+def test_tinylfu_resists_scans():
+    hot = [_key(i) for i in range(20)]
+    tinylfu, lru = TinyLFUCache(maxbytes=4096), LRUCache(maxsize=100)
+    for cache in (tinylfu, lru):
+        for _ in range(5):
+            for key in hot:
+                if cache.get(key) is None:
+                    cache.set(key, expanded)
+        for i in range(1000, 6000):
+            key = _key(i)
+            if cache.get(key) is None:
+                cache.set(key, expanded)
+
+    assert all(tinylfu.get(key) == expanded for key in hot)
+    assert not any(key in lru for key in hot)
+    assert tinylfu.size <= 4096
+
+
+def test_tinylfu_counts_bytes():
+    cache = TinyLFUCache(maxbytes=2048)
+    for i in range(100):
+        cache.set(_key(i), 'http://www.test.com/' + 'a' * 200)
+    assert cache.size <= 2048
+    assert len(cache) < 10
+    cache.set(_key('big'), 'a' * 4096)
+    assert _key('big') not in cache
+
+
+def test_tinylfu_update_delete_and_ttl():
+    cache = TinyLFUCache(maxbytes=4096)
+    cache.set(_key(1), expanded)
+    cache.set(_key(1), 'http://www.test2.com')
+    assert cache.get(_key(1)) == 'http://www.test2.com'
+    assert len(cache) == 1
+
+    cache.delete(_key(1))
+    assert cache.get(_key(1)) is None
+    assert cache.size == 0
+
+    cache.set(_key(2), expanded, ttl=0.05)
+    assert cache.get(_key(2)) == expanded
+    time.sleep(0.06)
+    assert cache.get(_key(2)) is None
+
+
+def test_client_with_tinylfu_cache():
+    cache = TinyLFUCache(maxbytes=4096)
+    client = Client(Local(), cache=cache)
+    short = client.short(expanded)
+    assert client.short(expanded) == short
+    assert cache.get(('expand', short)) == expanded
@@ -1,7 +1,8 @@
 #!/usr/bin/env python
 # encoding: utf-8
 from pyshorteners import Shortener, Shorteners
-from pyshorteners.exceptions import ShorteningErrorException
+from pyshorteners.exceptions import (ShorteningErrorException,
+                                     ExpandingErrorException)
 
 import responses
 import pytest
@@ -34,3 +35,32 @@ def test_tinyurl_short_bad_response():
 
     with pytest.raises(ShorteningErrorException):
         s.short(expanded)
+
+
+@responses.activate
+def test_tinyurl_expand_uses_preview():
+    body = ('<a id="redirecturl" href="http://www.test.com/?a=1&amp;b=2">'
+            'Proceed</a>')
+    responses.add(responses.GET, 'https://preview.tinyurl.com/test',
+                  body=body)
+
+    assert s.expand(shorten) == 'http://www.test.com/?a=1&b=2'
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_tinyurl_expand_unknown_url():
+    responses.add(responses.GET, 'https://preview.tinyurl.com/test',
+                  status=404)
+
+    with pytest.raises(ExpandingErrorException):
+        s.expand(shorten)
+
+
+@responses.activate
+def test_tinyurl_expand_falls_back_to_redirect():
+    responses.add(responses.GET, 'https://preview.tinyurl.com/test',
+                  body='<html></html>')
+    responses.add(responses.GET, shorten, status=200)
+
+    assert s.expand(shorten) == shorten